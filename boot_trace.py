@@ -0,0 +1,158 @@
+"""
+boot_trace.py — Startup timeline for the Via dashboard.
+
+Import this module first (before Qt) so its clock covers library loading.
+main.py wraps each startup phase in ``phase()``; the first frame swapped by
+the window closes the timeline.  With BOOT_TRACE=true the phases are written
+to the log and to a Chrome trace file (load it in chrome://tracing or
+https://ui.perfetto.dev).  Boot-to-first-frame is always logged and checked
+against BOOT_BUDGET_MS.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+
+_IMPORT_T: float = time.monotonic()
+
+logger = logging.getLogger(__name__)
+
+# (name, start, end, thread id) — monotonic seconds; end == start for instants
+_events: list[tuple[str, float, float, int]] = []
+_lock = threading.Lock()
+_finished = False
+
+
+def _process_start() -> float:
+    """Monotonic timestamp of process creation (import time if unknown)."""
+    try:
+        with open("/proc/self/stat") as fh:
+            # Field 22 (starttime) counts clock ticks since boot; the command
+            # name in field 2 may contain spaces, so split after its ')'.
+            start_ticks = int(fh.read().rsplit(")", 1)[1].split()[19])
+        age = time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")
+        return min(_IMPORT_T, time.monotonic() - age)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _IMPORT_T
+
+
+_T0: float = _process_start()
+
+
+def elapsed_ms() -> float:
+    """Milliseconds since the process started."""
+    return (time.monotonic() - _T0) * 1000.0
+
+
+def mark(name: str) -> None:
+    """Record an instant event."""
+    if not config.BOOT_TRACE or _finished:
+        return
+    now = time.monotonic()
+    with _lock:
+        _events.append((name, now, now, threading.get_ident()))
+
+
+@contextmanager
+def phase(name: str):
+    """Record the duration of the enclosed block as a startup phase."""
+    if not config.BOOT_TRACE or _finished:
+        yield
+        return
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        with _lock:
+            _events.append((name, start, time.monotonic(), threading.get_ident()))
+
+
+def watch_first_frame(window, on_first_frame=None) -> None:
+    """Close the timeline when *window* (a QQuickWindow) swaps its first frame."""
+    from PyQt6.QtCore import Qt
+
+    done = False
+
+    def first_frame():
+        nonlocal done
+        if done:
+            return
+        done = True
+        window.frameSwapped.disconnect(first_frame)
+        finish()
+        if on_first_frame is not None:
+            on_first_frame()
+
+    # frameSwapped fires on the render thread; queue onto the GUI thread
+    window.frameSwapped.connect(first_frame, Qt.ConnectionType.QueuedConnection)
+
+
+def finish() -> None:
+    """Log the timeline and, when tracing, write the Chrome trace file."""
+    global _finished
+    if _finished:
+        return
+    mark("first_frame")
+    _finished = True
+
+    total_ms = elapsed_ms()
+    logger.info(
+        "Boot to first frame: %.0f ms (lazy views: %s, packaged: %s)",
+        total_ms,
+        "on" if config.LAZY_VIEWS else "off",
+        "on" if config.PACKAGED else "off",
+    )
+    if config.BOOT_BUDGET_MS and total_ms > config.BOOT_BUDGET_MS:
+        logger.warning(
+            "Boot exceeded budget: %.0f ms > %d ms", total_ms, config.BOOT_BUDGET_MS
+        )
+
+    if not config.BOOT_TRACE:
+        return
+
+    with _lock:
+        events = sorted(_events, key=lambda e: e[1])
+    for name, start, end, _tid in events:
+        if end > start:
+            logger.info(
+                "  boot %-28s %8.1f ms  (+%.1f ms)",
+                name, (start - _T0) * 1000.0, (end - start) * 1000.0,
+            )
+        else:
+            logger.info("  boot %-28s %8.1f ms", name, (start - _T0) * 1000.0)
+
+    try:
+        _write_chrome_trace(events)
+    except OSError:
+        logger.exception("Could not write boot trace to %s", config.BOOT_TRACE_FILE)
+
+
+def _write_chrome_trace(events: list[tuple[str, float, float, int]]) -> None:
+    pid = os.getpid()
+    main_tid = threading.main_thread().ident
+
+    def us(t: float) -> float:
+        return round((t - _T0) * 1_000_000.0, 1)
+
+    trace = [
+        {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "via"}},
+        {"name": "interpreter_start", "ph": "X", "pid": pid, "tid": main_tid,
+         "ts": 0.0, "dur": us(_IMPORT_T), "cat": "boot"},
+    ]
+    for name, start, end, tid in events:
+        event = {"name": name, "pid": pid, "tid": tid, "ts": us(start), "cat": "boot"}
+        if end > start:
+            event.update(ph="X", dur=round((end - start) * 1_000_000.0, 1))
+        else:
+            event.update(ph="i", s="p")
+        trace.append(event)
+
+    path = config.BOOT_TRACE_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, fh, indent=1)
+    logger.info("Boot trace written to %s", path)
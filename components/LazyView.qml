@@ -0,0 +1,32 @@
+import QtQuick
+
+// Loads `view` the first time it is shown (or pre-warmed) and keeps it alive
+// afterwards.  Nothing in the view file — including its imports — is compiled
+// until then, so heavy modules such as QtWebEngine stay unloaded at boot.
+// `eager` builds the view with the window instead, before the first frame.
+Loader {
+    id: lazy
+
+    property url view
+    property var viewProperties: ({})
+    property bool shown: false
+    property bool prewarm: false
+    property bool eager: false
+
+    visible: shown
+
+    // Pre-warming builds incrementally in the background; a view that is
+    // needed on screen right now is built synchronously.  Decided once per
+    // load: flipping `asynchronous` mid-load makes the Loader start over
+    // without viewProperties.
+    function ensureLoaded() {
+        if (status === Loader.Null) {
+            asynchronous = !shown && !eager
+            setSource(view, viewProperties)
+        }
+    }
+
+    onShownChanged: if (shown) ensureLoaded()
+    onPrewarmChanged: if (prewarm) ensureLoaded()
+    Component.onCompleted: if (shown || prewarm || eager) ensureLoaded()
+}
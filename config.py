@@ -5,6 +5,7 @@ All values can be overridden via environment variables.  Sensitive or
 machine-specific settings (port paths, etc.) belong here rather than
 scattered throughout the codebase.
 """
+import json
 import os
 from pathlib import Path
 
@@ -32,6 +33,111 @@ OBD_PORT: str | None = os.environ.get("OBD_PORT", None)
 # The OBD loop runs at 10 Hz; this downsamples writes to 1/sec by default.
 OBD_LOG_INTERVAL_S: float = float(os.environ.get("OBD_LOG_INTERVAL_S", "1.0"))
 
+# Remember the port, baud rate, protocol and supported PIDs of each working
+# connection and try those first next time (controllers/obd_profiles.py).
+OBD_PROFILES: bool = os.environ.get("OBD_PROFILES", "true").lower() != "false"
+
+# Synthetic drive data instead of an adapter (controllers/obd_simulator.py),
+# for desk testing and tools/soak.py.
+OBD_SIMULATE: bool = os.environ.get("OBD_SIMULATE", "false").lower() == "true"
+
+# ---------------------------------------------------------------------------
+# Telemetry bus
+# ---------------------------------------------------------------------------
+# Samples kept per topic; a consumer further behind than this loses samples
+# (counted as drops) rather than slowing acquisition.
+TELEMETRY_RING_SIZE: int = int(os.environ.get("TELEMETRY_RING_SIZE", "4096"))
+
+# How often the DB writer drains the bus and commits one batch.
+TELEMETRY_DB_FLUSH_S: float = float(os.environ.get("TELEMETRY_DB_FLUSH_S", "1.0"))
+
+# ---------------------------------------------------------------------------
+# Journal
+# ---------------------------------------------------------------------------
+# Every sample is also appended to a memory-mapped ring file, synced to disk
+# every JOURNAL_SYNC_MS, and replayed into the database on the next start
+# after a crash or power cut.
+JOURNAL_ENABLED: bool = os.environ.get("JOURNAL_ENABLED", "true").lower() != "false"
+JOURNAL_FILE: Path = Path(os.environ.get("JOURNAL_FILE", str(BASE_DIR / "telemetry.journal")))
+JOURNAL_SIZE_MB: int = int(os.environ.get("JOURNAL_SIZE_MB", "8"))
+JOURNAL_SYNC_MS: int = int(os.environ.get("JOURNAL_SYNC_MS", "200"))
+
+# ---------------------------------------------------------------------------
+# Alerts
+# ---------------------------------------------------------------------------
+# Rules evaluated on the live telemetry stream; see telemetry/alerts.py for
+# the fields.  Override with a JSON list in ALERT_RULES.
+ALERTS_ENABLED: bool = os.environ.get("ALERTS_ENABLED", "true").lower() != "false"
+ALERT_EVAL_S: float = float(os.environ.get("ALERT_EVAL_S", "0.5"))
+ALERT_RULES: list[dict] = json.loads(os.environ["ALERT_RULES"]) if "ALERT_RULES" in os.environ else [
+    {"name": "coolant_overtemp", "signal": "coolant_temp_c", "op": ">", "threshold": 105,
+     "hold_s": 30, "severity": "critical", "message": "Engine overheating"},
+    {"name": "coolant_rising", "signal": "coolant_temp_c", "stat": "rate", "window_s": 60,
+     "op": ">", "threshold": 0.25, "hold_s": 30,
+     "when": [{"signal": "coolant_temp_c", "op": ">", "threshold": 95}],
+     "message": "Coolant temperature climbing"},
+    {"name": "over_rev", "signal": "rpm", "op": ">", "threshold": 6500, "hold_s": 0.5,
+     "clear_s": 2, "severity": "critical", "message": "Engine over-rev"},
+    {"name": "throttle_stuck", "signal": "throttle_pct", "stat": "stddev", "window_s": 30,
+     "op": "<", "threshold": 0.1, "hold_s": 30,
+     "when": [{"signal": "rpm", "stat": "stddev", "window_s": 30, "op": ">", "threshold": 300}],
+     "message": "Throttle position sensor not responding"},
+    {"name": "gps_stall", "signal": "gps_fix_age_s", "op": ">", "threshold": 30, "hold_s": 10,
+     "when": [{"signal": "speed_kph", "stat": "mean", "window_s": 10, "op": ">", "threshold": 10}],
+     "message": "No GPS fix while driving"},
+]
+
+# ---------------------------------------------------------------------------
+# Trip analytics
+# ---------------------------------------------------------------------------
+# Used for the fuel estimate (calculated load × RPM × displacement).
+ENGINE_DISPLACEMENT_L: float = float(os.environ.get("ENGINE_DISPLACEMENT_L", "2.0"))
+# Gaps between readings longer than this are not counted as moving / idle time.
+ANALYTICS_MAX_GAP_S: float = float(os.environ.get("ANALYTICS_MAX_GAP_S", "5.0"))
+# GPS fixes less accurate than this are left out of the distance.
+ANALYTICS_MAX_GPS_ACCURACY_M: float = float(os.environ.get("ANALYTICS_MAX_GPS_ACCURACY_M", "50.0"))
+# Longitudinal acceleration thresholds for hard-acceleration / braking events.
+HARD_ACCEL_MS2: float = float(os.environ.get("HARD_ACCEL_MS2", "3.0"))
+HARD_BRAKE_MS2: float = float(os.environ.get("HARD_BRAKE_MS2", "4.0"))
+# Processes used by tools/analyze_sessions.py (0 = one per CPU).
+ANALYTICS_WORKERS: int = int(os.environ.get("ANALYTICS_WORKERS", "0"))
+
+# ---------------------------------------------------------------------------
+# Retention
+# ---------------------------------------------------------------------------
+# Readings are kept in full for RETENTION_FULL_DAYS, then thinned to one per
+# RETENTION_DOWNSAMPLE_S, then deleted after RETENTION_DOWNSAMPLE_DAYS
+# (session summaries stay).  Oldest sessions are summarised early when the
+# database grows past RETENTION_MAX_DB_MB (0 = no budget).
+RETENTION_ENABLED: bool = os.environ.get("RETENTION_ENABLED", "true").lower() != "false"
+RETENTION_FULL_DAYS: float = float(os.environ.get("RETENTION_FULL_DAYS", "7"))
+RETENTION_DOWNSAMPLE_DAYS: float = float(os.environ.get("RETENTION_DOWNSAMPLE_DAYS", "90"))
+RETENTION_DOWNSAMPLE_S: float = float(os.environ.get("RETENTION_DOWNSAMPLE_S", "10"))
+RETENTION_MAX_DB_MB: int = int(os.environ.get("RETENTION_MAX_DB_MB", "1024"))
+
+# First pass RETENTION_START_DELAY_S after start, then every RETENTION_INTERVAL_S.
+RETENTION_START_DELAY_S: float = float(os.environ.get("RETENTION_START_DELAY_S", "300"))
+RETENTION_INTERVAL_S: float = float(os.environ.get("RETENTION_INTERVAL_S", "3600"))
+
+# Deletes run in batches of RETENTION_BATCH_ROWS with a short pause between,
+# and free space is released RETENTION_VACUUM_PAGES pages at a time.
+RETENTION_BATCH_ROWS: int = int(os.environ.get("RETENTION_BATCH_ROWS", "500"))
+RETENTION_BATCH_PAUSE_S: float = float(os.environ.get("RETENTION_BATCH_PAUSE_S", "0.05"))
+RETENTION_VACUUM_PAGES: int = int(os.environ.get("RETENTION_VACUUM_PAGES", "256"))
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+# Rows read from the database and written out per step by tools/export_sessions.py.
+EXPORT_CHUNK_ROWS: int = int(os.environ.get("EXPORT_CHUNK_ROWS", "10000"))
+EXPORT_DIR: Path = Path(os.environ.get("EXPORT_DIR", str(BASE_DIR / "exports")))
+
+# ---------------------------------------------------------------------------
+# Session history
+# ---------------------------------------------------------------------------
+# Sessions loaded per page as the history list scrolls.
+HISTORY_PAGE_SIZE: int = int(os.environ.get("HISTORY_PAGE_SIZE", "50"))
+
 # ---------------------------------------------------------------------------
 # GPS
 # ---------------------------------------------------------------------------
@@ -43,12 +149,190 @@ GPS_BAUD_RATE: int = int(os.environ.get("GPS_BAUD_RATE", "9600"))
 # How often (in ms) the simulated GPS emits an update.
 GPS_UPDATE_INTERVAL_MS: int = int(os.environ.get("GPS_UPDATE_INTERVAL_MS", "2000"))
 
+# ---------------------------------------------------------------------------
+# Routing
+# ---------------------------------------------------------------------------
+# Offline road graph built by tools/build_road_graph.py from an OSM extract;
+# routing is off while the file is missing.
+ROUTING_GRAPH: Path = Path(os.environ.get("ROUTING_GRAPH", str(BASE_DIR / "roads.graph")))
+# "time" (fastest) or "length" (shortest)
+ROUTING_METRIC: str = os.environ.get("ROUTING_METRIC", "time")
+# ALT landmarks stored by the build, and how many of them a query uses.
+ROUTING_LANDMARKS: int = int(os.environ.get("ROUTING_LANDMARKS", "8"))
+ROUTING_ACTIVE_LANDMARKS: int = int(os.environ.get("ROUTING_ACTIVE_LANDMARKS", "4"))
+# Start and destination snap to the nearest road node within this distance.
+ROUTING_SNAP_M: float = float(os.environ.get("ROUTING_SNAP_M", "500"))
+# Re-route after this many fixes in a row farther than ROUTING_OFF_ROUTE_M
+# (plus the fix's accuracy) from the route.
+ROUTING_OFF_ROUTE_M: float = float(os.environ.get("ROUTING_OFF_ROUTE_M", "40"))
+ROUTING_OFF_ROUTE_FIXES: int = int(os.environ.get("ROUTING_OFF_ROUTE_FIXES", "3"))
+
+# ---------------------------------------------------------------------------
+# Dashcam
+# ---------------------------------------------------------------------------
+# CAMERA_ENABLED=true starts recording at boot (the camera tab can also
+# start and stop it).  Capture runs in an ffmpeg child process:
+#   v4l2       CAMERA_DEVICE, in CAMERA_INPUT_FORMAT (mjpeg / h264 are stored as-is)
+#   synthetic  a generated test pattern
+#   file       CAMERA_FILE, looped in real time
+CAMERA_ENABLED: bool = os.environ.get("CAMERA_ENABLED", "false").lower() == "true"
+CAMERA_SOURCE: str = os.environ.get("CAMERA_SOURCE", "v4l2")
+CAMERA_DEVICE: str = os.environ.get("CAMERA_DEVICE", "/dev/video0")
+CAMERA_FILE: str | None = os.environ.get("CAMERA_FILE", None)
+CAMERA_INPUT_FORMAT: str = os.environ.get("CAMERA_INPUT_FORMAT", "mjpeg")
+CAMERA_SIZE: str = os.environ.get("CAMERA_SIZE", "1280x720")
+CAMERA_FPS: int = int(os.environ.get("CAMERA_FPS", "30"))
+# Encoder for the recorded segments; empty = copy the camera's own stream
+# when it is compressed, else mjpeg.  h264_v4l2m2m is the Pi's hardware encoder.
+CAMERA_CODEC: str = os.environ.get("CAMERA_CODEC", "")
+CAMERA_BITRATE_KBPS: int = int(os.environ.get("CAMERA_BITRATE_KBPS", "4000"))
+# Segments are CAMERA_SEGMENT_S long; the oldest are deleted to keep at most
+# CAMERA_RING_MINUTES of video and CAMERA_RING_MB on disk.
+CAMERA_DIR: Path = Path(os.environ.get("CAMERA_DIR", str(BASE_DIR / "dashcam")))
+CAMERA_SEGMENT_S: int = int(os.environ.get("CAMERA_SEGMENT_S", "60"))
+CAMERA_RING_MINUTES: int = int(os.environ.get("CAMERA_RING_MINUTES", "30"))
+CAMERA_RING_MB: int = int(os.environ.get("CAMERA_RING_MB", "2048"))
+# Downscaled preview decoded by ffmpeg into CAMERA_BUFFERS reused frame buffers.
+CAMERA_PREVIEW_SIZE: str = os.environ.get("CAMERA_PREVIEW_SIZE", "640x360")
+CAMERA_PREVIEW_FPS: int = int(os.environ.get("CAMERA_PREVIEW_FPS", "10"))
+CAMERA_BUFFERS: int = int(os.environ.get("CAMERA_BUFFERS", "4"))
+# Scheduling niceness of the ffmpeg process, so it yields to OBD and the UI.
+CAMERA_NICE: int = int(os.environ.get("CAMERA_NICE", "10"))
+# Clips exported by tools/export_clip.py: seconds kept before and after the
+# event, telemetry subtitle updates per second, and the encoder used only
+# when the overlay is burned into the picture (a plain clip is stream-copied).
+CLIP_BEFORE_S: float = float(os.environ.get("CLIP_BEFORE_S", "20"))
+CLIP_AFTER_S: float = float(os.environ.get("CLIP_AFTER_S", "10"))
+CLIP_OVERLAY_HZ: float = float(os.environ.get("CLIP_OVERLAY_HZ", "2"))
+CLIP_BURN_CODEC: str = os.environ.get("CLIP_BURN_CODEC", "libx264")
+
 # ---------------------------------------------------------------------------
 # Bluetooth
 # ---------------------------------------------------------------------------
 BT_POLL_INTERVAL_MS: int = int(os.environ.get("BT_POLL_INTERVAL_MS", "2000"))
 
+# Deadline for media / device commands sent to BlueZ.  Kept well below the
+# 25 s D-Bus default so an unresponsive phone is reported quickly.
+DBUS_COMMAND_TIMEOUT_S: float = float(os.environ.get("DBUS_COMMAND_TIMEOUT_S", "2.0"))
+
+# ---------------------------------------------------------------------------
+# Adaptive polling
+# ---------------------------------------------------------------------------
+# RateGovernor slows OBD, MPRIS, Bluetooth and GPS polling when the engine
+# is off or idling, the relevant tab is hidden or no phone is connected.
+# ADAPTIVE_POLLING=false keeps every subsystem at its fixed rate.
+ADAPTIVE_POLLING: bool = os.environ.get("ADAPTIVE_POLLING", "true").lower() != "false"
+GOVERNOR_EVAL_MS: int = int(os.environ.get("GOVERNOR_EVAL_MS", "1000"))
+# Speed at or above which the car counts as driving rather than idling.
+GOVERNOR_MOVING_KPH: float = float(os.environ.get("GOVERNOR_MOVING_KPH", "3.0"))
+# A slower mode must hold this long before polling slows down.
+GOVERNOR_HOLD_S: float = float(os.environ.get("GOVERNOR_HOLD_S", "10.0"))
+
+# ---------------------------------------------------------------------------
+# Album art
+# ---------------------------------------------------------------------------
+# Number of decoded, display-sized images kept in memory by the art provider.
+ALBUM_ART_CACHE_SIZE: int = int(os.environ.get("ALBUM_ART_CACHE_SIZE", "16"))
+ALBUM_ART_FETCH_TIMEOUT_S: float = float(os.environ.get("ALBUM_ART_FETCH_TIMEOUT_S", "8.0"))
+# iTunes Search API, used when the phone sends no cover art.
+ALBUM_ART_SEARCH_URL: str = os.environ.get("ALBUM_ART_SEARCH_URL", "https://itunes.apple.com/search")
+
+# ---------------------------------------------------------------------------
+# UI
+# ---------------------------------------------------------------------------
+# Frame period used to pace controller → QML updates when no window frame
+# is available to sync to (hidden window, headless runs).
+FRAME_INTERVAL_MS: int = int(os.environ.get("FRAME_INTERVAL_MS", "16"))
+
+# Engine gauges: ramp between OBD samples instead of jumping.  The ramp
+# lasts one sample interval, capped at GAUGE_MAX_RAMP_S.
+GAUGE_INTERPOLATION: bool = os.environ.get("GAUGE_INTERPOLATION", "true").lower() != "false"
+GAUGE_MAX_RAMP_S: float = float(os.environ.get("GAUGE_MAX_RAMP_S", "0.25"))
+
+# Engine view sparklines: the last ENGINE_HISTORY_S seconds of each channel,
+# averaged into ENGINE_HISTORY_HZ slots per second.  Preallocated, 4 bytes
+# per slot per channel, and never grows.
+ENGINE_HISTORY_S: int = int(os.environ.get("ENGINE_HISTORY_S", "600"))
+ENGINE_HISTORY_HZ: float = float(os.environ.get("ENGINE_HISTORY_HZ", "2"))
+
+# Load tab views on first use.  Set LAZY_VIEWS=false to restore eager
+# loading when comparing boot times: WebEngine starts up front and every
+# view is built before the first frame.
+LAZY_VIEWS: bool = os.environ.get("LAZY_VIEWS", "true").lower() != "false"
+
+# Views built in the background once the first frame is up.  "navigation"
+# is left out by default: pre-warming it starts Chromium.
+PREWARM_VIEWS: list[str] = [
+    v.strip() for v in os.environ.get("PREWARM_VIEWS", "media,device").split(",") if v.strip()
+]
+
+# ---------------------------------------------------------------------------
+# Packaged mode
+# ---------------------------------------------------------------------------
+# PACKAGED=true loads QML, components and assets from the compiled resource
+# bundle built by tools/build_bundle.py, with its precompiled QML cache.
+# The default loose-file mode reads views/ and assets/ directly (development).
+PACKAGED: bool = os.environ.get("PACKAGED", "false").lower() == "true"
+RESOURCE_BUNDLE: Path = Path(
+    os.environ.get("RESOURCE_BUNDLE", str(BASE_DIR / "build" / "via.rcc"))
+)
+QML_CACHE_DIR: Path = Path(os.environ.get("QML_CACHE_DIR", str(BASE_DIR / "build" / "qmlcache")))
+
+# ---------------------------------------------------------------------------
+# Boot tracing
+# ---------------------------------------------------------------------------
+# BOOT_TRACE=true records every startup phase to the log and to a Chrome
+# trace file.  Boot-to-first-frame is always logged and compared to the budget
+# (0 disables the check).
+BOOT_TRACE: bool = os.environ.get("BOOT_TRACE", "false").lower() == "true"
+BOOT_TRACE_FILE: Path = Path(
+    os.environ.get("BOOT_TRACE_FILE", str(BASE_DIR / "logs" / "boot_trace.json"))
+)
+BOOT_BUDGET_MS: int = int(os.environ.get("BOOT_BUDGET_MS", "0"))
+
+# ---------------------------------------------------------------------------
+# Link supervision
+# ---------------------------------------------------------------------------
+# Dropped OBD / GPS / Bluetooth links are retried after RECONNECT_INITIAL_S,
+# doubling (with jitter) up to RECONNECT_MAX_S between attempts.
+RECONNECT_INITIAL_S: float = float(os.environ.get("RECONNECT_INITIAL_S", "1.0"))
+RECONNECT_MAX_S: float = float(os.environ.get("RECONNECT_MAX_S", "30.0"))
+# An OBD gap shorter than this continues the same DrivingSession; a longer
+# one ends it at the last reading and the reconnect starts a new one.
+SESSION_RESUME_GAP_S: float = float(os.environ.get("SESSION_RESUME_GAP_S", "120"))
+# A Bluetooth device that dropped is asked to reconnect for this long.
+BT_RECONNECT_WINDOW_S: float = float(os.environ.get("BT_RECONNECT_WINDOW_S", "300"))
+# A GPS receiver silent for this long is treated as disconnected.
+GPS_LINK_TIMEOUT_S: float = float(os.environ.get("GPS_LINK_TIMEOUT_S", "5.0"))
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+# Prometheus text endpoint at http://METRICS_HOST:METRICS_PORT/metrics
+# (METRICS_PORT=0 disables it).  Bound to localhost unless overridden.
+METRICS_HOST: str = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT: int = int(os.environ.get("METRICS_PORT", "9108"))
+
+# Refresh period of the hidden diagnostics page while it is open.
+DIAGNOSTICS_REFRESH_MS: int = int(os.environ.get("DIAGNOSTICS_REFRESH_MS", "1000"))
+
 # ---------------------------------------------------------------------------
 # Logging
 # ---------------------------------------------------------------------------
 LOG_LEVEL: str = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+# Records are queued and written by a background thread.  A full queue drops
+# records (counted) rather than blocking the caller.
+LOG_QUEUE_SIZE: int = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+# At most LOG_RATE_LIMIT records per call site per LOG_RATE_WINDOW_S
+# (0 disables); the rest are dropped and summarised on the next one.
+LOG_RATE_LIMIT: int = int(os.environ.get("LOG_RATE_LIMIT", "20"))
+LOG_RATE_WINDOW_S: float = float(os.environ.get("LOG_RATE_WINDOW_S", "10.0"))
+
+# LOG_BINARY=true also records DEBUG and above to a compact binary trace;
+# decode it with tools/decode_log.py.
+LOG_BINARY: bool = os.environ.get("LOG_BINARY", "false").lower() == "true"
+LOG_BINARY_FILE: Path = Path(
+    os.environ.get("LOG_BINARY_FILE", str(BASE_DIR / "logs" / "via.trace"))
+)
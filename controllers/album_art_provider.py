@@ -0,0 +1,130 @@
+import logging
+import threading
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QRect, QSize
+from PyQt6.QtGui import QImage, QImageReader
+from PyQt6.QtQml import QQmlImageProviderBase
+from PyQt6.QtQuick import QQuickImageProvider
+
+import config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+_FETCH_SECONDS = metrics.histogram("via_art_fetch_seconds", "Album-art download / file read")
+_DECODE_SECONDS = metrics.histogram("via_art_decode_seconds", "Album-art decode + downscale")
+_CACHE_HITS = metrics.counter("via_art_cache", "Album-art cache lookups", {"result": "hit"})
+_CACHE_MISSES = metrics.counter("via_art_cache", "Album-art cache lookups", {"result": "miss"})
+
+
+class AlbumArtProvider(QQuickImageProvider):
+    """Serves ``image://albumart/<percent-encoded url>`` to QML.
+
+    Qt calls requestImage() on its image-loader thread (the provider forces
+    asynchronous loading), so the download, JPEG decode and downscale never
+    touch the GUI thread.  Images are decoded straight to the requested
+    ``sourceSize`` — cropped to cover it, matching PreserveAspectCrop — and
+    kept in a small LRU cache so revisiting a track costs nothing.
+    """
+
+    PROVIDER_ID = "albumart"
+
+    def __init__(self, capacity: int = config.ALBUM_ART_CACHE_SIZE):
+        super().__init__(
+            QQmlImageProviderBase.ImageType.Image,
+            QQmlImageProviderBase.Flag.ForceAsynchronousImageLoading,
+        )
+        self._capacity = max(1, capacity)
+        self._cache: OrderedDict[tuple[str, int, int], QImage] = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # QQuickImageProvider
+    # ------------------------------------------------------------------
+
+    def requestImage(self, id: str, requestedSize: QSize):
+        url = urllib.parse.unquote(id)
+        width = requestedSize.width() if requestedSize.isValid() else 0
+        height = requestedSize.height() if requestedSize.isValid() else 0
+        key = (url, width, height)
+
+        with self._lock:
+            image = self._cache.get(key)
+            if image is not None:
+                self._cache.move_to_end(key)
+                _CACHE_HITS.inc()
+                return image, image.size()
+        _CACHE_MISSES.inc()
+
+        image = QImage()
+        try:
+            with _FETCH_SECONDS.time():
+                data = self._read(url)
+            with _DECODE_SECONDS.time():
+                image = self._decode(data, width, height)
+        except Exception:
+            logger.exception("Album art load failed for %s", url)
+
+        if image.isNull():
+            return image, QSize()
+
+        with self._lock:
+            self._cache[key] = image
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._capacity:
+                self._cache.popitem(last=False)
+
+        return image, image.size()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _read(url: str) -> bytes:
+        """Fetch the raw encoded bytes for a file:// or http(s):// URL."""
+        parsed = urllib.parse.urlparse(url)
+        if parsed.scheme in ("", "file"):
+            with open(urllib.parse.unquote(parsed.path), "rb") as fh:
+                return fh.read()
+        with urllib.request.urlopen(url, timeout=config.ALBUM_ART_FETCH_TIMEOUT_S) as resp:
+            return resp.read()
+
+    @staticmethod
+    def _decode(data: bytes, width: int, height: int) -> QImage:
+        """Decode *data*, scaling and centre-cropping to exactly width×height.
+
+        Passing the target size to QImageReader lets the JPEG decoder skip
+        most of the full-resolution work instead of scaling afterwards.
+        """
+        buffer = QBuffer()
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+
+        reader = QImageReader(buffer)
+        reader.setAutoTransform(True)
+
+        source = reader.size()
+        if width > 0 and height > 0 and source.isValid() and not source.isEmpty():
+            scale = max(width / source.width(), height / source.height())
+            scaled = QSize(
+                max(width, round(source.width() * scale)),
+                max(height, round(source.height() * scale)),
+            )
+            reader.setScaledSize(scaled)
+            reader.setScaledClipRect(QRect(
+                (scaled.width() - width) // 2,
+                (scaled.height() - height) // 2,
+                width,
+                height,
+            ))
+
+        image = reader.read()
+        if image.isNull():
+            logger.warning("Album art decode failed: %s", reader.errorString())
+            return image
+        # Premultiplied ARGB is what the scene graph uploads without conversion
+        return image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
@@ -1,30 +1,157 @@
 import logging
 
-from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal, pyqtSlot
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QSize, QTimer, pyqtProperty, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QImage
+from PyQt6.QtQml import QQmlImageProviderBase
+from PyQt6.QtQuick import QQuickImageProvider
+
+import config
+from controllers.dashcam import Capture
+from controllers.link_supervisor import LinkSupervisor
 
 logger = logging.getLogger(__name__)
 
 
+class CameraPreviewProvider(QQuickImageProvider):
+    """Serves ``image://dashcam/<frame number>`` to QML: the latest preview frame.
+
+    The QImage wraps the pool buffer ffmpeg's frame was read into, in the
+    premultiplied ARGB layout the scene graph uploads as-is, so the texture
+    upload is the only copy.  The buffer stays leased until two newer
+    frames have been shown.
+    """
+
+    PROVIDER_ID = "dashcam"
+
+    def __init__(self, capture: Capture):
+        super().__init__(QQmlImageProviderBase.ImageType.Image)
+        self._capture = capture
+
+    def requestImage(self, id: str, requestedSize: QSize):
+        pool = self._capture.pool
+        frame = pool.lease_latest()
+        if frame is None:
+            return QImage(), QSize()
+        index, _, _ = frame
+        width, height = self._capture.preview_size
+        image = QImage(
+            sip.voidptr(pool.buffer(index)), width, height, width * 4,
+            QImage.Format.Format_ARGB32_Premultiplied,
+        )
+        return image, image.size()
+
+
 class CameraController(QObject):
-    """Placeholder controller for future camera integration."""
+    """Dashcam recording and its live preview.
+
+    Capture runs in an ffmpeg process read by its own thread (see
+    controllers.dashcam); this object only starts and stops it and, while
+    the camera view is visible, tells QML when a new preview frame is ready.
+    """
 
     isActiveChanged = pyqtSignal(bool)
+    previewFrameChanged = pyqtSignal(int)
+    ringStatusChanged = pyqtSignal(str)
 
-    def __init__(self, parent=None):
+    def __init__(self, supervisor: LinkSupervisor | None = None, parent=None):
         super().__init__(parent)
         self._is_active = False
-        logger.debug("CameraController initialised (no hardware attached)")
+        self._preview_frame = 0
+        self._ring_status = ""
+        self._capture = Capture(on_first_frame=self._on_capture_started,
+                                on_exit=self._on_capture_exit)
+        self.preview_provider = CameraPreviewProvider(self._capture)
+
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setInterval(max(1, 1000 // config.CAMERA_PREVIEW_FPS))
+        self._preview_timer.timeout.connect(self._check_preview)
+
+        # Restarts the capture process if the camera drops out
+        self._supervisor = supervisor
+        if supervisor is not None:
+            supervisor.add("camera", self._restart)
 
     @pyqtProperty(bool, notify=isActiveChanged)
     def isActive(self):
         return self._is_active
 
+    @pyqtProperty(int, notify=previewFrameChanged)
+    def previewFrame(self):
+        return self._preview_frame
+
+    @pyqtProperty(str, notify=ringStatusChanged)
+    def ringStatus(self):
+        return self._ring_status
+
     @pyqtSlot()
     def start(self):
-        """Start camera capture — not yet implemented."""
-        logger.info("CameraController.start() called — not yet implemented")
+        """Start recording (and the preview feed)."""
+        if self._is_active:
+            return
+        try:
+            self._capture.start()
+        except (OSError, ValueError) as exc:
+            logger.error("Dashcam could not start: %s", exc)
+            return
+        self._set_active(True)
 
     @pyqtSlot()
     def stop(self):
-        """Stop camera capture — not yet implemented."""
-        logger.info("CameraController.stop() called — not yet implemented")
+        """Stop recording; the current segment is finalised."""
+        if self._supervisor is not None:
+            self._supervisor.cancel("camera")
+        self._capture.stop()
+        self._set_active(False)
+
+    @pyqtSlot(bool)
+    def setPreviewVisible(self, visible: bool):
+        """Called by the camera view; the preview costs nothing while hidden."""
+        if visible:
+            self._preview_timer.start()
+        else:
+            self._preview_timer.stop()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _set_active(self, active: bool) -> None:
+        if active != self._is_active:
+            self._is_active = active
+            self.isActiveChanged.emit(active)
+
+    def _check_preview(self) -> None:
+        seq = self._capture.pool.seq
+        if seq != self._preview_frame:
+            self._preview_frame = seq
+            self.previewFrameChanged.emit(seq)
+        ring = self._capture.ring
+        status = f"{ring.count} segments · {ring.total_bytes / 1e6:.0f} MB"
+        if status != self._ring_status:
+            self._ring_status = status
+            self.ringStatusChanged.emit(status)
+
+    def _on_capture_started(self) -> None:
+        # Capture thread
+        if self._supervisor is not None:
+            self._supervisor.up("camera")
+
+    def _on_capture_exit(self, got_frames: bool) -> None:
+        # Capture thread
+        if self._supervisor is None:
+            return
+        if got_frames:
+            self._supervisor.lost("camera")
+        else:
+            # A supervised restart that never produced a frame, or the first start
+            self._supervisor.failed("camera")
+            self._supervisor.watch("camera")
+
+    def _restart(self) -> None:
+        """Supervised attempt: a new capture process, up at its first frame."""
+        try:
+            self._capture.start()
+        except (OSError, ValueError) as exc:
+            logger.info("Dashcam restart failed: %s", exc)
+            self._supervisor.failed("camera")
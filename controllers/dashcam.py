@@ -0,0 +1,346 @@
+"""
+dashcam.py — Camera capture: a recorded segment ring and a live preview.
+
+One ffmpeg child process does the video work.  It reads the camera
+(V4L2, a synthetic test pattern or a looped file) and writes two outputs:
+
+    segments   CAMERA_SEGMENT_S files in CAMERA_DIR, cut on wall-clock
+               boundaries and named by their start time.  A compressed
+               camera stream (mjpeg, h264) is copied, not re-encoded.
+    preview    downscaled raw BGRA frames at CAMERA_PREVIEW_FPS on a pipe
+
+Frames are stamped with the wall clock on input and keep those stamps in
+the segments, so every recorded frame carries the epoch time telemetry is
+stored against; SegmentIndexer (controllers.dashcam_index) lists them per
+segment once the segment is complete.
+
+Running it as a separate, niced process keeps encoding and scaling off
+the interpreter entirely: the OBD loop and the GUI thread never wait on
+the GIL for it.  The one Python thread, Capture, only reads preview
+frames into a fixed FramePool with readinto() (no per-frame allocation)
+and prunes the segment ring.
+"""
+import logging
+import math
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable
+
+import config
+import metrics
+from controllers.dashcam_index import INDEX_SUFFIX, SEGMENT_SUFFIX, SegmentIndexer
+
+logger = logging.getLogger(__name__)
+
+# Matroska stays playable up to the last complete cluster if ffmpeg is
+# killed mid-segment (power cut); an unfinished MP4 has no index at all.
+_SEGMENT_FORMAT = "matroska"
+_SEGMENT_PATTERN = "%Y%m%d-%H%M%S" + SEGMENT_SUFFIX
+_COMPRESSED_INPUTS = ("mjpeg", "h264")
+_BYTES_PER_PIXEL = 4  # bgra
+
+_FRAMES = metrics.counter("via_camera_frames", "Preview frames read from the capture process")
+_EXITS = metrics.counter("via_camera_exits", "Capture process exits while recording")
+
+
+def parse_size(size: str) -> tuple[int, int]:
+    width, _, height = size.lower().partition("x")
+    return int(width), int(height)
+
+
+def segment_codec() -> str:
+    if config.CAMERA_CODEC:
+        return config.CAMERA_CODEC
+    if config.CAMERA_SOURCE != "synthetic" and (
+        config.CAMERA_SOURCE == "file" or config.CAMERA_INPUT_FORMAT in _COMPRESSED_INPUTS
+    ):
+        return "copy"
+    return "mjpeg"
+
+
+def ffmpeg_command(directory: Path, preview_size: tuple[int, int]) -> list[str]:
+    """The capture process for the configured CAMERA_SOURCE."""
+    if config.CAMERA_SOURCE == "v4l2":
+        source = [
+            "-f", "v4l2",
+            "-input_format", config.CAMERA_INPUT_FORMAT,
+            "-video_size", config.CAMERA_SIZE,
+            "-framerate", str(config.CAMERA_FPS),
+            "-i", config.CAMERA_DEVICE,
+        ]
+    elif config.CAMERA_SOURCE == "synthetic":
+        source = [
+            "-re", "-f", "lavfi",
+            "-i", f"testsrc2=size={config.CAMERA_SIZE}:rate={config.CAMERA_FPS}",
+        ]
+    elif config.CAMERA_SOURCE == "file":
+        if not config.CAMERA_FILE:
+            raise ValueError("CAMERA_SOURCE=file needs CAMERA_FILE")
+        source = ["-re", "-stream_loop", "-1", "-i", config.CAMERA_FILE]
+    else:
+        raise ValueError(f"unknown CAMERA_SOURCE {config.CAMERA_SOURCE!r}")
+    # Epoch timestamps on input, kept (-copyts) through to the segments
+    source = ["-use_wallclock_as_timestamps", "1", *source]
+
+    codec = segment_codec()
+    encode = ["-c:v", codec]
+    if codec != "copy":
+        encode += ["-b:v", f"{config.CAMERA_BITRATE_KBPS}k"]
+    width, height = preview_size
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-copyts",
+        *source,
+        # Recorded segments; cut by the clock, since the timestamps are epoch
+        "-map", "0:v", *encode, "-an",
+        "-f", "segment",
+        "-segment_time", str(config.CAMERA_SEGMENT_S),
+        "-segment_atclocktime", "1",
+        "-segment_format", _SEGMENT_FORMAT,
+        "-strftime", "1",
+        str(directory / _SEGMENT_PATTERN),
+        # Preview
+        "-map", "0:v",
+        "-vf", f"fps={config.CAMERA_PREVIEW_FPS},scale={width}:{height}",
+        "-pix_fmt", "bgra",
+        "-f", "rawvideo", "pipe:1",
+    ]
+
+
+def _lower_priority() -> None:
+    # Runs in the child between fork and exec
+    os.nice(config.CAMERA_NICE)
+
+
+# ---------------------------------------------------------------------------
+# Frame buffers
+# ---------------------------------------------------------------------------
+
+class FramePool:
+    """A fixed set of frame buffers, allocated once and reused.
+
+    The reader fills a free buffer and publishes it as the latest frame;
+    the buffer it replaces becomes free again unless the preview still
+    holds it.  The preview leases the latest frame and keeps its last two
+    leases (the image on screen and the one being uploaded), so with four
+    buffers the reader always finds a free one.
+    """
+
+    def __init__(self, count: int, frame_bytes: int):
+        self.frame_bytes = frame_bytes
+        self._buffers = [bytearray(frame_bytes) for _ in range(max(4, count))]
+        self._views = [memoryview(b) for b in self._buffers]
+        self._refs = [0] * len(self._buffers)
+        self._leases: deque[int] = deque()
+        self._latest: int | None = None
+        self._seq = 0
+        self._timestamp = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> int:
+        """A buffer to fill (reader thread)."""
+        with self._lock:
+            for index, refs in enumerate(self._refs):
+                if refs == 0 and index != self._latest:
+                    return index
+        raise RuntimeError("no free frame buffer")  # needs > 3 leases
+
+    def view(self, index: int) -> memoryview:
+        return self._views[index]
+
+    def buffer(self, index: int) -> bytearray:
+        return self._buffers[index]
+
+    def publish(self, index: int, timestamp: float) -> None:
+        with self._lock:
+            self._latest = index
+            self._seq += 1
+            self._timestamp = timestamp
+
+    @property
+    def seq(self) -> int:
+        """Number of the latest frame (0 before the first)."""
+        return self._seq
+
+    def lease_latest(self) -> tuple[int, int, float] | None:
+        """(buffer index, frame number, epoch time) of the latest frame, held for display."""
+        with self._lock:
+            if self._latest is None:
+                return None
+            index = self._latest
+            if not self._leases or self._leases[-1] != index:
+                self._refs[index] += 1
+                self._leases.append(index)
+                if len(self._leases) > 2:
+                    self._refs[self._leases.popleft()] -= 1
+            return index, self._seq, self._timestamp
+
+    def reset(self) -> None:
+        # Frame numbers keep counting, so the preview never reuses an image id
+        with self._lock:
+            self._latest = None
+
+
+# ---------------------------------------------------------------------------
+# Segment ring
+# ---------------------------------------------------------------------------
+
+class SegmentRing:
+    """The recorded segments in one directory, oldest deleted first.
+
+    Bounded by count (CAMERA_RING_MINUTES of segments) and by bytes
+    (CAMERA_RING_MB); the newest segment, still being written, is never
+    deleted.  A segment's frame index goes with it.
+    """
+
+    def __init__(self, directory: Path, max_segments: int, max_bytes: int):
+        self.directory = directory
+        self.max_segments = max(2, max_segments)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.count = 0
+
+    def segments(self) -> list[tuple[Path, int]]:
+        """(path, size) of every segment, oldest first."""
+        found = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(SEGMENT_SUFFIX) and entry.is_file():
+                    try:
+                        found.append((Path(entry.path), entry.stat().st_size))
+                    except FileNotFoundError:
+                        continue
+        found.sort()  # names are start times
+        return found
+
+    def prune(self) -> None:
+        found = self.segments()
+        total = sum(size for _, size in found)
+        while len(found) > 1 and (len(found) > self.max_segments or total > self.max_bytes):
+            path, size = found.pop(0)
+            for stale in (path, path.with_suffix(INDEX_SUFFIX)):
+                try:
+                    stale.unlink()
+                except FileNotFoundError:
+                    pass
+            total -= size
+            logger.debug("Dashcam segment %s rotated out", path.name)
+        self.total_bytes, self.count = total, len(found)
+
+
+# ---------------------------------------------------------------------------
+# Capture
+# ---------------------------------------------------------------------------
+
+class Capture:
+    """Runs the ffmpeg process and reads its preview frames on a thread.
+
+    Both callbacks run on the capture thread: ``on_first_frame()`` once a
+    started process delivers, ``on_exit(got_frames)`` if ffmpeg exits on
+    its own (camera unplugged, bad device) — not after stop().
+    """
+
+    def __init__(self, on_first_frame: Callable[[], None] | None = None,
+                 on_exit: Callable[[bool], None] | None = None):
+        self.preview_size = parse_size(config.CAMERA_PREVIEW_SIZE)
+        width, height = self.preview_size
+        self.pool = FramePool(config.CAMERA_BUFFERS, width * height * _BYTES_PER_PIXEL)
+        self.ring = SegmentRing(
+            config.CAMERA_DIR,
+            max_segments=math.ceil(config.CAMERA_RING_MINUTES * 60 / config.CAMERA_SEGMENT_S) + 1,
+            max_bytes=config.CAMERA_RING_MB * 1024 * 1024,
+        )
+        self.indexer = SegmentIndexer(self.ring.segments)
+        self._on_first_frame = on_first_frame
+        self._on_exit = on_exit
+        self._process: subprocess.Popen | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        metrics.gauge("via_camera_ring_bytes", "Dashcam segments on disk",
+                      fn=lambda: float(self.ring.total_bytes))
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        config.CAMERA_DIR.mkdir(parents=True, exist_ok=True)
+        command = ffmpeg_command(config.CAMERA_DIR, self.preview_size)
+        logger.debug("Dashcam: %s", " ".join(command))
+        self._stopping = False
+        self.pool.reset()
+        self._process = subprocess.Popen(
+            command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, bufsize=0,
+            preexec_fn=_lower_priority,
+        )
+        self._thread = threading.Thread(target=self._run, name="dashcam", daemon=True)
+        self._thread.start()
+        self.indexer.start()
+        logger.info("Dashcam recording to %s (%s, %s)", config.CAMERA_DIR,
+                    config.CAMERA_SOURCE, segment_codec())
+
+    def stop(self) -> None:
+        """Let ffmpeg finish the current segment, then wait for the reader."""
+        self._stopping = True
+        process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            process.send_signal(signal.SIGINT)
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        # The last segment is complete now; index it too
+        self.indexer.stop()
+
+    def _run(self) -> None:
+        process = self._process
+        stream = process.stdout
+        frame_bytes = self.pool.frame_bytes
+        got_frames = False
+        next_prune = 0.0
+        try:
+            while True:
+                index = self.pool.acquire()
+                view = self.pool.view(index)
+                filled = 0
+                while filled < frame_bytes:
+                    n = stream.readinto(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+                if filled < frame_bytes:
+                    break  # ffmpeg exited
+                self.pool.publish(index, time.time())
+                _FRAMES.inc()
+                if not got_frames:
+                    got_frames = True
+                    if self._on_first_frame is not None:
+                        self._on_first_frame()
+
+                now = time.monotonic()
+                if now >= next_prune:
+                    self.ring.prune()
+                    next_prune = now + config.CAMERA_SEGMENT_S / 2
+        except Exception:
+            logger.exception("Dashcam capture failed")
+        finally:
+            stream.close()
+
+        if self._stopping:
+            return
+        code = process.wait()
+        _EXITS.inc()
+        logger.warning("Dashcam capture process exited (code %s)", code)
+        self.ring.prune()
+        if self._on_exit is not None:
+            self._on_exit(got_frames)
@@ -0,0 +1,131 @@
+"""
+dashcam_clips.py — Cut the recorded video around an event, with telemetry.
+
+The frames in range are found with FrameIndex and joined with ffmpeg's
+concat demuxer, each segment trimmed by its in/out points.  By default
+the video is stream-copied — no decode, no re-encode — and the telemetry
+overlay (time, speed, RPM, position) travels as a subtitle track in the
+Matroska file.  burn=True renders the overlay into the picture instead,
+which means re-encoding with CLIP_BURN_CODEC.
+
+With a copied inter-frame stream (h264) a clip starts at the keyframe at
+or before the requested time; MJPEG cuts on the exact frame.
+"""
+import logging
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import config
+from controllers.dashcam_index import FrameIndex, Span, TelemetryPoint, TelemetryTrack
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ClipResult:
+    path: Path
+    start: float                    # epoch time of the first frame
+    end: float                      # ... and of the last
+    spans: list[Span] = field(default_factory=list)
+    burned: bool = False
+    seconds: float = 0.0
+
+    @property
+    def frames(self) -> int:
+        return sum(span.frames for span in self.spans)
+
+
+def _srt_time(seconds: float) -> str:
+    ms = max(0, round(seconds * 1000))
+    return f"{ms // 3_600_000:02d}:{ms // 60_000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+
+
+def overlay_text(point: TelemetryPoint) -> str:
+    parts = [datetime.fromtimestamp(point.timestamp).strftime("%H:%M:%S")]
+    if point.speed_kph is not None:
+        parts.append(f"{point.speed_kph:.0f} km/h")
+    if point.rpm is not None:
+        parts.append(f"{point.rpm:.0f} rpm")
+    if point.latitude is not None and point.longitude is not None:
+        parts.append(f"{point.latitude:.5f}, {point.longitude:.5f}")
+    return "   ".join(parts)
+
+
+def write_overlay(spans: list[Span], track: TelemetryTrack | None, path: Path) -> None:
+    """SRT cues at CLIP_OVERLAY_HZ on the clip's own timeline.
+
+    The concat demuxer plays the spans back to back, so a recording gap
+    between segments is skipped in the clip; cue times follow that.
+    """
+    frame_s = 1.0 / config.CAMERA_FPS
+    step = 1.0 / config.CLIP_OVERLAY_HZ
+    cues = []
+    clip_t = 0.0
+    for span in spans:
+        duration = span.last - span.first + frame_s
+        t = 0.0
+        while t < duration:
+            point = track.at(span.first + t) if track is not None else TelemetryPoint(span.first + t)
+            end = min(t + step, duration)
+            cues.append(f"{len(cues) + 1}\n{_srt_time(clip_t + t)} --> {_srt_time(clip_t + end)}\n"
+                        f"{overlay_text(point)}\n")
+            t += step
+        clip_t += duration
+    path.write_text("\n".join(cues), encoding="utf-8")
+
+
+def _concat_list(spans: list[Span], path: Path) -> None:
+    # In and out points are in the segments' own (epoch) timestamps; the
+    # out point is exclusive, so it sits half a frame past the last one
+    half_frame = 0.5 / config.CAMERA_FPS
+    lines = ["ffconcat version 1.0"]
+    for span in spans:
+        quoted = str(span.segment.resolve()).replace("'", "'\\''")
+        lines += [f"file '{quoted}'", f"inpoint {span.first:.6f}",
+                  f"outpoint {span.last + half_frame:.6f}"]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def export_clip(start: float, end: float, out: Path, session_id: int | None = None,
+                burn: bool = False, index: FrameIndex | None = None) -> ClipResult:
+    """Write the recorded video between epoch times *start* and *end* to *out*.
+
+    *out* gets the extension for the mode: .mkv copied, .mp4 burned.
+    Raises ValueError if nothing was recorded in range.
+    """
+    started = time.perf_counter()
+    index = index or FrameIndex()
+    spans = index.spans(start, end)
+    if not spans:
+        raise ValueError("no dashcam video recorded in that time range")
+    track = TelemetryTrack.load(session_id) if session_id is not None else None
+    out = out.with_suffix(".mp4" if burn else ".mkv")
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix="via-clip-") as tmp:
+        concat, overlay = Path(tmp) / "clip.ffconcat", Path(tmp) / "overlay.srt"
+        _concat_list(spans, concat)
+        write_overlay(spans, track, overlay)
+        command = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+                   "-f", "concat", "-safe", "0", "-i", str(concat)]
+        if burn:
+            command += [
+                "-vf", f"subtitles={overlay}",
+                "-c:v", config.CLIP_BURN_CODEC, "-b:v", f"{config.CAMERA_BITRATE_KBPS}k",
+                "-movflags", "+faststart", str(out),
+            ]
+        else:
+            command += ["-i", str(overlay), "-map", "0:v", "-map", "1:s",
+                        "-c:v", "copy", "-c:s", "srt", str(out)]
+        logger.debug("Clip: %s", " ".join(command))
+        subprocess.run(command, check=True)
+
+    result = ClipResult(out, spans[0].first, spans[-1].last, spans, burn,
+                        time.perf_counter() - started)
+    logger.info("Exported %d frames (%.1f s of video) to %s in %.2f s%s", result.frames,
+                result.end - result.start, out, result.seconds, " (re-encoded)" if burn else "")
+    return result
@@ -0,0 +1,276 @@
+"""
+dashcam_index.py — Dashcam frames against the telemetry clock.
+
+Segments keep the epoch timestamp every frame was captured at (see
+controllers.dashcam).  Once a segment is complete SegmentIndexer lists
+those timestamps, in order, into a sidecar ``<segment>.idx`` of raw
+float64s; the sidecar is deleted with its segment.
+
+FrameIndex maps an epoch time to the recorded frame nearest it, and
+TelemetryTrack maps it to the session's readings, both by binary search
+over sorted arrays:
+
+    index = FrameIndex()
+    frame = index.locate(t)                     # segment, frame number, offset
+    TelemetryTrack.load(session_id).at(frame.timestamp)
+
+A lookup is two np.searchsorted calls: microseconds, whatever the
+length of the ring or the session.
+"""
+import logging
+import os
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+import config
+import metrics
+from models import SessionLocal
+from models.analytics import load_arrays
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".mkv"
+INDEX_SUFFIX = ".idx"
+
+# A lookup this far past a segment's last frame is in a recording gap
+_MAX_FRAME_GAP_S = 1.0
+# Readings older than this at a given moment are not shown for it
+_MAX_READING_AGE_S = 3.0
+
+_INDEX_SECONDS = metrics.histogram("via_camera_index_seconds", "Indexing one dashcam segment")
+
+
+def _lower_priority() -> None:
+    os.nice(config.CAMERA_NICE)
+
+
+def frame_times(segment: Path) -> np.ndarray:
+    """Capture time (epoch s) of every frame in *segment*, ascending."""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time", "-of", "csv=p=0", str(segment),
+        ],
+        capture_output=True, text=True, check=True, preexec_fn=_lower_priority,
+    )
+    times = [float(line) for line in result.stdout.split() if line != "N/A"]
+    # Packets are in decode order; with B-frames that is not time order
+    return np.sort(np.array(times, dtype=np.float64))
+
+
+def write_index(segment: Path) -> int:
+    """Index *segment*; returns the number of frames."""
+    with _INDEX_SECONDS.time():
+        times = frame_times(segment)
+    path = segment.with_suffix(INDEX_SUFFIX)
+    tmp = path.with_name(path.name + ".tmp")
+    times.tofile(tmp)
+    os.replace(tmp, path)
+    return len(times)
+
+
+class SegmentIndexer:
+    """Indexes completed segments on a background thread.
+
+    *segments* lists the ring's (path, size) pairs, oldest first.  The
+    newest is still being written and is left alone until stop(), when
+    capture has finished it.  stop() only signals: the final segment is
+    indexed on a short-lived thread, so the caller never waits on ffprobe.
+    """
+
+    def __init__(self, segments: Callable[[], list[tuple[Path, int]]],
+                 interval_s: float = config.CAMERA_SEGMENT_S / 4):
+        self._segments = segments
+        self._interval_s = interval_s
+        # Set by stop(); a fresh one for every start()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        # A restart may overlap the previous run's final pass
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,),
+                                        name="dashcam-index", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        thread, self._thread = self._thread, None
+        try:
+            # Listed now: a restarted capture may add a newer, unfinished one
+            final = [path for path, _ in self._segments()]
+        except OSError:
+            return
+        # Left for the next run if the process exits first: by then it is
+        # no longer the newest segment
+        threading.Thread(target=self._finish, args=(thread, final),
+                         name="dashcam-index-final", daemon=True).start()
+
+    def index_pending(self, include_newest: bool = False) -> None:
+        try:
+            found = [path for path, _ in self._segments()]
+        except OSError:
+            return
+        self._index(found if include_newest else found[:-1])
+
+    def _index(self, segments: list[Path]) -> None:
+        with self._lock:
+            for segment in segments:
+                if segment.with_suffix(INDEX_SUFFIX).exists():
+                    continue
+                try:
+                    frames = write_index(segment)
+                    logger.debug("Indexed %s: %d frames", segment.name, frames)
+                except FileNotFoundError:
+                    continue  # rotated out meanwhile
+                except (OSError, subprocess.CalledProcessError, ValueError):
+                    logger.warning("Could not index dashcam segment %s", segment.name, exc_info=True)
+
+    def _finish(self, thread: threading.Thread | None, segments: list[Path]) -> None:
+        if thread is not None:
+            thread.join()
+        self._index(segments)
+
+    def _run(self, stop_event: threading.Event) -> None:
+        while not stop_event.is_set():
+            self.index_pending()
+            stop_event.wait(self._interval_s)
+
+
+# ---------------------------------------------------------------------------
+# Lookups
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class FrameRef:
+    segment: Path
+    frame: int          # number within the segment
+    timestamp: float    # epoch capture time
+    offset_s: float     # from the segment's first frame
+
+
+@dataclass(frozen=True)
+class Span:
+    """The recorded frames of one segment within a time range."""
+    segment: Path
+    first: float        # epoch time of the first frame in range
+    last: float         # ... and of the last
+    frames: int
+
+
+class FrameIndex:
+    """All indexed segments in a directory; refresh() picks up changes."""
+
+    def __init__(self, directory: Path = config.CAMERA_DIR):
+        self.directory = directory
+        self._loaded: dict[str, np.ndarray] = {}
+        self._names: list[str] = []
+        self._starts = np.empty(0)
+        self.refresh()
+
+    def refresh(self) -> None:
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith(INDEX_SUFFIX)]
+        except FileNotFoundError:
+            names = []
+        loaded = {}
+        for name in names:
+            times = self._loaded.get(name)
+            if times is None:
+                times = np.fromfile(self.directory / name, dtype=np.float64)
+            if times.size:
+                loaded[name] = times
+        self._loaded = loaded
+        self._names = sorted(loaded, key=lambda n: loaded[n][0])
+        self._starts = np.array([loaded[n][0] for n in self._names], dtype=np.float64)
+
+    def _segment(self, name: str) -> Path:
+        return (self.directory / name).with_suffix(SEGMENT_SUFFIX)
+
+    def locate(self, t: float) -> FrameRef | None:
+        """The frame captured nearest *t*, or None if nothing was recording."""
+        i = int(np.searchsorted(self._starts, t, side="right")) - 1
+        if i < 0:
+            if not self._names or self._starts[0] - t > _MAX_FRAME_GAP_S:
+                return None
+            i = 0
+        name = self._names[i]
+        times = self._loaded[name]
+        if t - times[-1] > _MAX_FRAME_GAP_S:
+            return None
+        j = int(np.searchsorted(times, t))
+        if j == len(times) or (j > 0 and t - times[j - 1] <= times[j] - t):
+            j -= 1
+        return FrameRef(self._segment(name), j, float(times[j]), float(times[j] - times[0]))
+
+    def spans(self, start: float, end: float) -> list[Span]:
+        """The recorded frames between *start* and *end*, segment by segment."""
+        first = max(0, int(np.searchsorted(self._starts, start, side="right")) - 1)
+        last = int(np.searchsorted(self._starts, end, side="right"))
+        result = []
+        for name in self._names[first:last]:
+            times = self._loaded[name]
+            lo, hi = np.searchsorted(times, start), np.searchsorted(times, end, side="right")
+            if hi > lo:
+                result.append(Span(self._segment(name), float(times[lo]), float(times[hi - 1]),
+                                   int(hi - lo)))
+        return result
+
+
+@dataclass(frozen=True)
+class TelemetryPoint:
+    timestamp: float
+    speed_kph: float | None = None
+    rpm: float | None = None
+    engine_load_pct: float | None = None
+    latitude: float | None = None
+    longitude: float | None = None
+
+
+def _finite(value: float) -> float | None:
+    return None if np.isnan(value) else float(value)
+
+
+class TelemetryTrack:
+    """One session's readings as sorted arrays, for lookups by time."""
+
+    def __init__(self, engine: np.ndarray, gps: np.ndarray):
+        # load_arrays() orders by id; replayed rows can be out of time order
+        self._engine = engine[np.argsort(engine[:, 0], kind="stable")]
+        self._gps = gps[np.argsort(gps[:, 0], kind="stable")]
+
+    @classmethod
+    def load(cls, session_id: int) -> "TelemetryTrack":
+        db = SessionLocal()
+        try:
+            return cls(*load_arrays(session_id, db))
+        finally:
+            db.close()
+
+    @staticmethod
+    def _row(table: np.ndarray, t: float) -> np.ndarray | None:
+        # Latest reading at or before t
+        i = int(np.searchsorted(table[:, 0], t, side="right")) - 1
+        if i < 0 or t - table[i, 0] > _MAX_READING_AGE_S:
+            return None
+        return table[i]
+
+    def at(self, t: float) -> TelemetryPoint:
+        values = {}
+        engine = self._row(self._engine, t)
+        if engine is not None:
+            _, rpm, speed, load = engine
+            values.update(rpm=_finite(rpm), speed_kph=_finite(speed), engine_load_pct=_finite(load))
+        gps = self._row(self._gps, t)
+        if gps is not None:
+            _, lat, lon, _ = gps
+            values.update(latitude=_finite(lat), longitude=_finite(lon))
+        return TelemetryPoint(t, **values)
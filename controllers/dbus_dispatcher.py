@@ -0,0 +1,195 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal
+
+import config
+import metrics
+
+try:
+    import dbus
+    from dbus.mainloop.glib import DBusGMainLoop
+    DBusGMainLoop(set_as_default=True)
+    _DBUS_AVAILABLE = True
+except ImportError:
+    _DBUS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_BLUEZ_SERVICE = "org.bluez"
+_NO_REPLY_ERROR = "org.freedesktop.DBus.Error.NoReply"
+
+
+@dataclass
+class _Command:
+    key: str
+    path: str
+    iface: str
+    method: str
+    args: tuple = ()
+    on_success: Callable[[], None] | None = None
+    on_error: Callable[[], None] | None = None
+    sent_at: float = 0.0
+
+
+@dataclass
+class _CommandStats:
+    sent: int = 0
+    ok: int = 0
+    failed: int = 0
+    timeouts: int = 0
+    merged: int = 0
+    last_ms: float = 0.0
+    max_ms: float = 0.0
+    total_ms: float = 0.0
+
+    def as_dict(self) -> dict:
+        done = self.ok + self.failed
+        return {
+            "sent": self.sent,
+            "ok": self.ok,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "merged": self.merged,
+            "lastMs": round(self.last_ms, 1),
+            "meanMs": round(self.total_ms / done, 1) if done else 0.0,
+            "maxMs": round(self.max_ms, 1),
+        }
+
+
+class DBusCommandDispatcher(QObject):
+    """Fire-and-forget BlueZ method calls that never block the GUI thread.
+
+    Each call goes out with reply/error handlers and a short deadline
+    instead of waiting on the 25 s D-Bus default.  Commands share a *key*
+    ("next", "play_pause", ...): while one is in flight, further submits
+    with the same key are merged into a single follow-up call that carries
+    the latest arguments, so a burst of taps costs at most two round trips.
+
+    Replies arrive through the GLib main loop, which Qt's event dispatcher
+    drives on the GUI thread, so callbacks may touch Qt properties directly.
+    """
+
+    statsChanged = pyqtSignal()
+
+    def __init__(self, bus=None, timeout_s: float = config.DBUS_COMMAND_TIMEOUT_S, parent=None):
+        super().__init__(parent)
+        self._timeout_s = timeout_s
+        self._bus = bus
+        if self._bus is None and _DBUS_AVAILABLE:
+            try:
+                self._bus = dbus.SystemBus()
+            except Exception:
+                logger.exception("Could not open system bus for command dispatch")
+        self._inflight: dict[str, _Command] = {}
+        self._pending: dict[str, _Command] = {}
+        self._stats: dict[str, _CommandStats] = {}
+
+    # ------------------------------------------------------------------
+    # Qt properties
+    # ------------------------------------------------------------------
+
+    @pyqtProperty("QVariantMap", notify=statsChanged)
+    def stats(self):
+        """Per-command counters and latency (ms), keyed by command key."""
+        return {key: s.as_dict() for key, s in self._stats.items()}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @property
+    def available(self) -> bool:
+        return _DBUS_AVAILABLE and self._bus is not None
+
+    def is_busy(self, key: str) -> bool:
+        """True while a command with *key* is in flight or queued behind one."""
+        return key in self._inflight or key in self._pending
+
+    def submit(
+        self,
+        key: str,
+        path: str,
+        iface: str,
+        method: str,
+        args: tuple = (),
+        on_success: Callable[[], None] | None = None,
+        on_error: Callable[[], None] | None = None,
+    ) -> bool:
+        """Queue *method* on *path*; returns False if D-Bus is unavailable."""
+        if not self.available or not path:
+            return False
+
+        command = _Command(key, path, iface, method, args, on_success, on_error)
+        if key in self._inflight:
+            if key in self._pending:
+                self._stats_for(key).merged += 1
+            self._pending[key] = command
+            return True
+
+        self._send(command)
+        return True
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _stats_for(self, key: str) -> _CommandStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _CommandStats()
+        return stats
+
+    def _send(self, command: _Command) -> None:
+        command.sent_at = time.monotonic()
+        self._inflight[command.key] = command
+        self._stats_for(command.key).sent += 1
+        try:
+            proxy = self._bus.get_object(_BLUEZ_SERVICE, command.path, introspect=False)
+            proxy.get_dbus_method(command.method, command.iface)(
+                *command.args,
+                reply_handler=lambda *_: self._finish(command, None),
+                error_handler=lambda err: self._finish(command, err),
+                timeout=self._timeout_s,
+            )
+        except Exception as err:
+            self._finish(command, err)
+
+    def _finish(self, command: _Command, error) -> None:
+        elapsed_ms = (time.monotonic() - command.sent_at) * 1000.0
+        metrics.histogram(
+            "via_dbus_call_seconds", "BlueZ command round trip", {"command": command.key}
+        ).observe(elapsed_ms / 1000.0)
+        stats = self._stats_for(command.key)
+        stats.last_ms = elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.total_ms += elapsed_ms
+
+        if error is None:
+            stats.ok += 1
+            logger.debug("D-Bus %s ok in %.1f ms", command.key, elapsed_ms)
+            callback = command.on_success
+        else:
+            stats.failed += 1
+            name = error.get_dbus_name() if hasattr(error, "get_dbus_name") else ""
+            if name == _NO_REPLY_ERROR:
+                stats.timeouts += 1
+            logger.warning("D-Bus %s failed after %.1f ms: %s", command.key, elapsed_ms, error)
+            callback = command.on_error
+
+        if self._inflight.get(command.key) is command:
+            del self._inflight[command.key]
+
+        if callback is not None:
+            try:
+                callback()
+            except Exception:
+                logger.exception("D-Bus %s callback failed", command.key)
+
+        pending = self._pending.pop(command.key, None)
+        if pending is not None:
+            self._send(pending)
+
+        self.statsChanged.emit()
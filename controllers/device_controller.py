@@ -2,7 +2,11 @@ import logging
 
 from PyQt6.QtCore import QObject, QTimer, pyqtProperty, pyqtSignal, pyqtSlot
 
+import boot_trace
 import config
+import metrics
+from controllers.dbus_dispatcher import DBusCommandDispatcher
+from controllers.link_supervisor import LinkSupervisor
 
 try:
     import dbus
@@ -15,6 +19,10 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+_POLL_SECONDS = metrics.histogram(
+    "via_bluez_call_seconds", "Blocking BlueZ call", {"call": "device_poll"}
+)
+
 _BLUEZ_SERVICE = "org.bluez"
 _DBUS_OM_IFACE = "org.freedesktop.DBus.ObjectManager"
 _DEVICE_IFACE = "org.bluez.Device1"
@@ -23,24 +31,26 @@ _AGENT_IFACE = "org.bluez.Agent1"
 _AGENT_PATH = "/org/bluez/via_agent"
 
 
-class _PairingAgent(dbus.service.Object):
-    """NoInputNoOutput pairing agent — auto-accepts all pairing requests."""
+if _DBUS_AVAILABLE:
+    # Defined only with dbus: the class body needs dbus.service
+    class _PairingAgent(dbus.service.Object):
+        """NoInputNoOutput pairing agent — auto-accepts all pairing requests."""
 
-    @dbus.service.method(_AGENT_IFACE, in_signature="o", out_signature="")
-    def RequestAuthorization(self, device):
-        logger.info("PairingAgent: auto-authorizing device %s", device)
+        @dbus.service.method(_AGENT_IFACE, in_signature="o", out_signature="")
+        def RequestAuthorization(self, device):
+            logger.info("PairingAgent: auto-authorizing device %s", device)
 
-    @dbus.service.method(_AGENT_IFACE, in_signature="os", out_signature="")
-    def AuthorizeService(self, device, uuid):
-        logger.info("PairingAgent: auto-authorizing service %s on %s", uuid, device)
+        @dbus.service.method(_AGENT_IFACE, in_signature="os", out_signature="")
+        def AuthorizeService(self, device, uuid):
+            logger.info("PairingAgent: auto-authorizing service %s on %s", uuid, device)
 
-    @dbus.service.method(_AGENT_IFACE, in_signature="", out_signature="")
-    def Cancel(self):
-        logger.info("PairingAgent: Cancel called")
+        @dbus.service.method(_AGENT_IFACE, in_signature="", out_signature="")
+        def Cancel(self):
+            logger.info("PairingAgent: Cancel called")
 
-    @dbus.service.method(_AGENT_IFACE, in_signature="", out_signature="")
-    def Release(self):
-        logger.info("PairingAgent: Release called")
+        @dbus.service.method(_AGENT_IFACE, in_signature="", out_signature="")
+        def Release(self):
+            logger.info("PairingAgent: Release called")
 
 
 class DeviceController(QObject):
@@ -50,8 +60,17 @@ class DeviceController(QObject):
     deviceTypeChanged = pyqtSignal(str)
     showDeviceViewChanged = pyqtSignal(bool)
 
-    def __init__(self, parent=None):
+    # Per-wakeup cost of the connection poll, read by RateGovernor
+    poll_cost = _POLL_SECONDS
+
+    def __init__(self, dispatcher: DBusCommandDispatcher | None = None,
+                 supervisor: LinkSupervisor | None = None, parent=None):
         super().__init__(parent)
+        self._dispatcher = dispatcher
+        self._supervisor = supervisor
+        # Device to reconnect after an unplanned drop; not after disconnectDevice()
+        self._lostPath = ""
+        self._userDisconnected = False
         self._hasConnectedDevice = False
         self._deviceName = ""
         self._deviceAddress = ""
@@ -59,21 +78,36 @@ class DeviceController(QObject):
         self._devicePath = ""
         self._showDeviceView = False
         self._bus = None
+        self._pollTimer: QTimer | None = None
 
         if _DBUS_AVAILABLE:
             try:
                 self._bus = dbus.SystemBus()
-                self._SetupAdapter()
-                self._RegisterPairingAgent()
+                if self._dispatcher is None:
+                    self._dispatcher = DBusCommandDispatcher(self._bus, parent=self)
+                with boot_trace.phase("bluez.adapter_setup"):
+                    self._SetupAdapter()
+                with boot_trace.phase("bluez.pairing_agent"):
+                    self._RegisterPairingAgent()
                 self._pollTimer = QTimer(self)
                 self._pollTimer.timeout.connect(self._PollConnectedDevice)
                 self._pollTimer.start(config.BT_POLL_INTERVAL_MS)
                 self._PollConnectedDevice()
+                if self._supervisor is not None:
+                    self._supervisor.add(
+                        "bluetooth", self._ReconnectDevice,
+                        expire_s=config.BT_RECONNECT_WINDOW_S, keep_trying=False,
+                    )
             except Exception:
                 logger.exception("BlueZ init failed")
         else:
             logger.warning("dbus not available — Bluetooth device detection disabled")
 
+    def set_poll_interval(self, interval_ms: int) -> None:
+        """Change the connected-device poll period (RateGovernor)."""
+        if self._pollTimer is not None:
+            self._pollTimer.setInterval(interval_ms)
+
     # ------------------------------------------------------------------
     # Adapter setup
     # ------------------------------------------------------------------
@@ -175,88 +209,109 @@ class DeviceController(QObject):
 
     @pyqtSlot()
     def disconnectDevice(self):
-        if not self._devicePath or not _DBUS_AVAILABLE or not self._bus:
+        if not self._devicePath or self._dispatcher is None:
             return
-        try:
-            device = dbus.Interface(
-                self._bus.get_object(_BLUEZ_SERVICE, self._devicePath),
-                _DEVICE_IFACE,
-            )
-            device.Disconnect()
-        except Exception:
-            logger.exception("Bluetooth disconnect failed")
+        # Optimistic: show the device as gone now; the poll restores it if
+        # the disconnect fails, once the command is no longer in flight.
+        self._userDisconnected = True
+        if self._supervisor is not None:
+            self._supervisor.cancel("bluetooth")
+        self._dispatcher.submit("disconnect", self._devicePath, _DEVICE_IFACE, "Disconnect")
+        self._ApplyDevice("", "", "", "")
+
+    # ------------------------------------------------------------------
+    # Reconnect
+    # ------------------------------------------------------------------
+
+    def _ReconnectDevice(self):
+        """Supervised attempt: ask BlueZ to reconnect the device that dropped."""
+        submitted = self._dispatcher is not None and self._dispatcher.submit(
+            "reconnect", self._lostPath, _DEVICE_IFACE, "Connect",
+            on_success=lambda: self._supervisor.up("bluetooth"),
+            on_error=lambda: self._supervisor.failed("bluetooth"),
+        )
+        if not submitted:
+            self._supervisor.failed("bluetooth")
 
     # ------------------------------------------------------------------
     # Polling
     # ------------------------------------------------------------------
 
-    def _PollConnectedDevice(self):
-        try:
-            manager = dbus.Interface(
-                self._bus.get_object(_BLUEZ_SERVICE, "/"),
-                _DBUS_OM_IFACE,
+    def _ApplyDevice(self, path, name, address, dev_type):
+        """Publish the connected device (empty strings when none)."""
+        previous_name = self._deviceName
+        self._devicePath = path
+        if name != self._deviceName:
+            self._deviceName = name
+            self.deviceNameChanged.emit(name)
+        if address != self._deviceAddress:
+            self._deviceAddress = address
+            self.deviceAddressChanged.emit(address)
+        if dev_type != self._deviceType:
+            self._deviceType = dev_type
+            self.deviceTypeChanged.emit(dev_type)
+
+        found = bool(path)
+        if found != self._hasConnectedDevice:
+            self._hasConnectedDevice = found
+            self.hasConnectedDeviceChanged.emit(found)
+            logger.info(
+                "Bluetooth device %s: %s",
+                "connected" if found else "disconnected",
+                name or previous_name or "unknown",
             )
-            objects = manager.GetManagedObjects()
+            if self._supervisor is not None:
+                if found:
+                    self._userDisconnected = False
+                    self._supervisor.up("bluetooth")
+                elif not self._userDisconnected and self._lostPath:
+                    self._supervisor.lost("bluetooth")
+        if found:
+            self._lostPath = path
 
-            found_path = found_name = found_address = found_type = ""
-
-            # Two-pass: prefer audio (MediaControl1) devices over plain connected devices.
-            audio_candidate = plain_candidate = None
-            for path, interfaces in objects.items():
-                if _DEVICE_IFACE not in interfaces:
-                    continue
-                props = interfaces[_DEVICE_IFACE]
-                if not props.get("Connected", False):
-                    continue
-                candidate = (
-                    str(path),
-                    str(props.get("Name", props.get("Address", "Unknown"))),
-                    str(props.get("Address", "")),
-                    str(props.get("Icon", "")),
-                )
-                if _MEDIA_CONTROL_IFACE in interfaces:
-                    audio_candidate = candidate
-                    break  # audio device found — no need to keep scanning
-                elif plain_candidate is None:
-                    plain_candidate = candidate
-
-            best = audio_candidate or plain_candidate
-            if best:
-                found_path, found_name, found_address, found_type = best
-
-            found = bool(found_path)
-
-            if found:
-                self._devicePath = found_path
-                if found_name != self._deviceName:
-                    self._deviceName = found_name
-                    self.deviceNameChanged.emit(found_name)
-                if found_address != self._deviceAddress:
-                    self._deviceAddress = found_address
-                    self.deviceAddressChanged.emit(found_address)
-                if found_type != self._deviceType:
-                    self._deviceType = found_type
-                    self.deviceTypeChanged.emit(found_type)
-            else:
-                self._devicePath = ""
-                if self._deviceName:
-                    self._deviceName = ""
-                    self.deviceNameChanged.emit("")
-                if self._deviceAddress:
-                    self._deviceAddress = ""
-                    self.deviceAddressChanged.emit("")
-                if self._deviceType:
-                    self._deviceType = ""
-                    self.deviceTypeChanged.emit("")
-
-            if found != self._hasConnectedDevice:
-                self._hasConnectedDevice = found
-                self.hasConnectedDeviceChanged.emit(found)
-                logger.info(
-                    "Bluetooth device %s: %s",
-                    "connected" if found else "disconnected",
-                    found_name or self._deviceName or "unknown",
+    def _PollConnectedDevice(self):
+        try:
+            with _POLL_SECONDS.time():
+                manager = dbus.Interface(
+                    self._bus.get_object(_BLUEZ_SERVICE, "/"),
+                    _DBUS_OM_IFACE,
                 )
-
+                objects = manager.GetManagedObjects()
+            self.apply_managed_objects(objects)
         except Exception:
             logger.exception("Bluetooth poll error")
+
+    def apply_managed_objects(self, objects: dict) -> None:
+        """Pick the connected device from a BlueZ GetManagedObjects() result.
+
+        Called by the poll; tools/soak.py feeds simulated results here.
+        """
+        found_path = found_name = found_address = found_type = ""
+
+        # Two-pass: prefer audio (MediaControl1) devices over plain connected devices.
+        audio_candidate = plain_candidate = None
+        for path, interfaces in objects.items():
+            if _DEVICE_IFACE not in interfaces:
+                continue
+            props = interfaces[_DEVICE_IFACE]
+            if not props.get("Connected", False):
+                continue
+            candidate = (
+                str(path),
+                str(props.get("Name", props.get("Address", "Unknown"))),
+                str(props.get("Address", "")),
+                str(props.get("Icon", "")),
+            )
+            if _MEDIA_CONTROL_IFACE in interfaces:
+                audio_candidate = candidate
+                break  # audio device found — no need to keep scanning
+            elif plain_candidate is None:
+                plain_candidate = candidate
+
+        best = audio_candidate or plain_candidate
+        if best:
+            found_path, found_name, found_address, found_type = best
+
+        if self._dispatcher is not None and self._dispatcher.is_busy("disconnect"):
+            return
+        self._ApplyDevice(found_path, found_name, found_address, found_type)
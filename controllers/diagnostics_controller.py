@@ -0,0 +1,84 @@
+import logging
+import math
+
+from PyQt6.QtCore import QObject, QTimer, pyqtProperty, pyqtSignal, pyqtSlot
+
+import config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _format_value(name: str, value: float) -> str:
+    if math.isnan(value):
+        return "—"
+    if name.endswith("_bytes"):
+        return f"{value / (1024 * 1024):.1f} MiB"
+    if value == int(value):
+        return str(int(value))
+    return f"{value:.2f}"
+
+
+def _format_seconds(value: float) -> str:
+    return f"{value * 1000.0:.1f}"
+
+
+class DiagnosticsController(QObject):
+    """Feeds the hidden diagnostics page from the metrics registry.
+
+    Snapshots are only taken while the page is open, once per
+    DIAGNOSTICS_REFRESH_MS, so the page costs nothing when hidden.
+    """
+
+    activeChanged = pyqtSignal(bool)
+    rowsChanged = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._active = False
+        self._rows: list[dict] = []
+        self._timer = QTimer(self)
+        self._timer.setInterval(config.DIAGNOSTICS_REFRESH_MS)
+        self._timer.timeout.connect(self._refresh)
+
+    @pyqtProperty(bool, notify=activeChanged)
+    def active(self):
+        return self._active
+
+    @pyqtProperty("QVariantList", notify=rowsChanged)
+    def rows(self):
+        """[{name, labels, summary}] — histograms as count and p50/p95/p99/max ms."""
+        return self._rows
+
+    @pyqtSlot()
+    def open(self):
+        if not self._active:
+            self._active = True
+            self.activeChanged.emit(True)
+            self._refresh()
+            self._timer.start()
+            logger.info("Diagnostics page opened")
+
+    @pyqtSlot()
+    def close(self):
+        if self._active:
+            self._active = False
+            self._timer.stop()
+            self.activeChanged.emit(False)
+
+    def _refresh(self):
+        rows = []
+        for row in metrics.REGISTRY.snapshot():
+            if row["kind"] == "histogram":
+                summary = (
+                    f"n={row['count']}  p50 {_format_seconds(row['p50'])}  "
+                    f"p95 {_format_seconds(row['p95'])}  p99 {_format_seconds(row['p99'])}  "
+                    f"max {_format_seconds(row['max'])} ms"
+                    if row["name"].endswith("_seconds")
+                    else f"n={row['count']}  p50 {row['p50']:.3g}  p99 {row['p99']:.3g}"
+                )
+            else:
+                summary = _format_value(row["name"], row["value"])
+            rows.append({"name": row["name"], "labels": row["labels"], "summary": summary})
+        self._rows = rows
+        self.rowsChanged.emit()
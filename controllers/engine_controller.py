@@ -1,46 +1,111 @@
 import logging
+import math
 import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from threading import Thread
+from threading import Event, Thread
 
 import obd
-from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal, pyqtSlot
-from PyQt6.QtGui import QGuiApplication
+from PyQt6.QtCore import QCoreApplication, QObject, pyqtProperty, pyqtSignal, pyqtSlot
 
 import config
+import metrics
 import models
-from models import DrivingSession, EngineReading, SessionLocal
+from controllers.engine_history import HistoryModel, RollingHistory
+from controllers.link_supervisor import LinkSupervisor
+from controllers.obd_profiles import open_connection
+from controllers.snapshot import FrameClock, SnapshotModel
+from models import DrivingSession, SessionLocal
+from telemetry import EngineSample, TelemetryBus
 
 logger = logging.getLogger(__name__)
 
+_SAMPLES = metrics.counter("via_obd_samples", "OBD samples published")
+_SAMPLE_RATE = metrics.gauge("via_obd_sample_rate_hz", "Achieved OBD sample rate")
+_SWEEP_SECONDS = metrics.histogram("via_obd_sweep_seconds", "One pass over every OBD PID")
+
+# Seconds between link health checks, and how long every PID may go unanswered
+_HEALTH_CHECK_S = 2.0
+
+
+@dataclass(frozen=True)
+class EngineState:
+    """Everything EngineController exposes to QML, as one immutable record."""
+
+    connected: bool = False
+    connection_status: str = "Not Connected"
+    # Raw numeric readings; math.nan until the PID first answers
+    rpm: float = math.nan
+    speed: float = math.nan     # km/h
+    coolant_temp: float = math.nan  # °C
+    throttle: float = math.nan  # %
+    engine_load: float = math.nan  # %
+    # Monotonic time of the OBD sample these values came from
+    sampled_at: float = 0.0
+
 
 class EngineController(QObject):
     # Property-change signals consumed by QML
     connectedChanged = pyqtSignal(bool)
     connectionStatusChanged = pyqtSignal(str)
-    rpmChanged = pyqtSignal(int)
-    speedChanged = pyqtSignal(int)
-    coolantTempChanged = pyqtSignal(str)
-    throttleChanged = pyqtSignal(str)
-    engineLoadChanged = pyqtSignal(str)
+    rpmChanged = pyqtSignal(float)
+    speedChanged = pyqtSignal(float)
+    coolantTempChanged = pyqtSignal(float)
+    throttleChanged = pyqtSignal(float)
+    engineLoadChanged = pyqtSignal(float)
 
     # Emits the active session PK (or -1 when no session is open).
-    # Other controllers listen to this to associate their own DB rows.
+    # Producers stamp samples from TelemetryBus.session_id instead.
     sessionIdChanged = pyqtSignal(int)
 
-    def __init__(self, parent=None):
+    # Per-wakeup cost of the poll loop, read by RateGovernor
+    poll_cost = _SWEEP_SECONDS
+
+    def __init__(
+        self,
+        bus: TelemetryBus | None = None,
+        clock: FrameClock | None = None,
+        supervisor: LinkSupervisor | None = None,
+        parent=None,
+    ):
         super().__init__(parent)
         self.connection = None
-        self._connected = False
-        self._connectionStatus = "Not Connected"
-        self._rpm = 0
-        self._speed = 0
-        self._coolantTemp = "N/A"
-        self._throttle = "N/A"
-        self._engineLoad = "N/A"
         self.running = True
         self.obd_thread = None
         self._session_id: int | None = None
+        # Epoch time of the newest sample; an interrupted session ends here
+        self._last_sample_ts: float | None = None
+        # Pause between PID sweeps; RateGovernor changes it with the drive mode
+        self._poll_interval_s = 0.1
+        self._poll_wake = Event()
+        clock = clock or FrameClock(self)
+
+        # Written by the OBD thread, applied to QML once per frame
+        self._state = SnapshotModel(
+            self,
+            EngineState(),
+            {
+                "connected": self.connectedChanged,
+                "connection_status": self.connectionStatusChanged,
+                "rpm": self.rpmChanged,
+                "speed": self.speedChanged,
+                "coolant_temp": self.coolantTempChanged,
+                "throttle": self.throttleChanged,
+                "engine_load": self.engineLoadChanged,
+            },
+            clock,
+        )
+        # Last ENGINE_HISTORY_S of each channel for the sparklines, fixed size
+        self._history = HistoryModel(RollingHistory(), clock, self)
+
+        self._bus = bus or TelemetryBus()
+        self._bus.subscribe(EngineSample, "engine-ui", notify=self._on_sample)
+
+        # Without a supervisor a dropped link ends the session and stays down
+        self._supervisor = supervisor
+        if supervisor is not None:
+            supervisor.add("obd", self._reconnect, expire_s=config.SESSION_RESUME_GAP_S,
+                           on_expired=self._end_interrupted_session)
 
     # ------------------------------------------------------------------
     # Qt properties
@@ -48,73 +113,48 @@ class EngineController(QObject):
 
     @pyqtProperty(bool, notify=connectedChanged)
     def connected(self):
-        return self._connected
+        return self._state.applied.connected
 
     @connected.setter
     def connected(self, value):
-        if self._connected != value:
-            self._connected = value
-            self.connectedChanged.emit(value)
+        self._state.update(connected=value)
 
     @pyqtProperty(str, notify=connectionStatusChanged)
     def connectionStatus(self):
-        return self._connectionStatus
+        return self._state.applied.connection_status
 
     @connectionStatus.setter
     def connectionStatus(self, value):
-        if self._connectionStatus != value:
-            self._connectionStatus = value
-            self.connectionStatusChanged.emit(value)
+        self._state.update(connection_status=value)
 
-    @pyqtProperty(int, notify=rpmChanged)
+    @pyqtProperty(float, notify=rpmChanged)
     def rpm(self):
-        return self._rpm
-
-    @rpm.setter
-    def rpm(self, value):
-        if self._rpm != value:
-            self._rpm = value
-            self.rpmChanged.emit(value)
+        return self._state.applied.rpm
 
-    @pyqtProperty(int, notify=speedChanged)
+    @pyqtProperty(float, notify=speedChanged)
     def speed(self):
-        return self._speed
+        return self._state.applied.speed
 
-    @speed.setter
-    def speed(self, value):
-        if self._speed != value:
-            self._speed = value
-            self.speedChanged.emit(value)
-
-    @pyqtProperty(str, notify=coolantTempChanged)
+    @pyqtProperty(float, notify=coolantTempChanged)
     def coolantTemp(self):
-        return self._coolantTemp
-
-    @coolantTemp.setter
-    def coolantTemp(self, value):
-        if self._coolantTemp != value:
-            self._coolantTemp = value
-            self.coolantTempChanged.emit(value)
+        return self._state.applied.coolant_temp
 
-    @pyqtProperty(str, notify=throttleChanged)
+    @pyqtProperty(float, notify=throttleChanged)
     def throttle(self):
-        return self._throttle
+        return self._state.applied.throttle
 
-    @throttle.setter
-    def throttle(self, value):
-        if self._throttle != value:
-            self._throttle = value
-            self.throttleChanged.emit(value)
-
-    @pyqtProperty(str, notify=engineLoadChanged)
+    @pyqtProperty(float, notify=engineLoadChanged)
     def engineLoad(self):
-        return self._engineLoad
+        return self._state.applied.engine_load
+
+    @pyqtProperty(QObject, constant=True)
+    def history(self):
+        return self._history
 
-    @engineLoad.setter
-    def engineLoad(self, value):
-        if self._engineLoad != value:
-            self._engineLoad = value
-            self.engineLoadChanged.emit(value)
+    @property
+    def latest_state(self) -> EngineState:
+        """Newest published reading, ahead of what the property getters show."""
+        return self._state.latest
 
     # ------------------------------------------------------------------
     # OBD connection
@@ -123,26 +163,72 @@ class EngineController(QObject):
     @pyqtSlot()
     def attemptConnection(self):
         """Start OBD connection attempt in a background thread."""
+        if self._supervisor is not None:
+            self._supervisor.cancel("obd")
         self.connectionStatus = "Connecting..."
         Thread(target=self._connect_obd, daemon=True).start()
 
     def _connect_obd(self):
         try:
-            self.connection = obd.OBD(config.OBD_PORT)
-
-            if self.connection.is_connected():
-                self._open_session()
-                self.connected = True
-                self.connectionStatus = "Connected"
-                self.obd_thread = Thread(target=self._obd_loop, daemon=True)
-                self.obd_thread.start()
-            else:
-                self.connectionStatus = "No adapter found"
-
+            self._open_link()
         except Exception:
             logger.exception("OBD connection error")
             self.connectionStatus = "Connection error"
 
+    def keep_connected(self) -> None:
+        """Connect now and, through the supervisor, keep retrying until it works."""
+        if self._supervisor is None:
+            self.attemptConnection()
+            return
+        self.connectionStatus = "Connecting..."
+        self._supervisor.watch("obd")
+
+    def _reconnect(self) -> None:
+        """One supervised attempt (GUI thread); the result goes back to the supervisor."""
+        self.connectionStatus = "Reconnecting..."
+
+        def attempt():
+            try:
+                ok = self._open_link()
+            except Exception:
+                logger.exception("OBD reconnect error")
+                ok = False
+            if ok:
+                self._supervisor.up("obd")
+            else:
+                self._supervisor.failed("obd")
+
+        Thread(target=attempt, daemon=True).start()
+
+    def _open_link(self) -> bool:
+        """Open the adapter and start the poll loop; True if connected."""
+        self.connection, report = open_connection(config.OBD_PORT)
+
+        if not self.connection.is_connected():
+            logger.info("No OBD adapter found (%.2f s)", report.seconds + report.fallback_s)
+            self._release_connection()
+            self.connectionStatus = "No adapter found"
+            return False
+
+        logger.info(
+            "OBD connected on %s, protocol %s, in %.2f s (%s%s)",
+            self.connection.port_name(), self.connection.protocol_name(), report.seconds,
+            report.path, f", after {report.fallback_s:.2f} s on the stale profile"
+            if report.fallback_s else "",
+        )
+        if (self._session_id is not None and self._last_sample_ts is not None
+                and time.time() - self._last_sample_ts > config.SESSION_RESUME_GAP_S):
+            # This attempt outlasted the gap before the supervisor saw it expire
+            self._end_interrupted_session()
+        if self._session_id is None:
+            self._open_session()
+        else:
+            logger.info("Driving session %d continues after the reconnect", self._session_id)
+        self._state.update(connected=True, connection_status="Connected")
+        self.obd_thread = Thread(target=self._obd_loop, daemon=True)
+        self.obd_thread.start()
+        return True
+
     def _open_session(self) -> None:
         """Create a DrivingSession row and broadcast its ID."""
         db = SessionLocal()
@@ -153,6 +239,7 @@ class EngineController(QObject):
             db.refresh(session)
             self._session_id = session.id
             logger.info("Driving session started (id=%d)", self._session_id)
+            self._bus.set_session(self._session_id, time.time())
             self.sessionIdChanged.emit(self._session_id)
         except Exception:
             logger.exception("Failed to create DrivingSession")
@@ -160,15 +247,16 @@ class EngineController(QObject):
         finally:
             db.close()
 
-    def _close_session(self) -> None:
-        """Stamp ended_at on the current DrivingSession."""
+    def _close_session(self, ended_at: float | None = None) -> None:
+        """Stamp ended_at (default now, epoch seconds) on the current DrivingSession."""
         if self._session_id is None:
             return
+        ended_at = ended_at or time.time()
         db = SessionLocal()
         try:
             session = db.get(DrivingSession, self._session_id)
             if session:
-                session.ended_at = datetime.now(timezone.utc)
+                session.ended_at = datetime.fromtimestamp(ended_at, timezone.utc)
                 db.commit()
                 logger.info("Driving session ended (id=%d)", self._session_id)
         except Exception:
@@ -177,90 +265,146 @@ class EngineController(QObject):
         finally:
             db.close()
             self._session_id = None
+            self._bus.set_session(None, ended_at)
             self.sessionIdChanged.emit(-1)
 
+    def _end_interrupted_session(self) -> None:
+        """The link stayed down past SESSION_RESUME_GAP_S: the drive is over."""
+        logger.info("OBD gap exceeded %.0f s; ending session %s at the last reading",
+                    config.SESSION_RESUME_GAP_S, self._session_id)
+        self._close_session(self._last_sample_ts)
+
     # ------------------------------------------------------------------
     # OBD data loop
     # ------------------------------------------------------------------
 
+    def set_poll_interval(self, interval_ms: int) -> None:
+        """Change the pause between PID sweeps; a shorter one takes effect now."""
+        faster = interval_ms / 1000.0 < self._poll_interval_s
+        self._poll_interval_s = interval_ms / 1000.0
+        if faster:
+            self._poll_wake.set()
+
     def _obd_loop(self):
-        """Background thread: read OBD PIDs and persist telemetry."""
-        last_check = time.monotonic()
-        last_log = time.monotonic()
+        """Background thread: read OBD PIDs and publish them to the bus."""
+        last_check = last_answer = time.monotonic()
+        last_sample = None
+        link_lost = False
 
-        while self.running and self._connected:
+        while self.running and self._state.latest.connected:
             try:
                 now = time.monotonic()
 
                 # Periodic connection health-check
-                if now - last_check > 2:
+                if now - last_check > _HEALTH_CHECK_S:
                     if not self.connection.is_connected():
                         logger.warning("OBD connection lost")
-                        self.connected = False
-                        self.connectionStatus = "Disconnected"
+                        self._state.update(connected=False, connection_status="Disconnected")
+                        link_lost = True
                         break
                     last_check = now
 
                 # Query PIDs
-                rpm_r = self.connection.query(obd.commands.RPM)
-                speed_r = self.connection.query(obd.commands.SPEED)
-                coolant_r = self.connection.query(obd.commands.COOLANT_TEMP)
-                throttle_r = self.connection.query(obd.commands.THROTTLE_POS)
-                load_r = self.connection.query(obd.commands.ENGINE_LOAD)
-
-                # Extract raw numeric values for logging before formatting
-                rpm_val = int(rpm_r.value.magnitude) if not rpm_r.is_null() else None
-                speed_val = int(speed_r.value.magnitude) if not speed_r.is_null() else None
-                coolant_val = int(coolant_r.value.magnitude) if not coolant_r.is_null() else None
-                throttle_val = int(throttle_r.value.magnitude) if not throttle_r.is_null() else None
-                load_val = int(load_r.value.magnitude) if not load_r.is_null() else None
-
-                # Update Qt properties (drives QML)
-                if rpm_val is not None:
-                    self.rpm = rpm_val
-                if speed_val is not None:
-                    self.speed = speed_val
-                if coolant_val is not None:
-                    self.coolantTemp = f"{coolant_val}°C"
-                if throttle_val is not None:
-                    self.throttle = f"{throttle_val}%"
-                if load_val is not None:
-                    self.engineLoad = f"{load_val}%"
-
-                # Persist one reading per OBD_LOG_INTERVAL_S
-                if now - last_log >= config.OBD_LOG_INTERVAL_S:
-                    self._write_reading(rpm_val, speed_val, coolant_val, throttle_val, load_val)
-                    last_log = now
-
-                time.sleep(0.1)  # 10 Hz
+                with _SWEEP_SECONDS.time():
+                    rpm_r = self._query(obd.commands.RPM)
+                    speed_r = self._query(obd.commands.SPEED)
+                    coolant_r = self._query(obd.commands.COOLANT_TEMP)
+                    throttle_r = self._query(obd.commands.THROTTLE_POS)
+                    load_r = self._query(obd.commands.ENGINE_LOAD)
+
+                # Extract raw numeric values
+                rpm_val = float(rpm_r.value.magnitude) if not rpm_r.is_null() else None
+                speed_val = float(speed_r.value.magnitude) if not speed_r.is_null() else None
+                coolant_val = float(coolant_r.value.magnitude) if not coolant_r.is_null() else None
+                throttle_val = float(throttle_r.value.magnitude) if not throttle_r.is_null() else None
+                load_val = float(load_r.value.magnitude) if not load_r.is_null() else None
+
+                if all(r.is_null() for r in (rpm_r, speed_r, coolant_r, throttle_r, load_r)):
+                    # Nothing answered: the adapter dropped or the ECU went
+                    # quiet (python-obd may still say connected).  Publish
+                    # no empty sample, so an interrupted session ends at
+                    # its last real reading
+                    if not self.connection.is_connected() or now - last_answer > _HEALTH_CHECK_S:
+                        logger.warning("OBD link silent")
+                        self._state.update(connected=False, connection_status="Disconnected")
+                        link_lost = True
+                        break
+                    self._poll_wake.wait(self._poll_interval_s)
+                    self._poll_wake.clear()
+                    continue
+                last_answer = now
+
+                # Hand the sample to the bus; UI, DB and others subscribe
+                self._last_sample_ts = time.time()
+                self._bus.publish(EngineSample(
+                    timestamp=self._last_sample_ts,
+                    session_id=self._bus.session_id,
+                    rpm=rpm_val,
+                    speed_kph=speed_val,
+                    coolant_temp_c=coolant_val,
+                    throttle_pct=throttle_val,
+                    engine_load_pct=load_val,
+                ))
+                _SAMPLES.inc()
+                if last_sample is not None:
+                    # Smoothed achieved rate, not the nominal one
+                    rate = 1.0 / max(now - last_sample, 1e-6)
+                    _SAMPLE_RATE.set(rate if not _SAMPLE_RATE.value else
+                                     0.9 * _SAMPLE_RATE.value + 0.1 * rate)
+                last_sample = now
+
+                self._poll_wake.wait(self._poll_interval_s)
+                self._poll_wake.clear()
 
             except Exception:
                 logger.exception("OBD read error")
-                self.connected = False
-                self.connectionStatus = "Read error"
+                self._state.update(connected=False, connection_status="Read error")
+                link_lost = True
                 break
 
-        self._close_session()
+        if link_lost and self.running and self._supervisor is not None:
+            # Keep the session open; the supervisor resumes or ends it
+            self._release_connection()
+            self._supervisor.lost("obd")
+        else:
+            self._close_session()
 
-    def _write_reading(self, rpm, speed_kph, coolant_temp_c, throttle_pct, engine_load_pct) -> None:
-        db = SessionLocal()
-        try:
-            reading = EngineReading(
-                session_id=self._session_id,
-                timestamp=datetime.now(timezone.utc),
-                rpm=rpm,
-                speed_kph=speed_kph,
-                coolant_temp_c=coolant_temp_c,
-                throttle_pct=throttle_pct,
-                engine_load_pct=engine_load_pct,
-            )
-            db.add(reading)
-            db.commit()
-        except Exception:
-            logger.exception("Failed to write EngineReading")
-            db.rollback()
-        finally:
-            db.close()
+    def _release_connection(self) -> None:
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                logger.debug("Closing the dropped OBD connection failed", exc_info=True)
+
+    def _query(self, command):
+        latency = metrics.histogram(
+            "via_obd_query_seconds", "OBD PID query round trip", {"pid": command.name}
+        )
+        with latency.time():
+            return self.connection.query(command)
+
+    def _on_sample(self, sample: EngineSample) -> None:
+        """Bus subscriber (OBD thread): fold the sample into the UI snapshot and history."""
+        now = time.monotonic()
+        self._history.add(now, {
+            "rpm": sample.rpm,
+            "speed": sample.speed_kph,
+            "coolant_temp": sample.coolant_temp_c,
+            "engine_load": sample.engine_load_pct,
+        })
+        changes = {"sampled_at": now}
+        if sample.rpm is not None:
+            changes["rpm"] = sample.rpm
+        if sample.speed_kph is not None:
+            changes["speed"] = sample.speed_kph
+        if sample.coolant_temp_c is not None:
+            changes["coolant_temp"] = sample.coolant_temp_c
+        if sample.throttle_pct is not None:
+            changes["throttle"] = sample.throttle_pct
+        if sample.engine_load_pct is not None:
+            changes["engine_load"] = sample.engine_load_pct
+        self._state.update(**changes)
 
     # ------------------------------------------------------------------
     # Control slots
@@ -268,16 +412,14 @@ class EngineController(QObject):
 
     @pyqtSlot()
     def disconnect(self):
+        if self._supervisor is not None:
+            self._supervisor.cancel("obd")
         self.connected = False
+        self._poll_wake.set()
         if self.connection:
             self.connection.close()
             self.connection = None
-        self.connectionStatus = "Not Connected"
-        self.rpm = 0
-        self.speed = 0
-        self.coolantTemp = "N/A"
-        self.throttle = "N/A"
-        self.engineLoad = "N/A"
+        self._state.publish(EngineState())
         # _close_session is called at the end of _obd_loop; call it here
         # too for the case where disconnect() is invoked before the loop exits.
         if self._session_id is not None:
@@ -287,4 +429,4 @@ class EngineController(QObject):
     def quit(self):
         self.running = False
         self.disconnect()
-        QGuiApplication.quit()
+        QCoreApplication.quit()
@@ -0,0 +1,199 @@
+"""
+engine_history.py — Rolling per-channel engine history for the sparklines.
+
+RollingHistory keeps one preallocated array('f') ring per channel.  The
+OBD thread averages samples into fixed-rate slots, and the newest slot
+overwrites the oldest once the ring is full.  HistoryModel shows the
+retained slots to QML, oldest first.  Each frame it signals the slots
+added and evicted since the last frame as row inserts and removes, never
+as a reset, so views update only the changed rows.
+"""
+import math
+import threading
+from array import array
+
+from PyQt6.QtCore import (
+    QAbstractListModel, QByteArray, QModelIndex, Qt, pyqtProperty, pyqtSignal,
+)
+
+import config
+from controllers.snapshot import FrameClock
+
+# EngineSample-derived channels kept, and their QML role names
+CHANNELS = ("rpm", "speed", "coolant_temp", "engine_load")
+_ROLES = ("rpm", "speed", "coolantTemp", "engineLoad")
+
+
+class RollingHistory:
+    """Fixed-size history of the engine channels at a fixed slot rate.
+
+    Each slot spans 1 / hz seconds of monotonic time and holds the mean of
+    the samples that fell in it.  It is committed when the first sample of
+    a later slot arrives.  Slots with no sample (link down) are stored as
+    math.nan.  Slots are numbered from 0 in commit order.  Only the last
+    ``capacity`` of them, ``first <= slot < appended``, are retained.
+    """
+
+    def __init__(self, seconds: float = config.ENGINE_HISTORY_S,
+                 hz: float = config.ENGINE_HISTORY_HZ, channels=CHANNELS):
+        self.hz = hz
+        self.capacity = max(2, int(round(seconds * hz)))
+        self.channels = tuple(channels)
+        self._rings = {name: array("f", [math.nan]) * self.capacity for name in self.channels}
+        self._lock = threading.Lock()
+        self._appended = 0
+        # The open (uncommitted) slot: absolute time slot and running sums
+        self._slot: int | None = None
+        self._sums = dict.fromkeys(self.channels, 0.0)
+        self._counts = dict.fromkeys(self.channels, 0)
+
+    @property
+    def appended(self) -> int:
+        """Slots committed so far; the next one gets this number."""
+        return self._appended
+
+    @property
+    def first(self) -> int:
+        """Oldest slot still retained."""
+        return max(0, self._appended - self.capacity)
+
+    def add(self, now: float, values: dict[str, float | None]) -> bool:
+        """Fold one sample taken at monotonic *now* in; True if slots were committed."""
+        slot = int(now * self.hz)
+        committed = False
+        if self._slot is None:
+            self._slot = slot
+        elif slot > self._slot:
+            # Gaps longer than the ring only need the ring's worth of nan
+            gap = min(slot - self._slot - 1, self.capacity)
+            with self._lock:
+                self._commit(self._means())
+                for _ in range(gap):
+                    self._commit(None)
+            self._slot = slot
+            self._sums = dict.fromkeys(self.channels, 0.0)
+            self._counts = dict.fromkeys(self.channels, 0)
+            committed = True
+
+        for name in self.channels:
+            value = values.get(name)
+            if value is not None and not math.isnan(value):
+                self._sums[name] += value
+                self._counts[name] += 1
+        return committed
+
+    def value(self, channel: str, slot: int) -> float:
+        """The stored value of *slot*, or math.nan if it is not retained."""
+        with self._lock:
+            if not self._appended - self.capacity <= slot < self._appended or slot < 0:
+                return math.nan
+            return self._rings[channel][slot % self.capacity]
+
+    def _means(self) -> dict[str, float]:
+        return {
+            name: self._sums[name] / self._counts[name] if self._counts[name] else math.nan
+            for name in self.channels
+        }
+
+    def _commit(self, means: dict[str, float] | None) -> None:
+        index = self._appended % self.capacity
+        for name in self.channels:
+            self._rings[name][index] = means[name] if means is not None else math.nan
+        self._appended += 1
+
+
+class HistoryModel(QAbstractListModel):
+    """RollingHistory as a list model, one row per slot, oldest first.
+
+    Samples come in through :meth:`add` on the OBD thread.  The rows move
+    on once per frame: evicted slots go as one removeRows from the front
+    and new ones arrive as one insertRows at the end.  The cost follows
+    the number of slots that changed since the last frame, whatever the
+    history length.
+    """
+
+    _committed = pyqtSignal()
+
+    def __init__(self, history: RollingHistory, clock: FrameClock, parent=None):
+        super().__init__(parent)
+        self._history = history
+        self._clock = clock
+        # Slots the rows currently show: first <= slot < end
+        self._first = 0
+        self._end = 0
+
+        # Crosses threads as a queued call
+        self._committed.connect(clock.request)
+        clock.subscribe(self._apply)
+
+    @property
+    def history(self) -> RollingHistory:
+        return self._history
+
+    @property
+    def first_slot(self) -> int:
+        """Absolute slot of row 0."""
+        return self._first
+
+    @property
+    def end_slot(self) -> int:
+        """One past the absolute slot of the last row."""
+        return self._end
+
+    def add(self, now: float, values: dict[str, float | None]) -> None:
+        """Producer side (OBD thread): see RollingHistory.add."""
+        if self._history.add(now, values):
+            self._committed.emit()
+
+    # ------------------------------------------------------------------
+    # QAbstractListModel
+    # ------------------------------------------------------------------
+
+    def roleNames(self):
+        return {Qt.ItemDataRole.UserRole + i: QByteArray(name.encode()) for i, name in enumerate(_ROLES)}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._end - self._first
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        column = role - Qt.ItemDataRole.UserRole
+        if not index.isValid() or not 0 <= column < len(_ROLES):
+            return None
+        return self._history.value(CHANNELS[column], self._first + index.row())
+
+    # ------------------------------------------------------------------
+    # QML
+    # ------------------------------------------------------------------
+
+    @pyqtProperty(float, constant=True)
+    def slotHz(self):
+        return self._history.hz
+
+    @pyqtProperty(int, constant=True)
+    def capacity(self):
+        return self._history.capacity
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _apply(self) -> None:
+        end = self._history.appended
+        if end == self._end:
+            return
+        first = max(0, end - self._history.capacity)
+
+        evicted = min(first, self._end) - self._first
+        if evicted > 0:
+            self.beginRemoveRows(QModelIndex(), 0, evicted - 1)
+            self._first += evicted
+            self.endRemoveRows()
+        if first > self._first:
+            # Everything shown was overwritten; nothing is left to remove
+            self._first = self._end = first
+
+        row = self._end - self._first
+        self.beginInsertRows(QModelIndex(), row, row + end - self._end - 1)
+        self._end = end
+        self.endInsertRows()
+        self._clock.count(1 + (evicted > 0), self.receivers(self.rowsInserted))
@@ -0,0 +1,116 @@
+import logging
+import math
+import time
+
+from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal
+
+import config
+from controllers.engine_controller import EngineController
+from controllers.snapshot import FrameClock
+
+logger = logging.getLogger(__name__)
+
+# EngineState fields shown on the gauges, in display order
+_CHANNELS = ("rpm", "speed", "coolant_temp", "throttle", "engine_load")
+
+
+class GaugePresenter(QObject):
+    """Frame-paced view of EngineController readings for the engine gauges.
+
+    On each frame it samples the newest EngineState, however many arrived
+    since the last one, and emits a single ``valuesChanged``.  The cost per
+    frame is the same at 5 Hz or 50 Hz acquisition.  With interpolation on,
+    values ramp from what is shown to the new sample over one sample
+    interval, and the presenter keeps requesting frames until the ramp
+    completes.
+    """
+
+    valuesChanged = pyqtSignal()
+
+    def __init__(
+        self,
+        engine: EngineController,
+        clock: FrameClock,
+        interpolate: bool = config.GAUGE_INTERPOLATION,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._engine = engine
+        self._clock = clock
+        self._interpolate = interpolate
+
+        self._source = None
+        self._start = dict.fromkeys(_CHANNELS, math.nan)
+        self._target = dict.fromkeys(_CHANNELS, math.nan)
+        self._shown = dict.fromkeys(_CHANNELS, math.nan)
+        self._ramp_start = 0.0
+        self._ramp_s = 0.0
+
+        clock.subscribe(self._on_frame)
+
+    # ------------------------------------------------------------------
+    # Qt properties (math.nan = no reading)
+    # ------------------------------------------------------------------
+
+    @pyqtProperty(float, notify=valuesChanged)
+    def rpm(self):
+        return self._shown["rpm"]
+
+    @pyqtProperty(float, notify=valuesChanged)
+    def speed(self):
+        return self._shown["speed"]
+
+    @pyqtProperty(float, notify=valuesChanged)
+    def coolantTemp(self):
+        return self._shown["coolant_temp"]
+
+    @pyqtProperty(float, notify=valuesChanged)
+    def throttle(self):
+        return self._shown["throttle"]
+
+    @pyqtProperty(float, notify=valuesChanged)
+    def engineLoad(self):
+        return self._shown["engine_load"]
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _on_frame(self) -> None:
+        now = time.monotonic()
+        state = self._engine.latest_state
+        if state is not self._source:
+            previous = self._source
+            self._source = state
+            self._start = dict(self._shown)
+            self._target = {name: getattr(state, name) for name in _CHANNELS}
+            # Ramp over the observed sample interval, within sane bounds
+            interval = state.sampled_at - previous.sampled_at if previous else 0.0
+            self._ramp_s = min(max(interval, config.FRAME_INTERVAL_MS / 1000.0),
+                               config.GAUGE_MAX_RAMP_S)
+            self._ramp_start = now
+
+        if self._interpolate and self._ramp_s > 0.0:
+            fraction = min(1.0, (now - self._ramp_start) / self._ramp_s)
+        else:
+            fraction = 1.0
+
+        shown = {}
+        for name in _CHANNELS:
+            start, target = self._start[name], self._target[name]
+            if fraction >= 1.0 or math.isnan(start) or math.isnan(target):
+                shown[name] = target
+            else:
+                shown[name] = start + (target - start) * fraction
+
+        if fraction < 1.0:
+            self._clock.request()
+
+        if any(not _same(shown[n], self._shown[n]) for n in _CHANNELS):
+            self._shown = shown
+            self.valuesChanged.emit()
+            self._clock.count(1, self.receivers(self.valuesChanged))
+
+
+def _same(a: float, b: float) -> bool:
+    return a == b or (math.isnan(a) and math.isnan(b))
@@ -0,0 +1,176 @@
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+import config
+import metrics
+from telemetry import LinkEvent, TelemetryBus
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_s(attempt: int) -> float:
+    """Delay before retry *attempt* (0-based): doubling, capped, with jitter.
+
+    Equal jitter: half the delay is fixed, half random, so links that drop
+    together (ignition flicker) do not all retry in lockstep yet never
+    retry in a tight loop.
+    """
+    delay = min(config.RECONNECT_MAX_S, config.RECONNECT_INITIAL_S * 2 ** attempt)
+    return delay / 2.0 + random.uniform(0.0, delay / 2.0)
+
+
+@dataclass
+class _Link:
+    name: str
+    reconnect: Callable[[], None]
+    expire_s: float | None
+    on_expired: Callable[[], None] | None
+    keep_trying: bool
+    timer: QTimer
+
+    down_since: float | None = None   # epoch seconds; None while up
+    lost: bool = False                # down after a drop, not yet up at all (watch)
+    attempt: int = 0
+    in_flight: bool = False
+    expired: bool = False
+
+
+class LinkSupervisor(QObject):
+    """Reconnects dropped links (OBD, GPS serial, Bluetooth) in the background.
+
+    Each link registers a ``reconnect`` callable that starts one attempt
+    without blocking and reports the outcome with up() or failed().  A
+    link that reports lost() is retried with backoff_s() until it is back,
+    cancelled, or — if it registered ``expire_s`` — down for that long:
+    then ``on_expired`` runs once (OBD ends the interrupted session there)
+    and retrying continues only if ``keep_trying``.
+
+    Every unplanned gap is published as a pair of LinkEvents, so the
+    session data records where it has holes.  lost() / up() / failed() /
+    cancel() may be called from any thread; the work happens on this
+    object's (GUI) thread.
+    """
+
+    _event = pyqtSignal(str, str)   # link, what
+
+    def __init__(self, bus: TelemetryBus, parent=None):
+        super().__init__(parent)
+        self._bus = bus
+        self._links: dict[str, _Link] = {}
+        self._event.connect(self._on_event)
+
+    def add(self, name: str, reconnect: Callable[[], None], expire_s: float | None = None,
+            on_expired: Callable[[], None] | None = None, keep_trying: bool = True) -> None:
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        link = _Link(name, reconnect, expire_s, on_expired, keep_trying, timer)
+        timer.timeout.connect(lambda: self._attempt(link))
+        self._links[name] = link
+        labels = {"link": name}
+        metrics.gauge("via_link_up", "Supervised link up (1) or reconnecting (0)", labels,
+                      fn=lambda: float(link.down_since is None))
+
+    # ------------------------------------------------------------------
+    # Thread-safe notifications
+    # ------------------------------------------------------------------
+
+    def lost(self, name: str) -> None:
+        """The link dropped unexpectedly: record a gap and start reconnecting."""
+        self._event.emit(name, "lost")
+
+    def watch(self, name: str) -> None:
+        """Keep trying to bring up a link that has not come up yet (no gap marker)."""
+        self._event.emit(name, "watch")
+
+    def up(self, name: str) -> None:
+        self._event.emit(name, "up")
+
+    def failed(self, name: str) -> None:
+        self._event.emit(name, "failed")
+
+    def cancel(self, name: str) -> None:
+        """Stop reconnecting (the user disconnected on purpose)."""
+        self._event.emit(name, "cancel")
+
+    # ------------------------------------------------------------------
+    # Supervision
+    # ------------------------------------------------------------------
+
+    def _on_event(self, name: str, what: str) -> None:
+        link = self._links.get(name)
+        if link is None:
+            return
+        if what in ("lost", "watch"):
+            if link.down_since is not None:
+                return
+            link.down_since = time.time()
+            link.lost = what == "lost"
+            link.attempt = 0
+            link.expired = False
+            if link.lost:
+                logger.warning("Link %s lost; reconnecting", name)
+                self._publish(link, up=False, timestamp=link.down_since)
+            self._schedule(link)
+        elif what == "up":
+            link.in_flight = False
+            if link.down_since is None:
+                return
+            if not link.lost:
+                # First connect of a watched link: no gap to record
+                logger.info("Link %s up (%d attempts)", name, link.attempt)
+                self._reset(link)
+                return
+            gap = time.time() - link.down_since
+            metrics.histogram("via_link_gap_seconds", "Time a supervised link was down",
+                              {"link": name}).observe(gap)
+            metrics.counter("via_link_reconnects", "Supervised reconnects", {"link": name}).inc()
+            logger.info("Link %s back after %.1f s (%d attempts)", name, gap, link.attempt)
+            self._publish(link, up=True, timestamp=time.time())
+            self._reset(link)
+        elif what == "failed":
+            link.in_flight = False
+            if link.down_since is not None:
+                self._schedule(link)
+        elif what == "cancel":
+            self._reset(link)
+
+    def _schedule(self, link: _Link) -> None:
+        if not link.in_flight:
+            link.timer.start(int(backoff_s(link.attempt) * 1000))
+
+    def _attempt(self, link: _Link) -> None:
+        if link.down_since is None or link.in_flight:
+            return
+        if (link.expire_s is not None and not link.expired
+                and time.time() - link.down_since >= link.expire_s):
+            link.expired = True
+            logger.info("Link %s down for over %.0f s", link.name, link.expire_s)
+            if link.on_expired is not None:
+                link.on_expired()
+            if not link.keep_trying:
+                self._reset(link)
+                return
+        link.attempt += 1
+        link.in_flight = True
+        try:
+            link.reconnect()
+        except Exception:
+            logger.exception("Reconnect of %s failed", link.name)
+            link.in_flight = False
+            self._schedule(link)
+
+    def _reset(self, link: _Link) -> None:
+        link.timer.stop()
+        link.down_since = None
+        link.lost = False
+        link.attempt = 0
+        link.in_flight = False
+        link.expired = False
+
+    def _publish(self, link: _Link, up: bool, timestamp: float) -> None:
+        self._bus.publish(LinkEvent(timestamp, self._bus.session_id, link.name, up))
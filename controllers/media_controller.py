@@ -3,9 +3,15 @@ import logging
 import threading
 import urllib.parse
 import urllib.request
+from dataclasses import dataclass
 
 from PyQt6.QtCore import QObject, QTimer, pyqtProperty, pyqtSignal, pyqtSlot
 
+import config
+import metrics
+from controllers.dbus_dispatcher import DBusCommandDispatcher
+from controllers.snapshot import FrameClock, SnapshotModel
+
 try:
     import dbus
     _DBUS_AVAILABLE = True
@@ -19,6 +25,26 @@ _DBUS_OM_IFACE = "org.freedesktop.DBus.ObjectManager"
 _MEDIA_PLAYER_IFACE = "org.bluez.MediaPlayer1"
 _DBUS_PROPS_IFACE = "org.freedesktop.DBus.Properties"
 
+_POLL_SECONDS = metrics.histogram(
+    "via_bluez_call_seconds", "Blocking BlueZ call", {"call": "mpris_poll"}
+)
+_LOOKUP_SECONDS = metrics.histogram("via_art_lookup_seconds", "iTunes album-art search")
+
+
+@dataclass(frozen=True)
+class MediaState:
+    """Everything MusicPlayerController exposes to QML, as one immutable record."""
+
+    track_title: str = "No Track Playing"
+    artist_name: str = ""
+    album_name: str = ""
+    album_art_url: str = ""
+    is_playing: bool = False
+    progress: float = 0.0
+    current_time: int = 0
+    total_time: int = 0
+    bluetooth_connected: bool = False
+
 
 class MusicPlayerController(QObject):
     # Property-change signals
@@ -35,28 +61,49 @@ class MusicPlayerController(QObject):
     # Internal: carries iTunes art URL back to main thread from worker thread
     _artFetched = pyqtSignal(str)
 
-    # Control-request signals (consumed by future MPRIS/dbus integration)
+    # Control-request signals (forwarded to BlueZ via the command dispatcher)
     playPauseRequested = pyqtSignal()
     nextRequested = pyqtSignal()
     previousRequested = pyqtSignal()
     seekRequested = pyqtSignal(float)  # position 0.0–1.0
 
-    def __init__(self, parent=None):
+    # Per-wakeup cost of the MPRIS poll, read by RateGovernor
+    poll_cost = _POLL_SECONDS
+
+    def __init__(
+        self,
+        dispatcher: DBusCommandDispatcher | None = None,
+        clock: FrameClock | None = None,
+        parent=None,
+    ):
         super().__init__(parent)
-        self._track_title = "No Track Playing"
-        self._artist_name = ""
-        self._album_name = ""
-        self._album_art_url = ""
-        self._is_playing = False
-        self._progress = 0.0
-        self._current_time = 0
-        self._total_time = 0
-        self._bluetoothConnected = False
+        self._state = SnapshotModel(
+            self,
+            MediaState(),
+            {
+                "track_title": self.trackTitleChanged,
+                "artist_name": self.artistNameChanged,
+                "album_name": self.albumNameChanged,
+                "album_art_url": self.albumArtUrlChanged,
+                "is_playing": self.isPlayingChanged,
+                "progress": self.progressChanged,
+                "current_time": self.currentTimeChanged,
+                "total_time": self.totalTimeChanged,
+                "bluetooth_connected": self.bluetoothConnectedChanged,
+            },
+            clock or FrameClock(self),
+        )
 
         self._media_player_path: str | None = None
         self._poll_miss_count: int = 0
         self._art_search_key: tuple[str, str] = ("", "")  # (title, artist) last searched
+        # iTunes lookups: one worker, started on first use (see _request_art)
+        self._art_lock = threading.Lock()
+        self._art_pending = threading.Event()
+        self._art_wanted: tuple[str, str] | None = None
+        self._art_worker: threading.Thread | None = None
         self._bus = dbus.SystemBus() if _DBUS_AVAILABLE else None
+        self._dispatcher = dispatcher or DBusCommandDispatcher(self._bus, parent=self)
 
         self._mpris_timer = QTimer(self)
         self._mpris_timer.setInterval(1000)
@@ -77,94 +124,77 @@ class MusicPlayerController(QObject):
 
     @pyqtProperty(str, notify=trackTitleChanged)
     def trackTitle(self):
-        return self._track_title
+        return self._state.applied.track_title
 
     @trackTitle.setter
     def trackTitle(self, value):
-        if self._track_title != value:
-            self._track_title = value
-            self.trackTitleChanged.emit(value)
+        self._state.update(track_title=value)
 
     @pyqtProperty(str, notify=artistNameChanged)
     def artistName(self):
-        return self._artist_name
+        return self._state.applied.artist_name
 
     @artistName.setter
     def artistName(self, value):
-        if self._artist_name != value:
-            self._artist_name = value
-            self.artistNameChanged.emit(value)
+        self._state.update(artist_name=value)
 
     @pyqtProperty(str, notify=albumNameChanged)
     def albumName(self):
-        return self._album_name
+        return self._state.applied.album_name
 
     @albumName.setter
     def albumName(self, value):
-        if self._album_name != value:
-            self._album_name = value
-            self.albumNameChanged.emit(value)
+        self._state.update(album_name=value)
 
     @pyqtProperty(str, notify=albumArtUrlChanged)
     def albumArtUrl(self):
-        return self._album_art_url
+        return self._state.applied.album_art_url
 
     @albumArtUrl.setter
     def albumArtUrl(self, value):
-        if self._album_art_url != value:
-            self._album_art_url = value
-            self.albumArtUrlChanged.emit(value)
-            logger.info("albumArtUrl → %s", value if value else "(cleared)")
+        if self._state.latest.album_art_url != value:
+            logger.debug("albumArtUrl → %s", value if value else "(cleared)")
+        self._state.update(album_art_url=value)
 
     @pyqtProperty(bool, notify=isPlayingChanged)
     def isPlaying(self):
-        return self._is_playing
+        return self._state.applied.is_playing
 
     @isPlaying.setter
     def isPlaying(self, value):
-        if self._is_playing != value:
-            self._is_playing = value
-            self.isPlayingChanged.emit(value)
+        self._state.update(is_playing=value)
 
     @pyqtProperty(float, notify=progressChanged)
     def progress(self):
-        return self._progress
+        return self._state.applied.progress
 
     @progress.setter
     def progress(self, value):
-        if self._progress != value:
-            self._progress = value
-            self.progressChanged.emit(value)
+        self._state.update(progress=value)
 
     @pyqtProperty(int, notify=currentTimeChanged)
     def currentTime(self):
-        return self._current_time
+        return self._state.applied.current_time
 
     @currentTime.setter
     def currentTime(self, value):
-        if self._current_time != value:
-            self._current_time = value
-            self.currentTimeChanged.emit(value)
+        self._state.update(current_time=value)
 
     @pyqtProperty(int, notify=totalTimeChanged)
     def totalTime(self):
-        return self._total_time
+        return self._state.applied.total_time
 
     @totalTime.setter
     def totalTime(self, value):
-        if self._total_time != value:
-            self._total_time = value
-            self.totalTimeChanged.emit(value)
+        self._state.update(total_time=value)
 
     @pyqtProperty(bool, notify=bluetoothConnectedChanged)
     def bluetoothConnected(self):
-        return self._bluetoothConnected
+        return self._state.applied.bluetooth_connected
 
     @bluetoothConnected.setter
     def bluetoothConnected(self, value):
-        if self._bluetoothConnected != value:
-            self._bluetoothConnected = value
-            self.bluetoothConnectedChanged.emit(value)
+        self._state.update(bluetooth_connected=value)
 
     # ------------------------------------------------------------------
     # Public slots
@@ -173,19 +203,19 @@ class MusicPlayerController(QObject):
     @pyqtSlot(str, str, str, str)
     def updateTrackInfo(self, title, artist, album, art_url):
         """Update all track metadata at once."""
-        self.trackTitle = title
-        self.artistName = artist
-        self.albumName = album
         self.albumArtUrl = art_url
+        self._state.update(track_title=title, artist_name=artist, album_name=album)
         logger.info("Track changed → %s – %s", artist, title)
 
     @pyqtSlot(bool, int, int)
     def updatePlaybackState(self, playing, current_sec, total_sec):
         """Update playback state and derived progress."""
-        self.isPlaying = playing
-        self.currentTime = current_sec
-        self.totalTime = total_sec
-        self.progress = current_sec / total_sec if total_sec > 0 else 0.0
+        self._state.update(
+            is_playing=playing,
+            current_time=current_sec,
+            total_time=total_sec,
+            progress=current_sec / total_sec if total_sec > 0 else 0.0,
+        )
 
     @pyqtSlot()
     def play(self):
@@ -199,9 +229,7 @@ class MusicPlayerController(QObject):
 
     @pyqtSlot()
     def stop(self):
-        self.isPlaying = False
-        self.currentTime = 0
-        self.progress = 0.0
+        self._state.update(is_playing=False, current_time=0, progress=0.0)
         logger.info("Playback stopped")
 
     @pyqtSlot()
@@ -209,6 +237,13 @@ class MusicPlayerController(QObject):
         """Handle Bluetooth management request from QML."""
         logger.info("Bluetooth management requested")
 
+    def set_poll_interval(self, interval_ms: int) -> None:
+        """Change the MPRIS poll period; a shorter one polls straight away."""
+        faster = interval_ms < self._mpris_timer.interval()
+        self._mpris_timer.setInterval(interval_ms)
+        if faster and self._mpris_timer.isActive():
+            self._poll_mpris()
+
     @pyqtSlot(bool)
     def set_bluetooth_connected(self, connected: bool):
         """Called by DeviceController when BT connection state changes."""
@@ -230,14 +265,8 @@ class MusicPlayerController(QObject):
     # ------------------------------------------------------------------
 
     def _reset_track_state(self):
-        self.trackTitle = "No Track Playing"
-        self.artistName = ""
-        self.albumName = ""
         self.albumArtUrl = ""
-        self.isPlaying = False
-        self.currentTime = 0
-        self.totalTime = 0
-        self.progress = 0.0
+        self._state.publish(MediaState(bluetooth_connected=self._state.latest.bluetooth_connected))
 
     def _find_media_player(self) -> "str | None":
         """Return the D-Bus object path of the first BlueZ MediaPlayer1, or None."""
@@ -275,81 +304,121 @@ class MusicPlayerController(QObject):
             self._poll_miss_count = 0
 
         try:
-            props_iface = dbus.Interface(
-                self._bus.get_object(_BLUEZ_SERVICE, self._media_player_path),
-                _DBUS_PROPS_IFACE,
-            )
-            all_props = props_iface.GetAll(_MEDIA_PLAYER_IFACE)
-
-            track = all_props.get("Track", {})
-            logger.debug("Track dict keys from BlueZ: %s", list(track.keys()))
-            title = str(track.get("Title", "")) or "No Track Playing"
-            artist = str(track.get("Artist", ""))
-            album = str(track.get("Album", ""))
-            duration_ms = int(track.get("Duration", 0))
-
-            # --- Album art: prefer BlueZ AVRCP, fall back to iTunes API ---
-            raw_art = track.get("AlbumArt", None)
-            bluez_art = ""
-            if raw_art is not None:
-                bluez_art = str(raw_art)
-                if bluez_art and not bluez_art.startswith("file://"):
-                    bluez_art = "file://" + bluez_art
-                if bluez_art:
-                    logger.info("BlueZ AlbumArt: %s", bluez_art)
-
-            search_key = (title, artist)
-            if bluez_art:
-                # BlueZ provided art directly — use it
-                self.albumArtUrl = bluez_art
-                self._art_search_key = search_key
-            elif search_key != self._art_search_key and title != "No Track Playing" and artist:
-                # New track, no BlueZ art — query iTunes in background
-                self._art_search_key = search_key
-                self.albumArtUrl = ""  # clear stale art while fetching
-                logger.info("No BlueZ art for %r / %r — querying iTunes", title, artist)
-                threading.Thread(
-                    target=self._fetch_itunes_art,
-                    args=(title, artist),
-                    daemon=True,
-                ).start()
-            # else: same track, leave albumArtUrl alone (iTunes fetch may be in progress)
-
-            status = str(all_props.get("Status", "stopped"))
-            position_ms = int(all_props.get("Position", 0))
-
-            total_sec = duration_ms // 1000
-            current_sec = position_ms // 1000
-
-            self.trackTitle = title
-            self.artistName = artist
-            self.albumName = album
-            self.isPlaying = status == "playing"
-            self.totalTime = total_sec
-            self.currentTime = current_sec
-            self.progress = current_sec / total_sec if total_sec > 0 else 0.0
-
+            with _POLL_SECONDS.time():
+                props_iface = dbus.Interface(
+                    self._bus.get_object(_BLUEZ_SERVICE, self._media_player_path),
+                    _DBUS_PROPS_IFACE,
+                )
+                all_props = props_iface.GetAll(_MEDIA_PLAYER_IFACE)
+            self.apply_player_properties(all_props)
         except dbus.DBusException:
             logger.warning("MediaPlayer1 gone — clearing path")
             self._media_player_path = None
         except Exception:
             logger.exception("MPRIS poll error")
 
+    def apply_player_properties(self, all_props: dict) -> None:
+        """Fold one MediaPlayer1 GetAll() result into the media state.
+
+        Called by the poll; tools/soak.py feeds simulated players here.
+        """
+        track = all_props.get("Track", {})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Track dict keys from BlueZ: %s", list(track.keys()))
+        title = str(track.get("Title", "")) or "No Track Playing"
+        artist = str(track.get("Artist", ""))
+        album = str(track.get("Album", ""))
+        duration_ms = int(track.get("Duration", 0))
+
+        # --- Album art: prefer BlueZ AVRCP, fall back to iTunes API ---
+        raw_art = track.get("AlbumArt", None)
+        bluez_art = ""
+        if raw_art is not None:
+            bluez_art = str(raw_art)
+            if bluez_art and not bluez_art.startswith("file://"):
+                bluez_art = "file://" + bluez_art
+            if bluez_art and bluez_art != self._state.latest.album_art_url:
+                logger.debug("BlueZ AlbumArt: %s", bluez_art)
+
+        search_key = (title, artist)
+        if bluez_art:
+            # BlueZ provided art directly — use it
+            self.albumArtUrl = bluez_art
+            self._art_search_key = search_key
+        elif search_key != self._art_search_key and title != "No Track Playing" and artist:
+            # New track, no BlueZ art — query iTunes in background
+            self._art_search_key = search_key
+            self.albumArtUrl = ""  # clear stale art while fetching
+            logger.info("No BlueZ art for %r / %r — querying iTunes", title, artist)
+            self._request_art(search_key)
+        # else: same track, leave albumArtUrl alone (iTunes fetch may be in progress)
+
+        status = str(all_props.get("Status", "stopped"))
+        position_ms = int(all_props.get("Position", 0))
+
+        total_sec = duration_ms // 1000
+        current_sec = position_ms // 1000
+
+        changes = dict(
+            track_title=title,
+            artist_name=artist,
+            album_name=album,
+            total_time=total_sec,
+            current_time=current_sec,
+            progress=current_sec / total_sec if total_sec > 0 else 0.0,
+        )
+        # Don't let a stale poll undo an optimistic toggle still in flight
+        if not self._dispatcher.is_busy("play_pause"):
+            changes["is_playing"] = status == "playing"
+        # One snapshot per poll: QML sees a single coalesced diff
+        self._state.update(**changes)
+
     @pyqtSlot(str)
     def _on_art_fetched(self, url: str):
         """Receives iTunes art URL on the Qt main thread and updates the property."""
         self.albumArtUrl = url
 
-    def _fetch_itunes_art(self, title: str, artist: str):
-        """Worker thread: query iTunes Search API and emit art URL if found."""
+    def _request_art(self, search_key: tuple[str, str]) -> None:
+        """Queue an iTunes lookup; only the newest request waiting is kept.
+
+        One worker thread serves every lookup, so skipping through a
+        playlist faster than iTunes answers never piles up threads.
+        """
+        with self._art_lock:
+            self._art_wanted = search_key
+            if self._art_worker is None:
+                self._art_worker = threading.Thread(
+                    target=self._art_loop, name="art-lookup", daemon=True
+                )
+                self._art_worker.start()
+        self._art_pending.set()
+
+    def _art_loop(self):
+        """Worker thread: look up the newest requested track, then wait for the next."""
+        while True:
+            self._art_pending.wait()
+            self._art_pending.clear()
+            with self._art_lock:
+                search_key, self._art_wanted = self._art_wanted, None
+            if search_key is None:
+                continue
+            art_url = self._fetch_itunes_art(*search_key)
+            # Drop the answer if the track changed while it was looked up
+            if art_url and search_key == self._art_search_key:
+                self._artFetched.emit(art_url)
+
+    def _fetch_itunes_art(self, title: str, artist: str) -> str:
+        """Query the iTunes Search API; the art URL, or "" if there is none."""
         try:
             query = urllib.parse.urlencode({
                 "term": f"{artist} {title}",
                 "entity": "song",
                 "limit": "5",
             })
-            req_url = f"https://itunes.apple.com/search?{query}"
-            with urllib.request.urlopen(req_url, timeout=8) as resp:
+            req_url = f"{config.ALBUM_ART_SEARCH_URL}?{query}"
+            with _LOOKUP_SECONDS.time(), urllib.request.urlopen(
+                req_url, timeout=config.ALBUM_ART_FETCH_TIMEOUT_S
+            ) as resp:
                 data = json.loads(resp.read())
             results = data.get("results", [])
             if results:
@@ -358,50 +427,44 @@ class MusicPlayerController(QObject):
                     # Upgrade from 100×100 thumbnail to 600×600
                     art_url = art_url.replace("100x100bb", "600x600bb")
                     logger.info("iTunes art found: %s", art_url)
-                    self._artFetched.emit(art_url)
-                    return
+                    return art_url
             logger.info("iTunes art: no results for %r / %r", title, artist)
         except Exception:
             logger.exception("iTunes art fetch failed for %r / %r", title, artist)
+        return ""
 
     def _mpris_play_pause(self):
-        player = self._get_media_player_iface()
-        if player is None:
+        if self._media_player_path is None:
             return
-        try:
-            if self._is_playing:
-                player.Pause()
-            else:
-                player.Play()
-        except Exception:
-            logger.exception("MPRIS play/pause failed")
+        # Optimistic: flip the button now, revert if the phone rejects it
+        playing = not self._state.latest.is_playing
+        self.isPlaying = playing
+
+        def revert():
+            if self._state.latest.is_playing == playing:
+                self.isPlaying = not playing
+
+        self._dispatch("play_pause", "Play" if playing else "Pause", on_error=revert)
 
     def _mpris_next(self):
-        player = self._get_media_player_iface()
-        if player is None:
-            return
-        try:
-            player.Next()
-        except Exception:
-            logger.exception("MPRIS next failed")
+        if self._dispatch("next", "Next"):
+            self._restart_track_position()
 
     def _mpris_previous(self):
-        player = self._get_media_player_iface()
-        if player is None:
-            return
-        try:
-            player.Previous()
-        except Exception:
-            logger.exception("MPRIS previous failed")
+        if self._dispatch("previous", "Previous"):
+            self._restart_track_position()
 
-    def _get_media_player_iface(self):
-        if not _DBUS_AVAILABLE or self._bus is None or self._media_player_path is None:
-            return None
-        try:
-            return dbus.Interface(
-                self._bus.get_object(_BLUEZ_SERVICE, self._media_player_path),
-                _MEDIA_PLAYER_IFACE,
-            )
-        except Exception:
-            logger.exception("Could not get MediaPlayer1 interface")
-            return None
+    def _restart_track_position(self):
+        """Optimistically show the new track from 0:00 until the next poll."""
+        self._state.update(current_time=0, progress=0.0)
+
+    def _dispatch(self, key: str, method: str, on_error=None) -> bool:
+        if self._media_player_path is None:
+            return False
+        return self._dispatcher.submit(
+            key,
+            self._media_player_path,
+            _MEDIA_PLAYER_IFACE,
+            method,
+            on_error=on_error,
+        )
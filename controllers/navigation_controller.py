@@ -1,23 +1,71 @@
+import json
 import logging
 import random
-from datetime import datetime, timezone
+import threading
+import time
 
-from PyQt6.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+from PyQt6.QtCore import QObject, QTimer, pyqtProperty, pyqtSignal, pyqtSlot
 
 import config
-from models import GpsReading, SessionLocal
+from controllers.link_supervisor import LinkSupervisor
+from routing import NoRoute, RoadGraph, Route, Router, RouteTracker
+from telemetry import GpsSample, TelemetryBus
+
+try:
+    import serial
+    _SERIAL_AVAILABLE = True
+except ImportError:
+    _SERIAL_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Typical receiver error per unit of HDOP, for a rough accuracy estimate
+_UERE_M = 5.0
+
+
+def _nmea_degrees(value: str, hemisphere: str) -> float:
+    """ddmm.mmmm / dddmm.mmmm plus N/S/E/W → signed decimal degrees."""
+    dot = value.index(".")
+    degrees = float(value[:dot - 2]) + float(value[dot - 2:]) / 60.0
+    return -degrees if hemisphere in ("S", "W") else degrees
+
+
+def _nmea_checksum_ok(sentence: str) -> bool:
+    body, star, checksum = sentence.partition("*")
+    if not star:
+        return True  # checksum is optional in NMEA 0183
+    calculated = 0
+    for char in body[1:]:
+        calculated ^= ord(char)
+    try:
+        return calculated == int(checksum[:2], 16)
+    except ValueError:
+        return False
+
+
+def _format_distance(metres: float) -> str:
+    if metres < 1000:
+        return f"{round(metres / 10) * 10:.0f} m"
+    return f"{metres / 1000:.1f} km"
+
 
 class NavigationController(QObject):
     """Controller for GPS navigation and map interaction."""
 
     gpsUpdated = pyqtSignal(float, float, float)  # lat, lon, accuracy
+    routeChanged = pyqtSignal(str)                # JSON [[lat, lon], ...]; "" when cleared
+    instructionChanged = pyqtSignal(str)
+    routeSummaryChanged = pyqtSignal(str)
+    # (destination, Route or an error message) from the search thread
+    _routeReady = pyqtSignal(object)
+
+    # No blocking work per update; RateGovernor has nothing to weigh
+    poll_cost = None
 
-    def __init__(self, parent=None):
+    def __init__(self, bus: TelemetryBus | None = None, supervisor: LinkSupervisor | None = None,
+                 parent=None):
         super().__init__(parent)
-        self._session_id: int | None = None
+        self._bus = bus or TelemetryBus()
 
         # Simulated GPS state (replaced by real hardware when GPS_SIMULATE=false)
         self._current_latitude = 37.7749
@@ -26,22 +74,41 @@ class NavigationController(QObject):
 
         self._update_timer = QTimer(self)
         self._update_timer.timeout.connect(self._simulate_gps_update)
-        self._update_timer.start(config.GPS_UPDATE_INTERVAL_MS)
 
-    # ------------------------------------------------------------------
-    # Session wiring
-    # ------------------------------------------------------------------
+        self._supervisor = supervisor
+        self._serial = None
+        if config.GPS_SIMULATE:
+            self._update_timer.start(config.GPS_UPDATE_INTERVAL_MS)
+        elif config.GPS_PORT:
+            if supervisor is not None:
+                supervisor.add("gps", self._reconnect_gps)
+            if not self.connect_gps(config.GPS_PORT) and supervisor is not None:
+                supervisor.watch("gps")
 
-    @pyqtSlot(int)
-    def set_session_id(self, session_id: int) -> None:
-        """Called by main when the engine controller opens or closes a session."""
-        self._session_id = session_id if session_id >= 0 else None
-        logger.debug("NavigationController session_id → %s", self._session_id)
+        # Offline routing, if a graph has been built (tools/build_road_graph.py)
+        self._router = None
+        if config.ROUTING_GRAPH.exists():
+            try:
+                self._router = Router(RoadGraph(config.ROUTING_GRAPH))
+            except (OSError, ValueError) as exc:
+                logger.error("Road graph %s unusable: %s", config.ROUTING_GRAPH, exc)
+        self._destination = None
+        self._metric = config.ROUTING_METRIC
+        self._tracker = None
+        self._searching = False
+        self._instruction = ""
+        self._route_summary = ""
+        self._routeReady.connect(self._on_route_ready)
+        self.gpsUpdated.connect(self._on_fix)
 
     # ------------------------------------------------------------------
     # GPS
     # ------------------------------------------------------------------
 
+    def set_poll_interval(self, interval_ms: int) -> None:
+        """Change the GPS update period (RateGovernor)."""
+        self._update_timer.setInterval(interval_ms)
+
     @pyqtSlot()
     def requestGPSUpdate(self):
         """Emit current GPS position to QML."""
@@ -62,40 +129,197 @@ class NavigationController(QObject):
             self._current_longitude,
             self._current_accuracy,
         )
-        self._write_reading(
+        self._publish_fix(
             self._current_latitude,
             self._current_longitude,
             self._current_accuracy,
         )
 
-    def _write_reading(self, lat: float, lon: float, accuracy: float) -> None:
-        db = SessionLocal()
+    def _publish_fix(self, lat: float, lon: float, accuracy: float) -> None:
+        self._bus.publish(GpsSample(
+            timestamp=time.time(),
+            session_id=self._bus.session_id,
+            latitude=lat,
+            longitude=lon,
+            accuracy_m=accuracy,
+        ))
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    @pyqtProperty(bool, constant=True)
+    def canRoute(self):
+        return self._router is not None
+
+    @pyqtProperty(str, notify=instructionChanged)
+    def instruction(self):
+        return self._instruction
+
+    @pyqtProperty(str, notify=routeSummaryChanged)
+    def routeSummary(self):
+        return self._route_summary
+
+    @pyqtSlot(float, float)
+    def routeTo(self, lat: float, lon: float):
+        """Route from the current position to (lat, lon) with ROUTING_METRIC."""
+        self.routeToBy(lat, lon, config.ROUTING_METRIC)
+
+    @pyqtSlot(float, float, str)
+    def routeToBy(self, lat: float, lon: float, metric: str):
+        """Route to (lat, lon), "time" for the fastest or "length" for the shortest."""
+        if self._router is None:
+            logger.warning("No road graph at %s; build one with tools/build_road_graph.py",
+                           config.ROUTING_GRAPH)
+            return
+        self._destination = (lat, lon)
+        self._metric = metric
+        self._search()
+
+    @pyqtSlot()
+    def clearRoute(self):
+        self._destination = None
+        self._tracker = None
+        self.routeChanged.emit("")
+        self._set_instruction("")
+        self._set_route_summary("")
+
+    def _search(self) -> None:
+        """Start a route search from the current position, unless one is running."""
+        if self._searching or self._destination is None:
+            return
+        self._searching = True
+        start = (self._current_latitude, self._current_longitude)
+        threading.Thread(target=self._run_search, args=(start, self._destination, self._metric),
+                         name="route-search", daemon=True).start()
+
+    def _run_search(self, start, end, metric: str) -> None:
+        # Worker thread; the graph is read-only, so searches need no locking
         try:
-            reading = GpsReading(
-                session_id=self._session_id,
-                timestamp=datetime.now(timezone.utc),
-                latitude=lat,
-                longitude=lon,
-                accuracy_m=accuracy,
-            )
-            db.add(reading)
-            db.commit()
-        except Exception:
-            logger.exception("Failed to write GpsReading")
-            db.rollback()
-        finally:
-            db.close()
+            result = self._router.route(start, end, metric)
+        except (NoRoute, ValueError) as exc:
+            result = str(exc)
+        self._routeReady.emit((end, result))
+
+    def _on_route_ready(self, reply) -> None:
+        self._searching = False
+        end, result = reply
+        if self._destination is None:
+            return  # cleared while searching
+        if end != self._destination:
+            self._search()  # a new destination was picked meanwhile
+            return
+        if not isinstance(result, Route):
+            logger.warning("No route: %s", result)
+            self._set_instruction(f"No route: {result}")
+            return
+        self._tracker = RouteTracker(result)
+        self.routeChanged.emit(json.dumps([[round(lat, 6), round(lon, 6)]
+                                           for lat, lon in result.points]))
+        self._on_fix(self._current_latitude, self._current_longitude, self._current_accuracy)
+
+    def _on_fix(self, lat: float, lon: float, accuracy: float) -> None:
+        if self._tracker is None:
+            return
+        progress = self._tracker.update(lat, lon, accuracy)
+        if progress.arrived:
+            logger.info("Arrived at the destination")
+            self.clearRoute()
+            self._set_instruction("Arrived at the destination")
+            return
+        if progress.off_route:
+            logger.info("Off route by %.0f m; re-routing", progress.off_route_m)
+            self._search()
+            return
+        maneuver = progress.next_maneuver
+        if maneuver is not None:
+            self._set_instruction(f"In {_format_distance(progress.to_maneuver_m)}: {maneuver.text}")
+        route = self._tracker.route
+        remaining_s = route.time_s * progress.remaining_m / route.length_m if route.length_m else 0.0
+        self._set_route_summary(f"{_format_distance(progress.remaining_m)} · "
+                                f"{remaining_s / 60:.0f} min")
+
+    def _set_instruction(self, text: str) -> None:
+        if text != self._instruction:
+            self._instruction = text
+            self.instructionChanged.emit(text)
+
+    def _set_route_summary(self, text: str) -> None:
+        if text != self._route_summary:
+            self._route_summary = text
+            self.routeSummaryChanged.emit(text)
 
     # ------------------------------------------------------------------
-    # Future hardware integration stubs
+    # Serial receiver
     # ------------------------------------------------------------------
 
-    def connect_gps(self, port: str, baudrate: int = config.GPS_BAUD_RATE) -> None:
-        """Connect to a hardware GPS module (Neo6 / similar) via serial."""
-        # TODO: open serial port and start NMEA reader thread
-        logger.info("connect_gps called (port=%s, baud=%d) — not yet implemented", port, baudrate)
+    def connect_gps(self, port: str, baudrate: int = config.GPS_BAUD_RATE) -> bool:
+        """Open a hardware GPS module (Neo6 / similar) and start reading NMEA."""
+        if not _SERIAL_AVAILABLE:
+            logger.error("GPS on %s needs the pyserial package", port)
+            return False
+        try:
+            link = serial.Serial(port, baudrate, timeout=1.0)
+        except (OSError, serial.SerialException) as exc:
+            logger.info("GPS receiver on %s not available: %s", port, exc)
+            return False
+        self._serial = link
+        threading.Thread(target=self._read_nmea, args=(link,), name="gps-nmea", daemon=True).start()
+        logger.info("GPS receiver open on %s at %d baud", port, baudrate)
+        return True
+
+    def _reconnect_gps(self) -> None:
+        """Supervised attempt; opening a serial port does not block for long."""
+        if self.connect_gps(config.GPS_PORT):
+            self._supervisor.up("gps")
+        else:
+            self._supervisor.failed("gps")
+
+    def _read_nmea(self, link) -> None:
+        """Reader thread: one sentence per line until the receiver goes away."""
+        last_data = time.monotonic()
+        try:
+            while self._serial is link:
+                line = link.readline()
+                if line:
+                    last_data = time.monotonic()
+                    self._parse_nmea_sentence(line.decode("ascii", "replace"))
+                elif time.monotonic() - last_data > config.GPS_LINK_TIMEOUT_S:
+                    logger.warning("GPS receiver silent for %.0f s", config.GPS_LINK_TIMEOUT_S)
+                    break
+        except (OSError, serial.SerialException):
+            logger.warning("GPS receiver read failed", exc_info=True)
+        if self._serial is not link:
+            return  # closed on purpose
+        self._serial = None
+        link.close()
+        if self._supervisor is not None:
+            self._supervisor.lost("gps")
 
     def _parse_nmea_sentence(self, sentence: str) -> None:
-        """Parse a single NMEA sentence (GPGGA, GPRMC, etc.)."""
-        # TODO: implement NMEA parsing and call _write_reading
-        logger.debug("NMEA: %s", sentence.strip())
+        """Parse a single NMEA sentence: GGA for HDOP, RMC for the fix."""
+        sentence = sentence.strip()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("NMEA: %s", sentence)
+        if not sentence.startswith("$") or not _nmea_checksum_ok(sentence):
+            return
+        fields = sentence.partition("*")[0].split(",")
+        kind = fields[0][3:]
+        try:
+            if kind == "GGA" and len(fields) > 8 and fields[8]:
+                self._current_accuracy = float(fields[8]) * _UERE_M
+            elif kind == "RMC" and len(fields) > 6 and fields[2] == "A":
+                self._current_latitude = _nmea_degrees(fields[3], fields[4])
+                self._current_longitude = _nmea_degrees(fields[5], fields[6])
+                self.gpsUpdated.emit(
+                    self._current_latitude,
+                    self._current_longitude,
+                    self._current_accuracy,
+                )
+                self._publish_fix(
+                    self._current_latitude,
+                    self._current_longitude,
+                    self._current_accuracy,
+                )
+        except ValueError:
+            logger.debug("Malformed NMEA sentence: %s", sentence)
@@ -0,0 +1,247 @@
+"""
+obd_profiles.py — Remembered OBD connection settings for fast reconnects.
+
+A full python-obd connect scans serial ports, tries baud rates, lets the
+ELM327 auto-detect the protocol and then queries which PIDs the ECU
+supports, several seconds in all.  After each successful connect the
+port, baud rate, protocol and supported mode 01 PIDs (as a bitmap) are
+stored as an ObdProfile, keyed by adapter (its serial port) and VIN.
+
+open_connection() first tries the newest profile: a direct open with
+everything given and the PID query skipped.  The VIN it then reads picks
+the vehicle's own PID set; an unknown vehicle gets a real PID query on
+the open link.  Only if the direct open fails does it fall back to full
+detection.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import obd
+from sqlalchemy import select
+
+import config
+import metrics
+from controllers.obd_simulator import SimulatedOBD
+from models import ObdProfile, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_CONNECT_SECONDS = {
+    path: metrics.histogram("via_obd_connect_seconds", "OBD connect", {"path": path})
+    for path in ("profile", "full")
+}
+_CONNECT_FAILURES = {
+    path: metrics.counter("via_obd_connect_failures", "Failed OBD connects", {"path": path})
+    for path in ("profile", "full")
+}
+
+
+@dataclass
+class ConnectReport:
+    path: str           # "profile", "full" or "simulated"
+    seconds: float
+    fallback_s: float = 0.0  # time lost on a failed profile attempt first
+
+
+# ---------------------------------------------------------------------------
+# Supported-PID bitmap
+# ---------------------------------------------------------------------------
+
+def _pid_bitmap(connection) -> str:
+    bits = 0
+    for command in connection.supported_commands:
+        if command.mode == 1 and command.pid is not None:
+            bits |= 1 << command.pid
+    return f"{bits:x}"
+
+
+def _commands_from_bitmap(bitmap: str) -> set:
+    bits = int(bitmap, 16)
+    commands = set(obd.commands.base_commands())
+    for pid in range(256):
+        if bits >> pid & 1 and obd.commands.has_pid(1, pid):
+            commands.add(obd.commands[1][pid])
+    return commands
+
+
+# python-obd's private PID query (0.7.x); see _ProfiledOBD
+_LOAD_COMMANDS = getattr(obd.OBD, "_OBD__load_commands", None)
+if _LOAD_COMMANDS is None:
+    logger.warning("python-obd %s has no OBD.__load_commands(); cached PID sets are not "
+                   "used and every connect queries the ECU", getattr(obd, "__version__", "?"))
+
+
+class _ProfiledOBD(obd.OBD):
+    """obd.OBD that takes its supported commands from a profile.
+
+    python-obd queries PIDs in its private __load_commands() at the end of
+    __init__; defining the mangled name here replaces that step.  Should a
+    python-obd release rename it, the override is never called: the
+    constructor runs its own query and query_supported_pids() has nothing
+    left to do.
+    """
+
+    def __init__(self, bitmap: str, *args, **kwargs):
+        self._bitmap = bitmap
+        self.requested_baudrate = kwargs.get("baudrate")
+        super().__init__(*args, **kwargs)
+
+    def _OBD__load_commands(self):
+        self.supported_commands = _commands_from_bitmap(self._bitmap)
+
+    def query_supported_pids(self) -> None:
+        """Run the PID query the constructor skipped."""
+        if _LOAD_COMMANDS is not None:
+            _LOAD_COMMANDS(self)
+
+
+# ---------------------------------------------------------------------------
+# Link details
+# ---------------------------------------------------------------------------
+
+def _baudrate(connection) -> int | None:
+    # python-obd keeps the pyserial port private to its ELM327 wrapper
+    port = getattr(connection.interface, "_ELM327__port", None)
+    baudrate = getattr(port, "baudrate", None)
+    if baudrate is None:
+        # Not where 0.7.x keeps it: the rate asked for, or None to detect
+        # it again next time
+        baudrate = getattr(connection, "requested_baudrate", None)
+    return baudrate
+
+
+def _vin(connection) -> str | None:
+    command = getattr(obd.commands, "VIN", None)
+    if command is None:
+        return None
+    response = connection.query(command, force=True)
+    if response.is_null():
+        return None
+    value = response.value
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("ascii", "ignore")
+    return str(value).strip("\x00 ") or None
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+def _latest_profile(port: str | None) -> ObdProfile | None:
+    db = SessionLocal()
+    try:
+        query = select(ObdProfile).order_by(ObdProfile.updated_at.desc()).limit(1)
+        if port:
+            query = query.where(ObdProfile.adapter == port)
+        profile = db.execute(query).scalar()
+        if profile is not None:
+            db.expunge(profile)
+        return profile
+    except Exception:
+        logger.exception("Failed to load OBD profile")
+        return None
+    finally:
+        db.close()
+
+
+def _find_profile(db, adapter: str, vin: str | None) -> ObdProfile | None:
+    vin_matches = ObdProfile.vin.is_(None) if vin is None else ObdProfile.vin == vin
+    return db.execute(
+        select(ObdProfile).where(ObdProfile.adapter == adapter, vin_matches)
+    ).scalar()
+
+
+def _vehicle_pids(adapter: str, vin: str | None) -> str | None:
+    db = SessionLocal()
+    try:
+        profile = _find_profile(db, adapter, vin)
+        return profile.pids if profile is not None else None
+    finally:
+        db.close()
+
+
+def _save_profile(connection, vin: str | None, seconds: float) -> None:
+    adapter = connection.port_name()
+    db = SessionLocal()
+    try:
+        profile = _find_profile(db, adapter, vin)
+        if profile is None:
+            profile = ObdProfile(adapter=adapter, vin=vin)
+            db.add(profile)
+        profile.updated_at = datetime.now(timezone.utc)
+        profile.port = connection.port_name()
+        profile.baudrate = _baudrate(connection)
+        profile.protocol = connection.protocol_id()
+        profile.pids = _pid_bitmap(connection)
+        profile.connect_s = seconds
+        db.commit()
+    except Exception:
+        logger.exception("Failed to save OBD profile")
+        db.rollback()
+    finally:
+        db.close()
+
+
+# ---------------------------------------------------------------------------
+# Connect
+# ---------------------------------------------------------------------------
+
+def _connect_profiled(profile: ObdProfile):
+    connection = _ProfiledOBD(
+        profile.pids, profile.port, baudrate=profile.baudrate, protocol=profile.protocol
+    )
+    if not connection.is_connected():
+        connection.close()
+        return None, None
+    vin = _vin(connection)
+    if vin != profile.vin:
+        # Same adapter, different vehicle
+        pids = _vehicle_pids(profile.adapter, vin)
+        if pids is not None:
+            connection.supported_commands = _commands_from_bitmap(pids)
+        else:
+            connection.query_supported_pids()
+    return connection, vin
+
+
+def open_connection(port: str | None = config.OBD_PORT):
+    """Open an OBD connection, fast path first; returns (connection, ConnectReport).
+
+    The connection may be unconnected (no adapter, ignition off), exactly
+    as from obd.OBD().
+    """
+    if config.OBD_SIMULATE:
+        return SimulatedOBD(port), ConnectReport("simulated", 0.0)
+
+    fallback_s = 0.0
+    profile = _latest_profile(port) if config.OBD_PROFILES else None
+    if profile is not None:
+        started = time.perf_counter()
+        try:
+            connection, vin = _connect_profiled(profile)
+        except Exception:
+            logger.exception("OBD connect from profile failed")
+            connection = None
+        seconds = time.perf_counter() - started
+        if connection is not None:
+            _CONNECT_SECONDS["profile"].observe(seconds)
+            _save_profile(connection, vin, seconds)
+            return connection, ConnectReport("profile", seconds)
+        _CONNECT_FAILURES["profile"].inc()
+        logger.info("OBD profile for %s (%s, protocol %s) did not connect in %.2f s; "
+                    "running full detection", profile.adapter, profile.vin or "no VIN",
+                    profile.protocol, seconds)
+        fallback_s = seconds
+
+    started = time.perf_counter()
+    connection = obd.OBD(port)
+    seconds = time.perf_counter() - started
+    if connection.is_connected():
+        _CONNECT_SECONDS["full"].observe(seconds)
+        if config.OBD_PROFILES:
+            _save_profile(connection, _vin(connection), seconds)
+    else:
+        _CONNECT_FAILURES["full"].inc()
+    return connection, ConnectReport("full", seconds, fallback_s)
@@ -0,0 +1,122 @@
+"""
+obd_simulator.py — A stand-in OBD adapter that drives a synthetic car.
+
+With OBD_SIMULATE=true, open_connection() returns a SimulatedOBD instead
+of opening python-obd, so the engine view, the DB writer and the alerts
+see a plausible drive on a desk: stop-and-go town cycles with a stretch
+of highway every fourth one, and a coolant temperature that warms up
+over the first minutes.
+
+Only the part of the python-obd interface EngineController uses is
+implemented: is_connected(), query(), close(), port_name() and
+protocol_name().  drop() makes the link fail the next health check,
+like an adapter pulled from the port.
+"""
+import math
+import random
+import time
+from dataclasses import dataclass
+
+# One stop-and-go cycle: (seconds into the cycle, km/h), linearly interpolated
+_TOWN_CYCLE = ((0, 0), (8, 0), (25, 48), (90, 52), (110, 30), (140, 45), (165, 0), (180, 0))
+_HIGHWAY_CYCLE = ((0, 0), (8, 0), (40, 105), (260, 115), (300, 60), (330, 0), (345, 0))
+
+
+@dataclass(frozen=True)
+class _Quantity:
+    magnitude: float
+
+
+@dataclass(frozen=True)
+class _Response:
+    value: _Quantity | None
+
+    def is_null(self) -> bool:
+        return self.value is None
+
+
+def _interpolate(cycle, t: float) -> float:
+    for (t0, v0), (t1, v1) in zip(cycle, cycle[1:]):
+        if t <= t1:
+            return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+    return cycle[-1][1]
+
+
+def _cycle_speed(t: float) -> float:
+    """Three town cycles, then one highway cycle, repeated."""
+    town_s, highway_s = _TOWN_CYCLE[-1][0], _HIGHWAY_CYCLE[-1][0]
+    into = max(0.0, t) % (3 * town_s + highway_s)
+    if into < 3 * town_s:
+        return _interpolate(_TOWN_CYCLE, into % town_s)
+    return _interpolate(_HIGHWAY_CYCLE, into - 3 * town_s)
+
+
+class SimulatedOBD:
+    """python-obd lookalike answering from a synthetic drive cycle.
+
+    *time_scale* runs the drive faster than the wall clock (tools/soak.py).
+    """
+
+    time_scale = 1.0
+
+    def __init__(self, port: str | None = None):
+        self._port = port or "simulated"
+        self._started = time.monotonic()
+        self._connected = True
+
+    def _elapsed(self) -> float:
+        return (time.monotonic() - self._started) * self.time_scale
+
+    def _drive(self) -> tuple[float, float]:
+        """(speed km/h, acceleration km/h per s) at the current simulated time."""
+        t = self._elapsed()
+        speed = _cycle_speed(t)
+        accel = speed - _cycle_speed(t - 1.0)
+        if speed > 5:
+            speed += random.uniform(-1.5, 1.5)
+        return speed, accel
+
+    # ------------------------------------------------------------------
+    # python-obd interface
+    # ------------------------------------------------------------------
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def port_name(self) -> str:
+        return self._port
+
+    def protocol_name(self) -> str:
+        return "simulated"
+
+    def close(self) -> None:
+        self._connected = False
+
+    def drop(self) -> None:
+        """Fail from now on, as if the adapter lost power."""
+        self._connected = False
+
+    def query(self, command, force: bool = False) -> _Response:
+        if not self._connected:
+            return _Response(None)
+        name = command.name
+        if name == "SPEED":
+            value, _ = self._drive()
+        elif name == "RPM":
+            speed, accel = self._drive()
+            if speed < 1:
+                value = 780 + random.uniform(-20, 20)
+            else:
+                gear = min(6, 1 + int(speed // 22))
+                value = 1100 + (speed - 22 * (gear - 1)) * 75 + max(0.0, accel) * 60
+        elif name == "COOLANT_TEMP":
+            value = 90 - 70 * math.exp(-self._elapsed() / 300)
+        elif name == "THROTTLE_POS":
+            speed, accel = self._drive()
+            value = min(100.0, 14 + speed * 0.12 + max(0.0, accel) * 8)
+        elif name == "ENGINE_LOAD":
+            speed, accel = self._drive()
+            value = min(100.0, 20 + speed * 0.25 + max(0.0, accel) * 10)
+        else:
+            return _Response(None)
+        return _Response(_Quantity(float(value)))
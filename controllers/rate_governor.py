@@ -0,0 +1,230 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from PyQt6.QtCore import QObject, QTimer, pyqtProperty, pyqtSignal, pyqtSlot
+
+import config
+import metrics
+from controllers.device_controller import DeviceController
+from controllers.engine_controller import EngineController
+from controllers.media_controller import MusicPlayerController
+from controllers.navigation_controller import NavigationController
+
+logger = logging.getLogger(__name__)
+
+# Drive modes, slowest first
+OFF = "off"          # no OBD link, or ignition on with the engine stopped
+IDLE = "idle"        # engine running, car stationary
+DRIVING = "driving"
+_MODE_ORDER = {OFF: 0, IDLE: 1, DRIVING: 2}
+
+
+@dataclass
+class _Subsystem:
+    name: str
+    apply: Callable[[int], None]
+    baseline_ms: int                  # the fixed rate used before adaptive polling
+    cost: metrics.Histogram | None    # per-wakeup work, for the CPU estimate
+    interval_ms: int = 0
+    wakeups_saved: float = 0.0
+
+    def mean_cost_s(self) -> float:
+        if self.cost is None or not self.cost.count:
+            return 0.0
+        return self.cost.sum / self.cost.count
+
+
+class RateGovernor(QObject):
+    """Sets every polling cadence from what the car and the driver are doing.
+
+    Inputs are the drive mode (from the latest OBD sample), the tab on
+    screen (QML calls setActiveView), whether a phone is connected and
+    whether it is playing.  Speeding up happens on the next evaluation;
+    slowing down waits until the new mode has held for GOVERNOR_HOLD_S so
+    a stop at a junction does not flap the OBD rate.
+
+    Savings are reported against the old fixed rates: wakeups avoided per
+    subsystem, and CPU time avoided estimated from each poll's measured
+    mean cost.
+
+    *time_scale* > 1 runs every cadence and the hold time that many times
+    faster (accelerated-time soak runs, tools/soak.py); the policy and
+    the reported intervals stay in real-drive terms.
+    """
+
+    modeChanged = pyqtSignal(str)
+
+    def __init__(
+        self,
+        engine: EngineController,
+        music: MusicPlayerController,
+        device: DeviceController,
+        navigation: NavigationController,
+        time_scale: float = 1.0,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._time_scale = time_scale
+        self._engine = engine
+        self._music = music
+        self._device = device
+        self._mode = OFF
+        self._candidate = OFF
+        self._candidate_since = time.monotonic()
+        self._active_view = "engine"
+
+        self._subsystems = [
+            _Subsystem("obd", engine.set_poll_interval, 100, engine.poll_cost),
+            _Subsystem("mpris", music.set_poll_interval, 1000, music.poll_cost),
+            _Subsystem("bt", device.set_poll_interval, config.BT_POLL_INTERVAL_MS, device.poll_cost),
+            _Subsystem("gps", navigation.set_poll_interval, config.GPS_UPDATE_INTERVAL_MS,
+                       navigation.poll_cost),
+        ]
+        self._interval_gauges = {
+            s.name: metrics.gauge("via_poll_interval_ms", "Current polling interval",
+                                  {"subsystem": s.name})
+            for s in self._subsystems
+        }
+        self._saved_gauges = {
+            s.name: metrics.gauge("via_poll_wakeups_saved", "Wakeups avoided vs fixed rate",
+                                  {"subsystem": s.name})
+            for s in self._subsystems
+        }
+        self._cpu_saved = metrics.gauge(
+            "via_poll_cpu_saved_seconds", "Estimated CPU time avoided vs fixed rate"
+        )
+
+        self._last_tick = time.monotonic()
+        self._mode_started = self._last_tick
+        self._mode_cpu = time.process_time()
+
+        music.isPlayingChanged.connect(self._evaluate)
+        device.hasConnectedDeviceChanged.connect(self._evaluate)
+        engine.connectedChanged.connect(self._evaluate)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(1, round(config.GOVERNOR_EVAL_MS / time_scale)))
+        self._timer.timeout.connect(self._evaluate)
+        if config.ADAPTIVE_POLLING:
+            self._timer.start()
+            self._evaluate()
+        else:
+            logger.info("Adaptive polling disabled — fixed rates")
+
+    # ------------------------------------------------------------------
+    # Qt properties / slots
+    # ------------------------------------------------------------------
+
+    @pyqtProperty(str, notify=modeChanged)
+    def mode(self):
+        return self._mode
+
+    @pyqtSlot(str)
+    def setActiveView(self, view: str):
+        """Called by QML when the visible tab changes ("engine", "media", ...)."""
+        if view != self._active_view:
+            self._active_view = view
+            self._evaluate()
+
+    # ------------------------------------------------------------------
+    # Policy
+    # ------------------------------------------------------------------
+
+    def _observed_mode(self) -> str:
+        state = self._engine.latest_state
+        # Written so an unanswered (nan) RPM also counts as engine off
+        if not state.connected or not state.rpm > 0.0:
+            return OFF
+        if state.speed >= config.GOVERNOR_MOVING_KPH:
+            return DRIVING
+        return IDLE
+
+    def _intervals(self) -> dict[str, int]:
+        mode, view = self._mode, self._active_view
+        playing = self._music.isPlaying
+
+        if mode == DRIVING:
+            obd = 100
+        elif mode == IDLE:
+            obd = 250 if view == "engine" else 1000
+        else:
+            obd = 2000
+
+        if playing:
+            mpris = 1000 if view == "media" else 3000
+        else:
+            mpris = 5000
+
+        # Fast while waiting for a phone so pairing feels instant
+        bt = 5000 if self._device.hasConnectedDevice else config.BT_POLL_INTERVAL_MS
+
+        if mode == DRIVING or view == "navigation":
+            gps = config.GPS_UPDATE_INTERVAL_MS
+        else:
+            gps = max(config.GPS_UPDATE_INTERVAL_MS, 10000)
+
+        return {"obd": obd, "mpris": mpris, "bt": bt, "gps": gps}
+
+    def _active(self, subsystem: _Subsystem) -> bool:
+        if subsystem.name == "obd":
+            return self._engine.latest_state.connected
+        if subsystem.name == "mpris":
+            return self._device.hasConnectedDevice
+        return True
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def _evaluate(self, *_):
+        if not config.ADAPTIVE_POLLING:
+            return
+        now = time.monotonic()
+        self._account((now - self._last_tick) * self._time_scale)
+        self._last_tick = now
+
+        observed = self._observed_mode()
+        if observed != self._candidate:
+            self._candidate, self._candidate_since = observed, now
+        faster = _MODE_ORDER[observed] > _MODE_ORDER[self._mode]
+        held_s = (now - self._candidate_since) * self._time_scale
+        if observed != self._mode and (faster or held_s >= config.GOVERNOR_HOLD_S):
+            self._enter(observed, now)
+
+        intervals = self._intervals()
+        for subsystem in self._subsystems:
+            interval_ms = intervals[subsystem.name]
+            if interval_ms != subsystem.interval_ms:
+                subsystem.interval_ms = interval_ms
+                subsystem.apply(max(1, round(interval_ms / self._time_scale)))
+                self._interval_gauges[subsystem.name].set(interval_ms)
+
+    def _account(self, elapsed_s: float) -> None:
+        """Credit the wakeups (and their CPU) avoided over the last *elapsed_s*."""
+        cpu_saved = 0.0
+        for s in self._subsystems:
+            if not s.interval_ms or not self._active(s):
+                continue
+            saved = elapsed_s * 1000.0 * (1.0 / s.baseline_ms - 1.0 / s.interval_ms)
+            s.wakeups_saved += saved
+            self._saved_gauges[s.name].set(round(s.wakeups_saved))
+            cpu_saved += s.wakeups_saved * s.mean_cost_s()
+        self._cpu_saved.set(cpu_saved)
+
+    def _enter(self, mode: str, now: float) -> None:
+        cpu = time.process_time()
+        wall = now - self._mode_started
+        logger.info(
+            "Drive mode %s → %s after %.0f s (CPU %.1f%%); saved so far: %s, ~%.1f s CPU",
+            self._mode, mode, wall,
+            100.0 * (cpu - self._mode_cpu) / wall if wall > 0 else 0.0,
+            ", ".join(f"{s.name} {s.wakeups_saved:.0f}" for s in self._subsystems),
+            self._cpu_saved.value,
+        )
+        self._mode = mode
+        self._mode_started = now
+        self._mode_cpu = cpu
+        self.modeChanged.emit(mode)
+
@@ -0,0 +1,175 @@
+import logging
+from datetime import datetime, timezone
+
+from PyQt6.QtCore import (
+    QAbstractListModel, QByteArray, QModelIndex, Qt, pyqtProperty, pyqtSignal, pyqtSlot,
+)
+from sqlalchemy import func, select
+
+import config
+import metrics
+from models import AlertEvent, DrivingSession, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SECONDS = metrics.histogram("via_history_page_seconds", "Session history page query")
+
+# Summary columns only: selecting them (not DrivingSession entities) keeps
+# the readings relationships, and the ORM identity map, out of it entirely
+_COLUMNS = (
+    DrivingSession.id,
+    DrivingSession.started_at,
+    DrivingSession.ended_at,
+    DrivingSession.distance_km,
+    DrivingSession.avg_speed_kph,
+    DrivingSession.max_speed_kph,
+    DrivingSession.fuel_used_l,
+    DrivingSession.hard_accel_events,
+    DrivingSession.hard_brake_events,
+    select(func.count(AlertEvent.id))
+    .where(AlertEvent.session_id == DrivingSession.id)
+    .scalar_subquery(),
+)
+
+_ROLES = (
+    "sessionId", "startedAt", "duration", "distance", "avgSpeed", "maxSpeed",
+    "fuel", "hardEvents", "alerts", "inProgress",
+)
+
+
+def _local(value: datetime) -> datetime:
+    # SQLite hands DateTime(timezone=True) back naive; the values are UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone()
+
+
+def _duration(started: datetime, ended: datetime | None) -> str:
+    if ended is None:
+        return "—"
+    minutes = int((ended - started).total_seconds() // 60)
+    return f"{minutes // 60} h {minutes % 60:02d} min" if minutes >= 60 else f"{minutes} min"
+
+
+def _number(value: float | None, fmt: str) -> str:
+    return "—" if value is None else fmt.format(value)
+
+
+def _row(r) -> tuple:
+    """Display values for one session, formatted once when its page loads."""
+    (session_id, started, ended, distance, avg_speed, max_speed, fuel,
+     accel, brake, alerts) = r
+    return (
+        session_id,
+        _local(started).strftime("%a %d %b %Y  %H:%M"),
+        _duration(started, ended),
+        _number(distance, "{:.1f} km"),
+        _number(avg_speed, "{:.0f} km/h"),
+        _number(max_speed, "{:.0f} km/h"),
+        _number(fuel, "{:.2f} L"),
+        (accel or 0) + (brake or 0),
+        alerts,
+        ended is None,
+    )
+
+
+class SessionHistoryModel(QAbstractListModel):
+    """Past DrivingSessions for the history view, newest first.
+
+    Rows are fetched HISTORY_PAGE_SIZE at a time as the list scrolls
+    (canFetchMore / fetchMore), each page a keyset query on the primary key
+    so the thousandth page costs what the first does.  Only the summary
+    columns models.analytics fills in are read, never the readings.  The
+    rows are dropped again when the view closes.
+    """
+
+    activeChanged = pyqtSignal(bool)
+    countChanged = pyqtSignal()
+
+    def __init__(self, page_size: int = config.HISTORY_PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self._page_size = page_size
+        self._rows: list[tuple] = []
+        self._exhausted = True
+        self._active = False
+
+    # ------------------------------------------------------------------
+    # QAbstractListModel
+    # ------------------------------------------------------------------
+
+    def roleNames(self):
+        return {Qt.ItemDataRole.UserRole + i: QByteArray(name.encode()) for i, name in enumerate(_ROLES)}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        column = role - Qt.ItemDataRole.UserRole
+        if not index.isValid() or not 0 <= column < len(_ROLES):
+            return None
+        return self._rows[index.row()][column]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        page = self._fetch_page(self._rows[-1][0] if self._rows else None)
+        if len(page) < self._page_size:
+            self._exhausted = True
+        if page:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+            self.countChanged.emit()
+
+    def _fetch_page(self, before_id: int | None) -> list[tuple]:
+        query = select(*_COLUMNS).order_by(DrivingSession.id.desc()).limit(self._page_size)
+        if before_id is not None:
+            query = query.where(DrivingSession.id < before_id)
+        db = SessionLocal()
+        try:
+            with _PAGE_SECONDS.time():
+                return [_row(r) for r in db.execute(query).all()]
+        except Exception:
+            logger.exception("Failed to load session history")
+            self._exhausted = True
+            return []
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # QML
+    # ------------------------------------------------------------------
+
+    @pyqtProperty(bool, notify=activeChanged)
+    def active(self):
+        return self._active
+
+    @pyqtProperty(int, notify=countChanged)
+    def count(self):
+        return len(self._rows)
+
+    @pyqtSlot()
+    def open(self):
+        if not self._active:
+            self._reset(exhausted=False)
+            self._active = True
+            self.activeChanged.emit(True)
+
+    @pyqtSlot()
+    def close(self):
+        if self._active:
+            self._active = False
+            self.activeChanged.emit(False)
+            self._reset(exhausted=True)
+
+    def _reset(self, exhausted: bool) -> None:
+        # Start from the newest session again; the view pulls the first page
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = exhausted
+        self.endResetModel()
+        self.countChanged.emit()
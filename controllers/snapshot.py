@@ -0,0 +1,198 @@
+import logging
+import threading
+from dataclasses import fields, replace
+from typing import Any
+
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtBoundSignal, pyqtProperty, pyqtSignal, pyqtSlot
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class FrameClock(QObject):
+    """Runs coalesced per-frame work on the GUI thread.
+
+    Work is requested, not scheduled: the first request after a frame asks
+    the attached window for an update and the subscribers run from its
+    ``afterAnimating`` signal, i.e. at most once per vsync.  Without a
+    window (or while it is hidden) a frame-length single-shot timer stands
+    in so headless use still flushes.
+
+    Every subscriber reports the notify signals it emitted and the number of
+    receivers those signals had; QML bindings are receivers, so the latter
+    is the number of binding re-evaluations the frame triggered.
+    """
+
+    statsChanged = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._window = None
+        self._requested = False
+        self._subscribers: list = []
+
+        self._fallback = QTimer(self)
+        self._fallback.setSingleShot(True)
+        self._fallback.setTimerType(Qt.TimerType.PreciseTimer)
+        self._fallback.setInterval(config.FRAME_INTERVAL_MS)
+        self._fallback.timeout.connect(self._on_frame)
+
+        self._frame_signals = 0
+        self._frame_bindings = 0
+        self._last_signals = 0
+        self._last_bindings = 0
+        self._peak_signals = 0
+        self._frames = 0
+
+    # ------------------------------------------------------------------
+    # Qt properties
+    # ------------------------------------------------------------------
+
+    @pyqtProperty(int, notify=statsChanged)
+    def signalsLastFrame(self):
+        return self._last_signals
+
+    @pyqtProperty(int, notify=statsChanged)
+    def bindingsLastFrame(self):
+        return self._last_bindings
+
+    @pyqtProperty(int, notify=statsChanged)
+    def peakSignalsPerFrame(self):
+        return self._peak_signals
+
+    @pyqtProperty(int, notify=statsChanged)
+    def framesApplied(self):
+        return self._frames
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def attach_window(self, window) -> None:
+        """Align flushes with *window*'s frames (a QQuickWindow)."""
+        self._window = window
+        window.afterAnimating.connect(self._on_frame)
+
+    def subscribe(self, callback) -> None:
+        """Register *callback* to run once per requested frame."""
+        self._subscribers.append(callback)
+
+    def count(self, signals: int, bindings: int) -> None:
+        """Called by subscribers to account for the notifies they emitted."""
+        self._frame_signals += signals
+        self._frame_bindings += bindings
+
+    @pyqtSlot()
+    def request(self) -> None:
+        if self._requested:
+            return
+        self._requested = True
+        if self._window is not None and self._window.isVisible():
+            self._window.update()
+        # Also arm the timer: a window that is not exposed renders no frames
+        self._fallback.start(config.FRAME_INTERVAL_MS * (2 if self._window else 1))
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @pyqtSlot()
+    def _on_frame(self) -> None:
+        if not self._requested:
+            return
+        self._requested = False
+        self._fallback.stop()
+
+        self._frame_signals = self._frame_bindings = 0
+        for callback in self._subscribers:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Frame subscriber failed")
+
+        self._frames += 1
+        self._last_signals = self._frame_signals
+        self._last_bindings = self._frame_bindings
+        self._peak_signals = max(self._peak_signals, self._frame_signals)
+        self.statsChanged.emit()
+
+
+class SnapshotModel(QObject):
+    """Immutable state record published from any thread, applied per frame.
+
+    Producers replace the whole record with :meth:`publish` or
+    :meth:`update`; only the newest record survives until the next frame,
+    when the GUI thread diffs it against the one QML last saw and emits one
+    notify signal per changed field.  Property getters read :attr:`applied`.
+    """
+
+    _published = pyqtSignal()
+
+    def __init__(self, owner: QObject, initial, signals: dict[str, pyqtBoundSignal],
+                 clock: FrameClock, parent=None):
+        super().__init__(parent or owner)
+        self._owner = owner
+        self._signals = signals
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._applied = initial
+        self._latest = initial
+        self._dirty = False
+
+        # Crosses threads as a queued call; sent once per frame at most
+        self._published.connect(clock.request)
+        clock.subscribe(self._apply)
+
+    @property
+    def applied(self):
+        """The record QML currently reflects."""
+        return self._applied
+
+    @property
+    def latest(self):
+        """The newest published record (may not be applied yet)."""
+        return self._latest
+
+    def publish(self, state) -> None:
+        with self._lock:
+            self._latest = state
+            if self._dirty:
+                return
+            self._dirty = True
+        self._published.emit()
+
+    def update(self, **changes: Any) -> None:
+        """Publish a copy of the latest record with *changes* applied."""
+        with self._lock:
+            state = replace(self._latest, **changes)
+            if state == self._latest:
+                return
+            self._latest = state
+            if self._dirty:
+                return
+            self._dirty = True
+        self._published.emit()
+
+    def _apply(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            new = self._latest
+        old, self._applied = self._applied, new
+
+        emitted = bindings = 0
+        for f in fields(new):
+            value = getattr(new, f.name)
+            previous = getattr(old, f.name)
+            # Identity first so an unchanged math.nan counts as equal
+            if value is previous or value == previous:
+                continue
+            signal = self._signals.get(f.name)
+            if signal is None:
+                continue
+            signal.emit(value)
+            emitted += 1
+            bindings += self._owner.receivers(signal)
+        self._clock.count(emitted, bindings)
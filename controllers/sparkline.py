@@ -0,0 +1,267 @@
+"""
+sparkline.py — Scene-graph line chart of one HistoryModel channel.
+
+Registered for QML as ``Via.Charts 1.0`` / ``Sparkline``:
+
+    Sparkline {
+        model: engineController.history
+        channel: "rpm"
+        minimum: 0; maximum: 8000
+        seconds: 300
+        color: "lime"
+        clip: true
+    }
+
+The vertex buffer has two vertices per history slot, one line segment
+(previous slot → this slot) each.  It is allocated once at the ring's
+capacity, and segments are stored by ``slot % capacity``, like the ring
+itself.  A new slot rewrites its own two vertices and nothing else.
+Scrolling, the visible window and the value range are all one transform
+matrix.  Per frame the work is the same whether the history holds a
+minute or ten.
+"""
+import logging
+import math
+from array import array
+
+from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal
+from PyQt6.QtGui import QColor, QMatrix4x4
+from PyQt6.QtQuick import (
+    QQuickItem, QSGFlatColorMaterial, QSGGeometry, QSGGeometryNode, QSGNode, QSGTransformNode,
+)
+
+from controllers.engine_history import HistoryModel
+
+logger = logging.getLogger(__name__)
+
+# Floats per segment: two Point2D vertices
+_SEGMENT_FLOATS = 4
+# Slot x coordinates are relative to an origin kept near the data, so
+# float32 vertices stay exact; past this many slots the buffer is rebuilt
+_REBASE_SLOTS = 1 << 20
+
+# QML channel names → RollingHistory channels
+_CHANNEL_NAMES = {
+    "rpm": "rpm", "speed": "speed", "coolantTemp": "coolant_temp", "engineLoad": "engine_load",
+}
+
+
+class Sparkline(QQuickItem):
+    """Rolling line chart drawn from a HistoryModel, newest slot at the right edge."""
+
+    modelChanged = pyqtSignal()
+    channelChanged = pyqtSignal()
+    colorChanged = pyqtSignal()
+    rangeChanged = pyqtSignal()
+    secondsChanged = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFlag(QQuickItem.Flag.ItemHasContents, True)
+        self._model: HistoryModel | None = None
+        self._channel = "rpm"
+        self._color = QColor("lime")
+        self._minimum = 0.0
+        self._maximum = 100.0
+        self._seconds = 0.0
+        self._line_width = 2.0
+
+        # Render-thread state, touched only in updatePaintNode
+        self._geometry: QSGGeometry | None = None
+        self._material: QSGFlatColorMaterial | None = None
+        self._vertices: memoryview | None = None
+        self._written = 0
+        self._origin = 0
+        self._rebuild = True
+        self._color_dirty = False
+
+        self.widthChanged.connect(self.update)
+        self.heightChanged.connect(self.update)
+
+    # ------------------------------------------------------------------
+    # Qt properties
+    # ------------------------------------------------------------------
+
+    @pyqtProperty(QObject, notify=modelChanged)
+    def model(self):
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        if model is self._model:
+            return
+        if self._model is not None:
+            try:
+                self._model.rowsInserted.disconnect(self.update)
+            except (RuntimeError, TypeError):
+                pass  # The model went first (shutdown)
+        self._model = model if isinstance(model, HistoryModel) else None
+        if model is not None and self._model is None:
+            logger.warning("Sparkline.model must be a HistoryModel, not %r", model)
+        if self._model is not None:
+            self._model.rowsInserted.connect(self.update)
+        self._rebuild = True
+        self.modelChanged.emit()
+        self.update()
+
+    @pyqtProperty(str, notify=channelChanged)
+    def channel(self):
+        return self._channel
+
+    @channel.setter
+    def channel(self, channel):
+        if channel == self._channel:
+            return
+        if channel not in _CHANNEL_NAMES:
+            logger.warning("Unknown Sparkline channel %r (one of %s)",
+                           channel, ", ".join(_CHANNEL_NAMES))
+            return
+        self._channel = channel
+        self._rebuild = True
+        self.channelChanged.emit()
+        self.update()
+
+    @pyqtProperty(QColor, notify=colorChanged)
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        if color == self._color:
+            return
+        self._color = QColor(color)
+        self._color_dirty = True
+        self.colorChanged.emit()
+        self.update()
+
+    @pyqtProperty(float, notify=rangeChanged)
+    def minimum(self):
+        return self._minimum
+
+    @minimum.setter
+    def minimum(self, value):
+        if value != self._minimum:
+            self._minimum = value
+            self.rangeChanged.emit()
+            self.update()
+
+    @pyqtProperty(float, notify=rangeChanged)
+    def maximum(self):
+        return self._maximum
+
+    @maximum.setter
+    def maximum(self, value):
+        if value != self._maximum:
+            self._maximum = value
+            self.rangeChanged.emit()
+            self.update()
+
+    @pyqtProperty(float, notify=secondsChanged)
+    def seconds(self):
+        """Visible window; 0 (the default) shows the whole history."""
+        return self._seconds
+
+    @seconds.setter
+    def seconds(self, value):
+        if value != self._seconds:
+            self._seconds = value
+            self.secondsChanged.emit()
+            self.update()
+
+    # ------------------------------------------------------------------
+    # QQuickItem
+    # ------------------------------------------------------------------
+
+    def updatePaintNode(self, node, _data):
+        # Render thread, with the GUI thread blocked: the model is stable
+        if self._model is None or self.width() <= 0 or self.height() <= 0:
+            return None
+        history = self._model.history
+        first, end = self._model.first_slot, self._model.end_slot
+
+        if node is None or self._geometry is None or self._geometry.vertexCount() != 2 * history.capacity:
+            node = self._build_node(history.capacity)
+        if self._color_dirty:
+            self._material.setColor(self._color)
+            node.firstChild().markDirty(QSGNode.DirtyStateBit.DirtyMaterial)
+            self._color_dirty = False
+        if self._rebuild or end - self._origin > _REBASE_SLOTS:
+            self._clear(first)
+
+        start = max(self._written, first)
+        if start < end:
+            channel = _CHANNEL_NAMES[self._channel]
+            previous = history.value(channel, start - 1)
+            for slot in range(start, end):
+                value = history.value(channel, slot)
+                self._write_segment(slot, previous, value, history.capacity)
+                previous = value
+            self._written = end
+            self._geometry.markVertexDataDirty()
+            node.firstChild().markDirty(QSGNode.DirtyStateBit.DirtyGeometry)
+
+        node.setMatrix(self._matrix(history, end))
+        node.markDirty(QSGNode.DirtyStateBit.DirtyMatrix)
+        return node
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _build_node(self, capacity: int) -> QSGTransformNode:
+        geometry = QSGGeometry(QSGGeometry.defaultAttributes_Point2D(), 2 * capacity)
+        geometry.setDrawingMode(QSGGeometry.DrawingMode.DrawLines)
+        geometry.setLineWidth(self._line_width)
+        vertices = geometry.vertexData()
+        vertices.setsize(geometry.vertexCount() * geometry.sizeOfVertex())
+
+        material = QSGFlatColorMaterial()
+        material.setColor(self._color)
+
+        line = QSGGeometryNode()
+        line.setGeometry(geometry)
+        line.setMaterial(material)
+        node = QSGTransformNode()
+        node.appendChildNode(line)
+
+        # The item keeps the geometry and material alive for the node
+        self._geometry, self._material = geometry, material
+        self._vertices = memoryview(vertices).cast("B").cast("f")
+        self._color_dirty = False
+        self._rebuild = True
+        return node
+
+    def _clear(self, first: int) -> None:
+        """Collapse every segment to a point; retained slots get rewritten."""
+        self._vertices[:] = array("f", [0.0]) * len(self._vertices)
+        self._origin = first
+        self._written = first
+        self._rebuild = False
+        self._geometry.markVertexDataDirty()
+
+    def _write_segment(self, slot: int, previous: float, value: float, capacity: int) -> None:
+        base = (slot % capacity) * _SEGMENT_FLOATS
+        x = float(slot - self._origin)
+        if math.isnan(value):
+            # A gap: a zero-length segment draws nothing
+            self._vertices[base:base + _SEGMENT_FLOATS] = _floats(x, 0.0, x, 0.0)
+        elif math.isnan(previous):
+            self._vertices[base:base + _SEGMENT_FLOATS] = _floats(x, value, x + 1.0, value)
+        else:
+            self._vertices[base:base + _SEGMENT_FLOATS] = _floats(x, previous, x + 1.0, value)
+
+    def _matrix(self, history, end: int) -> QMatrix4x4:
+        """Slot/value space → item pixels, newest slot ending at the right edge."""
+        visible = history.capacity
+        if self._seconds > 0:
+            visible = max(2, min(visible, int(round(self._seconds * history.hz))))
+        span = self._maximum - self._minimum or 1.0
+        matrix = QMatrix4x4()
+        matrix.translate(self.width(), self.height())
+        matrix.scale(self.width() / visible, -self.height() / span)
+        matrix.translate(-float(end - self._origin), -self._minimum)
+        return matrix
+
+
+def _floats(*values: float) -> array:
+    return array("f", values)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+headless.py — Data-logger mode: OBD + GPS to the database, no screen.
+
+    python headless.py [--duration SECONDS] [--no-obd] [--no-gps]
+
+Runs EngineController, NavigationController and the DB writer on a
+QCoreApplication.  Nothing from QtGui, QtQuick, QtQml or WebEngine is
+imported, so it starts in a fraction of the dashboard's time and memory
+and runs on hosts without a display.  Stop it with SIGINT / SIGTERM, or
+pass --duration for benchmark and test runs.
+
+Scripts can drive it without the command line:
+
+    data_logger = HeadlessLogger(obd=False)
+    data_logger.start()
+    data_logger.bus.publish(EngineSample(...))
+    ...
+    data_logger.stop()
+"""
+import argparse
+import logging
+import signal
+import socket
+import sys
+
+# Imported before Qt so start-up time includes library loading
+import boot_trace
+
+from PyQt6.QtCore import QCoreApplication, QObject, QSocketNotifier, QTimer
+
+import config
+import log
+import metrics
+import models
+from controllers.engine_controller import EngineController
+from controllers.link_supervisor import LinkSupervisor
+from controllers.navigation_controller import NavigationController
+from models.retention import RetentionWorker
+from telemetry import TelemetryBus
+from telemetry.alerts import AlertEngine
+from telemetry.db_writer import DbWriter
+from telemetry.journal import Journal
+
+logger = logging.getLogger(__name__)
+
+_GUI_MODULES = ("PyQt6.QtGui", "PyQt6.QtQuick", "PyQt6.QtQml", "PyQt6.QtWebEngineQuick")
+
+
+class HeadlessLogger(QObject):
+    """Acquisition and persistence without any UI.
+
+    Needs a running QCoreApplication event loop for the GPS timer and the
+    link supervisor's retries; the OBD loop and the DB writer run on their
+    own threads.
+    """
+
+    def __init__(self, bus: TelemetryBus | None = None, obd: bool = True, gps: bool = True,
+                 parent=None):
+        super().__init__(parent)
+        self.bus = bus or TelemetryBus()
+        self.journal = Journal() if config.JOURNAL_ENABLED else None
+        if self.journal is not None:
+            self.journal.attach(self.bus)
+        self.db_writer = DbWriter(self.bus, journal=self.journal)
+        self.alerts = AlertEngine(self.bus) if config.ALERTS_ENABLED else None
+        self.retention = RetentionWorker()
+        self.supervisor = LinkSupervisor(self.bus, parent=self)
+        self.engine = EngineController(self.bus, supervisor=self.supervisor, parent=self)
+        self.navigation = (
+            NavigationController(self.bus, supervisor=self.supervisor, parent=self) if gps else None
+        )
+        self._obd = obd
+
+    def start(self) -> None:
+        self.db_writer.start()
+        if self.alerts is not None:
+            self.alerts.start()
+        if config.RETENTION_ENABLED:
+            self.retention.start()
+        if self._obd:
+            # Retried with backoff until the adapter answers
+            self.engine.keep_connected()
+
+    def stop(self) -> None:
+        """Close the OBD link and the session, then flush what is left to the DB."""
+        self.engine.running = False
+        self.engine.disconnect()
+        self.retention.stop()
+        if self.alerts is not None:
+            self.alerts.stop()
+        self.db_writer.stop()
+        if self.journal is not None:
+            self.journal.close()
+
+
+class _SignalWatcher(QObject):
+    """Quits the event loop on SIGINT / SIGTERM without a polling timer.
+
+    Python only runs signal handlers between bytecodes, which never happens
+    while Qt sleeps in its event loop; the wakeup fd gets Qt's attention.
+    """
+
+    def __init__(self, app: QCoreApplication):
+        super().__init__(app)
+        self._read, self._write = socket.socketpair()
+        self._write.setblocking(False)
+        signal.set_wakeup_fd(self._write.fileno())
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: app.quit())
+        self._notifier = QSocketNotifier(self._read.fileno(), QSocketNotifier.Type.Read, self)
+        self._notifier.activated.connect(lambda *_: self._read.recv(64))
+
+    def close(self) -> None:
+        signal.set_wakeup_fd(-1)
+        self._notifier.setEnabled(False)
+        self._read.close()
+        self._write.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Via headless data logger")
+    parser.add_argument("--duration", type=float, default=0.0,
+                        help="exit after this many seconds (default: run until signalled)")
+    parser.add_argument("--no-obd", dest="obd", action="store_false", help="do not open the OBD adapter")
+    parser.add_argument("--no-gps", dest="gps", action="store_false", help="do not run the GPS source")
+    args = parser.parse_args(argv)
+
+    log.setup()
+    models.init_db()
+
+    app = QCoreApplication(sys.argv[:1])
+    signals = _SignalWatcher(app)
+
+    data_logger = HeadlessLogger(obd=args.obd, gps=args.gps)
+    data_logger.start()
+    metrics.serve()
+
+    if args.duration > 0:
+        QTimer.singleShot(int(args.duration * 1000), app.quit)
+
+    gui = [m for m in _GUI_MODULES if m in sys.modules]
+    if gui:
+        logger.warning("Headless mode imported GUI modules: %s", ", ".join(gui))
+    logger.info(
+        "Via headless logger started in %.0f ms (RSS %.1f MiB)",
+        boot_trace.elapsed_ms(), metrics.rss_bytes() / (1024 * 1024),
+    )
+
+    exit_code = app.exec()
+    data_logger.stop()
+    signals.close()
+    logger.info("Via headless logger stopped")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
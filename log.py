@@ -3,12 +3,31 @@ log.py — Persistent file logging for the Via dashboard.
 
 Call log.setup() once at startup before any other module creates a logger.
 Writes to logs/via.log (rotating, 5 MB × 3 files) as well as stderr.
+
+Logging never blocks the caller: records go onto a bounded in-memory queue
+and a single listener thread does the formatting and the file / console
+writes.  When the queue is full, or one call site logs faster than
+LOG_RATE_LIMIT per LOG_RATE_WINDOW_S, records are dropped and counted
+(via_log_dropped) instead of stalling the OBD loop or the GUI thread.
+
+With LOG_BINARY=true every DEBUG-and-above record is also written to a
+compact binary trace (logs/via.trace) — message templates and logger names
+are interned and arguments stored packed, so high-volume debug tracing is
+cheap to leave on.  The per-site rate limit then applies to the text file
+and console only; the trace gets every record.  Decode it with
+tools/decode_log.py.
 """
+import atexit
 import logging
 import logging.handlers
+import queue
+import struct
+import threading
 from pathlib import Path
+from typing import BinaryIO, Iterator
 
 import config
+import metrics
 
 _LOG_DIR: Path = config.BASE_DIR / "logs"
 _LOG_FILE: Path = _LOG_DIR / "via.log"
@@ -17,16 +36,251 @@ _DATEFMT = "%Y-%m-%d %H:%M:%S"
 _MAX_BYTES = 5 * 1024 * 1024  # 5 MB per file
 _BACKUP_COUNT = 3              # via.log  via.log.1  via.log.2
 
+_QUEUE_DROPS = metrics.counter("via_log_dropped", "Log records dropped", {"reason": "queue_full"})
+_RATE_DROPS = metrics.counter("via_log_dropped", "Log records dropped", {"reason": "rate_limit"})
+
+_listener: logging.handlers.QueueListener | None = None
+
+# Argument types that can be formatted later, on the listener thread, without
+# risking a different result from the one the caller would have seen.
+_IMMUTABLE_ARGS = (str, int, float, bool, bytes, type(None))
+
+
+class _RateLimitFilter(logging.Filter):
+    """Lets through at most *limit* records per call site per *window_s*.
+
+    The first record after a suppressed burst carries the number of
+    records that were dropped, so the log still shows that it happened.
+    One instance can be shared by several handlers: the verdict is taken
+    once per record and reused.
+    """
+
+    def __init__(self, limit: int, window_s: float):
+        super().__init__()
+        self._limit = limit
+        self._window_s = window_s
+        self._sites: dict[tuple[str, int], list] = {}  # site → [window start, count, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self._limit <= 0:
+            return True
+        verdict = getattr(record, "_rate_verdict", None)
+        if verdict is None:
+            verdict = record._rate_verdict = self._admit(record)
+        return verdict
+
+    def _admit(self, record: logging.LogRecord) -> bool:
+        key = (record.pathname, record.lineno)
+        now = record.created
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None:
+                site = self._sites[key] = [now, 0, 0]
+            elif now - site[0] >= self._window_s:
+                site[0], site[1] = now, 0
+            if site[1] >= self._limit:
+                site[2] += 1
+                _RATE_DROPS.inc()
+                return False
+            site[1] += 1
+            suppressed, site[2] = site[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking.
+
+    Records whose arguments are all immutable are queued unformatted, so the
+    %-formatting happens on the listener thread rather than the caller's.
+    """
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self._dropped_since_report = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._dropped_since_report += 1
+            _QUEUE_DROPS.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # Tracebacks hold frames; render them now and ship the text
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(a, _IMMUTABLE_ARGS) for a in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        if self._dropped_since_report and record.levelno >= logging.WARNING:
+            record.queue_dropped, self._dropped_since_report = self._dropped_since_report, 0
+        return record
+
+
+class _Formatter(logging.Formatter):
+    """Standard format, plus a note when records were dropped before this one."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f"  [{suppressed} similar suppressed]"
+        dropped = getattr(record, "queue_dropped", 0)
+        if dropped:
+            text += f"  [{dropped} records dropped: log queue full]"
+        return text
+
+
+# ---------------------------------------------------------------------------
+# Binary trace
+# ---------------------------------------------------------------------------
+#
+# File:    MAGIC, then records.
+# Record:  u8 kind
+#   kind 0 (string): u16 id, u16 length, utf-8 bytes
+#   kind 1 (event):  f64 created, u8 level, u16 logger id, u16 template id,
+#                    u8 argc, then per argument a u8 tag and its value:
+#                    'i' i64 · 'f' f64 · 's' u16 length + utf-8 · 'n' (None)
+#
+# Logger names and message templates are written once and referred to by id
+# afterwards; past _UNKNOWN distinct strings new ones are recorded as
+# _UNKNOWN.  Argument strings vary too much to intern and are stored inline.
+
+MAGIC = b"VIALOG\x00\x01"
+_STRING = struct.Struct("<BHH")
+_EVENT = struct.Struct("<BdBHHB")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_U16 = struct.Struct("<H")
+_UNKNOWN = 0xFFFF
+
+
+class BinaryTraceHandler(logging.Handler):
+    """Writes records to the compact binary trace.  Runs on the listener thread."""
+
+    def __init__(self, path: Path):
+        super().__init__(logging.DEBUG)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            path.replace(path.with_name(path.name + ".1"))  # keep the previous run
+        self._fh = open(path, "wb")
+        self._fh.write(MAGIC)
+        self._ids: dict[str, int] = {}
+
+    def _string(self, text: str, out: list[bytes]) -> int | None:
+        sid = self._ids.get(text)
+        if sid is None:
+            if len(self._ids) >= _UNKNOWN:
+                return None
+            sid = self._ids[text] = len(self._ids)
+            data = text.encode("utf-8", "replace")[:0xFFFF]
+            out.append(_STRING.pack(0, sid, len(data)))
+            out.append(data)
+        return sid
+
+    @staticmethod
+    def _arg(value, body: list[bytes]) -> None:
+        if value is None:
+            body.append(b"n")
+        elif isinstance(value, (int, bool)) and -(1 << 63) <= value < (1 << 63):
+            body.append(b"i" + _I64.pack(int(value)))
+        elif isinstance(value, float):
+            body.append(b"f" + _F64.pack(value))
+        else:
+            text = value if isinstance(value, str) else str(value)
+            data = text.encode("utf-8", "replace")[:0xFFFF]
+            body.append(b"s" + _U16.pack(len(data)) + data)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            out: list[bytes] = []
+            body: list[bytes] = []
+            template = record.msg if isinstance(record.msg, str) else str(record.msg)
+            args = record.args if isinstance(record.args, tuple) else ()
+            if record.exc_text:
+                template, args = template + "\n%s", (*args, record.exc_text)
+            logger_id = self._string(record.name, out)
+            template_id = self._string(template, out)
+            for arg in args[:255]:
+                self._arg(arg, body)
+            out.append(_EVENT.pack(
+                1, record.created, record.levelno,
+                _UNKNOWN if logger_id is None else logger_id,
+                _UNKNOWN if template_id is None else template_id,
+                min(len(args), 255),
+            ))
+            out.extend(body)
+            self._fh.write(b"".join(out))
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self._fh.flush()
+
+    def close(self) -> None:
+        try:
+            self._fh.close()
+        finally:
+            super().close()
+
+
+def read_binary(fh: BinaryIO) -> Iterator[tuple[float, int, str, str, tuple]]:
+    """Yield (created, level, logger, template, args) from a binary trace."""
+    if fh.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a Via binary log")
+    strings: dict[int, str] = {}
+
+    def read(n: int) -> bytes:
+        data = fh.read(n)
+        if len(data) < n:
+            raise EOFError
+        return data
+
+    try:
+        while True:
+            kind = read(1)[0]
+            if kind == 0:
+                _, sid, length = _STRING.unpack(bytes([kind]) + read(_STRING.size - 1))
+                strings[sid] = read(length).decode("utf-8", "replace")
+            elif kind == 1:
+                _, created, level, logger_id, template_id, argc = _EVENT.unpack(
+                    bytes([kind]) + read(_EVENT.size - 1)
+                )
+                args = []
+                for _ in range(argc):
+                    tag = read(1)
+                    if tag == b"i":
+                        args.append(_I64.unpack(read(8))[0])
+                    elif tag == b"f":
+                        args.append(_F64.unpack(read(8))[0])
+                    elif tag == b"s":
+                        args.append(read(_U16.unpack(read(2))[0]).decode("utf-8", "replace"))
+                    else:
+                        args.append(None)
+                yield (created, level, strings.get(logger_id, "?"),
+                       strings.get(template_id, "?"), tuple(args))
+            else:
+                raise ValueError(f"corrupt binary log: record kind {kind}")
+    except EOFError:
+        return  # truncated tail (e.g. power loss) — keep everything before it
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
 
 def setup() -> None:
-    """Configure the root logger with a rotating file handler + stderr handler."""
+    """Route the root logger through a bounded queue to file + stderr handlers."""
+    global _listener
     _LOG_DIR.mkdir(parents=True, exist_ok=True)
 
     level = getattr(logging, config.LOG_LEVEL, logging.INFO)
-    formatter = logging.Formatter(_FMT, datefmt=_DATEFMT)
-
-    root = logging.getLogger()
-    root.setLevel(level)
+    formatter = _Formatter(_FMT, datefmt=_DATEFMT)
 
     # Rotating file — persists across restarts, won't eat disk
     fh = logging.handlers.RotatingFileHandler(
@@ -36,13 +290,54 @@ def setup() -> None:
         encoding="utf-8",
     )
     fh.setFormatter(formatter)
-    root.addHandler(fh)
+    fh.setLevel(level)
 
     # Console — useful during dev / SSH sessions
     ch = logging.StreamHandler()
     ch.setFormatter(formatter)
-    root.addHandler(ch)
+    ch.setLevel(level)
+
+    handlers: list[logging.Handler] = [fh, ch]
+    qh = _DroppingQueueHandler(queue.Queue(maxsize=config.LOG_QUEUE_SIZE))
+    rate_limit = _RateLimitFilter(config.LOG_RATE_LIMIT, config.LOG_RATE_WINDOW_S)
+    if config.LOG_BINARY:
+        # The binary trace takes every record; only the text outputs are limited
+        fh.addFilter(rate_limit)
+        ch.addFilter(rate_limit)
+        handlers.append(BinaryTraceHandler(config.LOG_BINARY_FILE))
+        level = logging.DEBUG
+    else:
+        # Nothing needs the excess: drop it before it takes queue space
+        qh.addFilter(rate_limit)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(qh)
+
+    _listener = logging.handlers.QueueListener(qh.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
 
     logging.getLogger(__name__).info(
-        "Logging started — file: %s  level: %s", _LOG_FILE, config.LOG_LEVEL
+        "Logging started — file: %s  level: %s%s", _LOG_FILE, config.LOG_LEVEL,
+        f"  binary: {config.LOG_BINARY_FILE}" if config.LOG_BINARY else "",
     )
+
+
+def shutdown() -> None:
+    """Drain the queue and close the handlers.  Safe to call more than once.
+
+    Anything logged afterwards falls through to logging.lastResort (stderr,
+    WARNING and above).
+    """
+    global _listener
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, _DroppingQueueHandler):
+            root.removeHandler(handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
@@ -1,19 +1,39 @@
 #!/usr/bin/env python3
 import logging
+import os
 import sys
 
-from PyQt6.QtCore import QEvent, QObject, Qt, pyqtSignal
+# Imported before Qt so the boot timeline includes library loading
+import boot_trace
+
+from PyQt6.QtCore import QCoreApplication, QEvent, QObject, QResource, Qt, QUrl, pyqtSignal
 from PyQt6.QtGui import QGuiApplication
-from PyQt6.QtQml import QQmlApplicationEngine
-from PyQt6.QtWebEngineQuick import QtWebEngineQuick
+from PyQt6.QtQml import QQmlApplicationEngine, qmlRegisterType
+from PyQt6.QtQuick import QQuickWindow, QSGRendererInterface
 
 import config
 import log
+import metrics
 import models
+from controllers.album_art_provider import AlbumArtProvider
+from controllers.camera_controller import CameraController, CameraPreviewProvider
+from controllers.dbus_dispatcher import DBusCommandDispatcher
 from controllers.device_controller import DeviceController
+from controllers.diagnostics_controller import DiagnosticsController
 from controllers.engine_controller import EngineController
+from controllers.gauge_presenter import GaugePresenter
+from controllers.link_supervisor import LinkSupervisor
 from controllers.media_controller import MusicPlayerController
 from controllers.navigation_controller import NavigationController
+from controllers.rate_governor import RateGovernor
+from controllers.session_history import SessionHistoryModel
+from controllers.snapshot import FrameClock
+from controllers.sparkline import Sparkline
+from models.retention import RetentionWorker
+from telemetry import TelemetryBus
+from telemetry.alerts import AlertEngine
+from telemetry.db_writer import DbWriter
+from telemetry.journal import Journal
 
 log.setup()
 
@@ -39,20 +59,96 @@ class KeyEventFilter(QObject):
         return super().eventFilter(obj, event)
 
 
-def main() -> None:
-    models.init_db()
+def _start_prewarm(window) -> None:
+    """Begin building the remaining views in the background."""
+    if config.LAZY_VIEWS and config.PREWARM_VIEWS:
+        window.setProperty("prewarmViews", config.PREWARM_VIEWS)
 
-    QtWebEngineQuick.initialize()
-    app = QGuiApplication(sys.argv)
-    # app.setOverrideCursor(Qt.CursorShape.BlankCursor)
 
-    engine_controller = EngineController()
-    music_controller = MusicPlayerController()
-    device_controller = DeviceController()
-    nav_controller = NavigationController()
+def _main_view_url() -> QUrl:
+    """Register the resource bundle in packaged mode; return the root QML URL.
 
-    # Propagate the active session ID to controllers that log GPS data
-    engine_controller.sessionIdChanged.connect(nav_controller.set_session_id)
+    Must run before the QML engine exists so the disk-cache path applies.
+    """
+    if not config.PACKAGED:
+        return QUrl.fromLocalFile(str(config.BASE_DIR / "views" / "MainView.qml"))
+
+    # Compiled units shipped by tools/build_bundle.py. Always this directory:
+    # an inherited QML_DISK_CACHE_PATH would miss them and recompile at boot.
+    os.environ["QML_DISK_CACHE_PATH"] = str(config.QML_CACHE_DIR)
+    if not any(config.QML_CACHE_DIR.glob("*.qmlc")):
+        logger.warning("No compiled QML in %s — views compile on first use; "
+                       "run tools/build_bundle.py on this Qt build.", config.QML_CACHE_DIR)
+    if not QResource.registerResource(str(config.RESOURCE_BUNDLE)):
+        logger.critical("Could not load resource bundle %s — exiting.", config.RESOURCE_BUNDLE)
+        sys.exit(-1)
+    logger.info("Loaded resource bundle %s", config.RESOURCE_BUNDLE)
+    return QUrl("qrc:/views/MainView.qml")
+
+
+def main() -> None:
+    boot_trace.mark("main")
+
+    with boot_trace.phase("init_db"):
+        models.init_db()
+
+    with boot_trace.phase("webengine_init"):
+        if config.LAZY_VIEWS:
+            # The application-level setup QtWebEngineQuick.initialize() performs,
+            # without loading WebEngine: Chromium now starts with NavigationView.
+            QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+            QQuickWindow.setGraphicsApi(QSGRendererInterface.GraphicsApi.OpenGL)
+        else:
+            from PyQt6.QtWebEngineQuick import QtWebEngineQuick
+            QtWebEngineQuick.initialize()
+
+    with boot_trace.phase("qguiapplication"):
+        app = QGuiApplication(sys.argv)
+    # app.setOverrideCursor(Qt.CursorShape.BlankCursor)
+
+    with boot_trace.phase("controllers"):
+        # One dispatcher so media and device commands share latency stats
+        dispatcher = DBusCommandDispatcher()
+
+        # Paces all controller → QML property updates to one diff per frame
+        frame_clock = FrameClock()
+
+        # Acquisition publishes here; UI, persistence etc. subscribe
+        bus = TelemetryBus()
+        journal = Journal() if config.JOURNAL_ENABLED else None
+        if journal is not None:
+            journal.attach(bus)
+        db_writer = DbWriter(bus, journal=journal)
+        db_writer.start()
+        alert_engine = AlertEngine(bus) if config.ALERTS_ENABLED else None
+        if alert_engine is not None:
+            alert_engine.start()
+        retention = RetentionWorker()
+        if config.RETENTION_ENABLED:
+            retention.start()
+        # Reconnects OBD, GPS and Bluetooth when they drop
+        supervisor = LinkSupervisor(bus)
+
+        with boot_trace.phase("controllers.engine"):
+            engine_controller = EngineController(bus, frame_clock, supervisor=supervisor)
+            gauge_presenter = GaugePresenter(engine_controller, frame_clock)
+        with boot_trace.phase("controllers.music"):
+            music_controller = MusicPlayerController(dispatcher, frame_clock)
+        with boot_trace.phase("controllers.device"):
+            device_controller = DeviceController(dispatcher, supervisor=supervisor)
+        with boot_trace.phase("controllers.navigation"):
+            nav_controller = NavigationController(bus, supervisor=supervisor)
+        with boot_trace.phase("controllers.camera"):
+            camera_controller = CameraController(supervisor=supervisor)
+            if config.CAMERA_ENABLED:
+                camera_controller.start()
+
+        rate_governor = RateGovernor(
+            engine_controller, music_controller, device_controller, nav_controller
+        )
+        diagnostics_controller = DiagnosticsController()
+        session_history = SessionHistoryModel()
+        metrics.serve()
 
     # Bridge BT connection state into the music controller (enables MPRIS polling)
     device_controller.hasConnectedDeviceChanged.connect(music_controller.set_bluetooth_connected)
@@ -61,20 +157,52 @@ def main() -> None:
     key_filter.shutdownRequested.connect(engine_controller.quit)
     app.installEventFilter(key_filter)
 
-    qml_engine = QQmlApplicationEngine()
+    with boot_trace.phase("resource_bundle"):
+        main_view = _main_view_url()
+
+    with boot_trace.phase("qml_engine"):
+        qml_engine = QQmlApplicationEngine()
+    qmlRegisterType(Sparkline, "Via.Charts", 1, 0, "Sparkline")
+    qml_engine.addImageProvider(AlbumArtProvider.PROVIDER_ID, AlbumArtProvider())
+    qml_engine.addImageProvider(CameraPreviewProvider.PROVIDER_ID, camera_controller.preview_provider)
     qml_engine.rootContext().setContextProperty("engineController", engine_controller)
+    qml_engine.rootContext().setContextProperty("gaugePresenter", gauge_presenter)
     qml_engine.rootContext().setContextProperty("musicController", music_controller)
     qml_engine.rootContext().setContextProperty("deviceController", device_controller)
     qml_engine.rootContext().setContextProperty("navigationController", nav_controller)
+    qml_engine.rootContext().setContextProperty("cameraController", camera_controller)
+    qml_engine.rootContext().setContextProperty("commandDispatcher", dispatcher)
+    qml_engine.rootContext().setContextProperty("frameClock", frame_clock)
+    qml_engine.rootContext().setContextProperty("diagnosticsController", diagnostics_controller)
+    qml_engine.rootContext().setContextProperty("rateGovernor", rate_governor)
+    qml_engine.rootContext().setContextProperty("sessionHistory", session_history)
+
+    if not config.LAZY_VIEWS:
+        qml_engine.setInitialProperties({"eagerViews": True})
 
-    qml_engine.load("views/MainView.qml")
+    with boot_trace.phase("qml_load"):
+        qml_engine.load(main_view)
 
     if not qml_engine.rootObjects():
         logger.critical("Failed to load QML root object — exiting.")
         sys.exit(-1)
 
+    window = qml_engine.rootObjects()[0]
+    frame_clock.attach_window(window)
+    boot_trace.watch_first_frame(window, lambda: _start_prewarm(window))
+
     logger.info("Via dashboard started.")
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    # Tear the QML down while the controllers its bindings read still exist
+    del qml_engine
+    camera_controller.stop()
+    retention.stop()
+    if alert_engine is not None:
+        alert_engine.stop()
+    db_writer.stop()
+    if journal is not None:
+        journal.close()
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
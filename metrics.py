@@ -0,0 +1,333 @@
+"""
+metrics.py — Runtime metrics for the Via dashboard.
+
+Counters, gauges and log-linear ("HDR-style") latency histograms kept in a
+process-wide registry.  Recording is a lock plus an integer add, cheap
+enough for the OBD loop at full rate.  The registry renders itself in
+Prometheus text format; serve() exposes that at http://127.0.0.1:PORT/metrics
+and DiagnosticsController shows the same data on a hidden QML page.
+
+    _QUERY = metrics.histogram("via_obd_query_seconds", "OBD PID round trip")
+    with _QUERY.time():
+        ...
+"""
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+import config
+
+logger = logging.getLogger(__name__)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, str] | None) -> Labels:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """Point-in-time value, either set explicitly or read from a callback."""
+
+    kind = "gauge"
+
+    def __init__(self, fn: Callable[[], float] | None = None):
+        self._value = 0.0
+        self._fn = fn
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        if self._fn is not None:
+            try:
+                return float(self._fn())
+            except Exception:
+                return math.nan
+        return self._value
+
+
+class Histogram:
+    """Log-linear histogram of positive values (seconds, bytes, ...).
+
+    Each power of two between *lowest* and *lowest* × 2**octaves is split into
+    SUB_BUCKETS linear slices, giving roughly 1/SUB_BUCKETS relative
+    precision at any magnitude with a fixed bucket array.  Prometheus output
+    uses the octave boundaries as ``le`` buckets; quantile() uses every slice.
+    """
+
+    kind = "histogram"
+    SUB_BUCKETS = 8
+
+    def __init__(self, lowest: float = 1e-6, octaves: int = 32):
+        self._lowest = lowest
+        self._octaves = octaves
+        self._counts = [0] * (octaves * self.SUB_BUCKETS + 2)  # + underflow / overflow
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def _index(self, value: float) -> int:
+        if value < self._lowest:
+            return 0
+        # value / lowest = mantissa × 2**exponent with mantissa in [0.5, 1)
+        mantissa, exponent = math.frexp(value / self._lowest)
+        octave = exponent - 1
+        if octave >= self._octaves:
+            return len(self._counts) - 1
+        return 1 + octave * self.SUB_BUCKETS + int((2.0 * mantissa - 1.0) * self.SUB_BUCKETS)
+
+    def _upper(self, index: int) -> float:
+        if index == 0:
+            return self._lowest
+        if index >= len(self._counts) - 1:
+            return math.inf
+        octave, sub = divmod(index - 1, self.SUB_BUCKETS)
+        return self._lowest * 2.0 ** octave * (1.0 + (sub + 1) / self.SUB_BUCKETS)
+
+    def observe(self, value: float) -> None:
+        index = self._index(value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    @contextmanager
+    def time(self):
+        """Observe the wall time of the enclosed block, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding quantile *q* (0 if empty)."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, n in enumerate(counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self._upper(index), self._max)
+        return self._max
+
+    def buckets(self) -> list[tuple[float, int]]:
+        """Cumulative (le, count) pairs at octave boundaries, ending with +Inf."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+        out = []
+        cumulative = counts[0]
+        out.append((self._lowest, cumulative))
+        for octave in range(self._octaves):
+            start = 1 + octave * self.SUB_BUCKETS
+            cumulative += sum(counts[start:start + self.SUB_BUCKETS])
+            out.append((self._lowest * 2.0 ** (octave + 1), cumulative))
+        out.append((math.inf, total))
+        return out
+
+
+class Registry:
+    """Named metric families, each holding one metric per label set."""
+
+    def __init__(self):
+        self._families: dict[str, tuple[str, str, dict[Labels, object]]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, help_text: str, kind: str, labels: dict[str, str] | None, factory):
+        key = _labels(labels)
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = (kind, help_text, {})
+            elif family[0] != kind:
+                raise ValueError(f"metric {name} already registered as {family[0]}")
+            metric = family[2].get(key)
+            if metric is None:
+                metric = family[2][key] = factory()
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: dict[str, str] | None = None) -> Counter:
+        return self._get(name, help_text, Counter.kind, labels, Counter)
+
+    def gauge(self, name: str, help_text: str, labels: dict[str, str] | None = None,
+              fn: Callable[[], float] | None = None) -> Gauge:
+        return self._get(name, help_text, Gauge.kind, labels, lambda: Gauge(fn))
+
+    def histogram(self, name: str, help_text: str, labels: dict[str, str] | None = None,
+                  lowest: float = 1e-6, octaves: int = 32) -> Histogram:
+        return self._get(name, help_text, Histogram.kind, labels,
+                         lambda: Histogram(lowest, octaves))
+
+    def remove(self, name: str, labels: dict[str, str] | None = None, metric=None) -> None:
+        """Drop one metric; with *metric*, only if that is still the registered one."""
+        key = _labels(labels)
+        with self._lock:
+            family = self._families.get(name)
+            if family is None or (metric is not None and family[2].get(key) is not metric):
+                return
+            family[2].pop(key, None)
+            if not family[2]:
+                del self._families[name]
+
+    def families(self):
+        with self._lock:
+            items = [(n, k, h, dict(m)) for n, (k, h, m) in sorted(self._families.items())]
+        return items
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for name, kind, help_text, metrics in self.families():
+            exposed = f"{name}_total" if kind == Counter.kind else name
+            lines.append(f"# HELP {exposed} {help_text}")
+            lines.append(f"# TYPE {exposed} {kind}")
+            for labels, metric in sorted(metrics.items()):
+                if kind == Histogram.kind:
+                    for le, count in metric.buckets():
+                        bound = "+Inf" if math.isinf(le) else f"{le:.9g}"
+                        le_label = 'le="' + bound + '"'
+                        lines.append(f"{name}_bucket{_format_labels(labels, le_label)} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {metric.sum:.9g}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {metric.count}")
+                else:
+                    lines.append(f"{exposed}{_format_labels(labels)} {metric.value:.9g}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> list[dict]:
+        """Flat rows for display: name, labels, kind and summary values."""
+        rows = []
+        for name, kind, _help, metrics in self.families():
+            for labels, metric in sorted(metrics.items()):
+                row = {
+                    "name": name,
+                    "labels": ",".join(f"{k}={v}" for k, v in labels),
+                    "kind": kind,
+                }
+                if kind == Histogram.kind:
+                    row.update(
+                        count=metric.count,
+                        p50=metric.quantile(0.50),
+                        p95=metric.quantile(0.95),
+                        p99=metric.quantile(0.99),
+                        max=metric.max,
+                    )
+                else:
+                    row["value"] = metric.value
+                rows.append(row)
+        return rows
+
+
+REGISTRY = Registry()
+
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+remove = REGISTRY.remove
+
+
+# ---------------------------------------------------------------------------
+# Process gauges
+# ---------------------------------------------------------------------------
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> float:
+    with open("/proc/self/statm") as fh:
+        return float(fh.read().split()[1]) * _PAGE_SIZE
+
+
+def _open_fds() -> float:
+    return float(len(os.listdir("/proc/self/fd")))
+
+
+gauge("via_process_resident_memory_bytes", "Resident set size", fn=rss_bytes)
+gauge("via_process_open_fds", "Open file descriptors", fn=_open_fds)
+gauge("via_process_threads", "Live Python threads", fn=lambda: threading.active_count())
+gauge("via_process_cpu_seconds", "Process CPU time (user + system)", fn=time.process_time)
+
+
+# ---------------------------------------------------------------------------
+# HTTP endpoint
+# ---------------------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        logger.debug("metrics %s - %s", self.address_string(), fmt % args)
+
+
+def serve(port: int = config.METRICS_PORT) -> ThreadingHTTPServer | None:
+    """Start the /metrics endpoint on localhost in a daemon thread (0 = off)."""
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((config.METRICS_HOST, port), _Handler)
+    except OSError:
+        logger.exception("Could not start metrics endpoint on port %d", port)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Metrics at http://%s:%d/metrics", config.METRICS_HOST, port)
+    return server
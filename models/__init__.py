@@ -1,10 +1,12 @@
 import logging
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import scoped_session, sessionmaker
 
 import config
-from .models import Base, DrivingSession, EngineReading, GpsReading
+from .models import (
+    AlertEvent, Base, DrivingSession, EngineReading, GpsReading, LinkMarker, ObdProfile,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -13,15 +15,55 @@ SessionLocal: scoped_session = scoped_session(sessionmaker(bind=_engine))
 
 
 def init_db() -> None:
-    """Create all tables if they do not exist."""
+    """Create all tables if they do not exist and recover from an unclean shutdown."""
+    _enable_incremental_vacuum()
     Base.metadata.create_all(_engine)
+    _add_missing_columns()
+    if config.JOURNAL_ENABLED:
+        # Imported here: the journal module depends on this package
+        from telemetry.journal import replay_into_db
+        replay_into_db()
     logger.info("Database initialised at %s", config.DATABASE_URL)
 
 
+def _enable_incremental_vacuum() -> None:
+    """Put SQLite in incremental auto-vacuum mode so retention can free space.
+
+    A new database takes the mode at creation.  An existing one needs a
+    full VACUUM to convert, which can take minutes on a large file; the
+    retention worker does that (models.retention), not startup.
+    """
+    if _engine.dialect.name != "sqlite":
+        return
+    with _engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+
+
+def _add_missing_columns() -> None:
+    """Add nullable columns defined since the database file was created.
+
+    create_all() never alters an existing table, so databases from earlier
+    releases would otherwise lack them.
+    """
+    inspector = inspect(_engine)
+    with _engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                ddl = column.type.compile(dialect=_engine.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {ddl}")
+                logger.info("Added column %s.%s", table.name, column.name)
+
+
 __all__ = [
     "init_db",
     "SessionLocal",
     "DrivingSession",
     "EngineReading",
     "GpsReading",
+    "AlertEvent",
+    "LinkMarker",
+    "ObdProfile",
 ]
@@ -0,0 +1,253 @@
+"""
+analytics.py — Per-trip statistics computed over whole-session arrays.
+
+A session's readings are loaded straight into NumPy arrays (timestamps
+converted to epoch seconds in SQL) and every statistic is a handful of
+vectorised operations, so a multi-hour session is analysed in
+milliseconds.  Results are stored on the DrivingSession row.
+
+DbWriter analyses each session as it closes; tools/analyze_sessions.py
+recomputes history in a process pool.
+"""
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import func, select
+
+import config
+from . import DrivingSession, EngineReading, GpsReading, SessionLocal, _engine
+
+logger = logging.getLogger(__name__)
+
+# Lower edges of the RPM bands; the last band is open-ended
+RPM_BANDS = (0, 1000, 2000, 3000, 4000, 5000, 6000)
+
+_EARTH_RADIUS_KM = 6371.0088
+_AIR_G_PER_L = 1.184        # air density at 25 °C, sea level
+_STOICHIOMETRIC_AFR = 14.7  # petrol
+_FUEL_G_PER_L = 745.0       # petrol
+
+
+@dataclass
+class TripStats:
+    distance_km: float = 0.0
+    moving_s: float = 0.0
+    idle_s: float = 0.0
+    avg_speed_kph: float | None = None
+    max_speed_kph: float | None = None
+    fuel_used_l: float = 0.0
+    hard_accel_events: int = 0
+    hard_brake_events: int = 0
+    rpm_band_s: tuple[float, ...] = (0.0,) * len(RPM_BANDS)
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def _epoch(column):
+    # julianday() parses SQLite's stored timestamp text without a Python
+    # datetime per row
+    return (func.julianday(column) - 2440587.5) * 86400.0
+
+
+def load_arrays(session_id: int, db) -> tuple[np.ndarray, np.ndarray]:
+    """Return (engine, gps) arrays for one session, oldest first.
+
+    engine columns: t, rpm, speed_kph, engine_load_pct
+    gps columns:    t, latitude, longitude, accuracy_m
+    Missing readings are NaN.
+    """
+    e = EngineReading.__table__.c
+    g = GpsReading.__table__.c
+    engine = db.execute(
+        select(_epoch(e.timestamp), e.rpm, e.speed_kph, e.engine_load_pct)
+        .where(e.session_id == session_id)
+        .order_by(e.id)
+    ).all()
+    gps = db.execute(
+        select(_epoch(g.timestamp), g.latitude, g.longitude, g.accuracy_m)
+        .where(g.session_id == session_id)
+        .order_by(g.id)
+    ).all()
+    # NumPy converts plain tuples ~40× faster than SQLAlchemy Row objects
+    return (
+        np.array(list(map(tuple, engine)), dtype=np.float64).reshape(-1, 4),
+        np.array(list(map(tuple, gps)), dtype=np.float64).reshape(-1, 4),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Statistics
+# ---------------------------------------------------------------------------
+
+def _rising_edges(mask: np.ndarray) -> int:
+    """Number of runs of True in *mask* — one event per run, not per sample."""
+    if not mask.size:
+        return 0
+    return int(mask[0]) + int(np.count_nonzero(mask[1:] & ~mask[:-1]))
+
+
+def _haversine_km(lat: np.ndarray, lon: np.ndarray) -> float:
+    lat, lon = np.radians(lat), np.radians(lon)
+    dlat, dlon = np.diff(lat), np.diff(lon)
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlon / 2.0) ** 2
+    return float(2.0 * _EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0))).sum())
+
+
+def analyze_arrays(engine: np.ndarray, gps: np.ndarray) -> TripStats:
+    """Compute TripStats from load_arrays() output.  Pure; safe in a worker process."""
+    stats = TripStats()
+    t, rpm, speed, load = engine.T
+
+    if t.size >= 2:
+        # Each interval takes the state at its start; gaps longer than
+        # ANALYTICS_MAX_GAP_S (adapter dropped, car parked) count for nothing
+        raw_dt = np.diff(t)
+        valid = (raw_dt > 0.0) & (raw_dt <= config.ANALYTICS_MAX_GAP_S)
+        dt = np.where(valid, raw_dt, 0.0)
+        rpm0, speed0, load0 = rpm[:-1], speed[:-1], load[:-1]
+
+        running = rpm0 > 0.0
+        moving = speed0 >= config.GOVERNOR_MOVING_KPH
+        stats.moving_s = float(dt[moving].sum())
+        stats.idle_s = float(dt[running & ~moving].sum())
+
+        bands = np.digitize(rpm0[running], RPM_BANDS[1:])
+        stats.rpm_band_s = tuple(
+            float(s) for s in np.bincount(bands, weights=dt[running], minlength=len(RPM_BANDS))
+        )
+
+        # Calculated load ≈ airflow as a fraction of the engine's WOT airflow
+        air_g_s = (load0 / 100.0) * config.ENGINE_DISPLACEMENT_L * (rpm0 / 120.0) * _AIR_G_PER_L
+        fuel_l_s = air_g_s / _STOICHIOMETRIC_AFR / _FUEL_G_PER_L
+        stats.fuel_used_l = float(np.nansum(fuel_l_s * dt))
+
+        accel = np.full(raw_dt.shape, np.nan)
+        np.divide(np.diff(speed) / 3.6, raw_dt, out=accel, where=valid)
+        stats.hard_accel_events = _rising_edges(accel >= config.HARD_ACCEL_MS2)
+        stats.hard_brake_events = _rising_edges(accel <= -config.HARD_BRAKE_MS2)
+
+        odometer_km = float(np.nansum(speed0 * dt) / 3600.0)
+    else:
+        odometer_km = 0.0
+
+    if np.isfinite(speed).any():
+        stats.max_speed_kph = float(np.nanmax(speed))
+
+    # Distance from GPS where there is a usable track, else from speed × time
+    fixes = gps[~(gps[:, 3] > config.ANALYTICS_MAX_GPS_ACCURACY_M)]
+    if len(fixes) >= 2:
+        stats.distance_km = _haversine_km(fixes[:, 1], fixes[:, 2])
+    else:
+        stats.distance_km = odometer_km
+
+    if stats.moving_s > 0.0:
+        stats.avg_speed_kph = stats.distance_km / (stats.moving_s / 3600.0)
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+def _store(db, session_id: int, stats: TripStats) -> None:
+    session = db.get(DrivingSession, session_id)
+    if session is None:
+        return
+    session.analyzed_at = datetime.now(timezone.utc)
+    session.distance_km = stats.distance_km
+    session.moving_s = stats.moving_s
+    session.idle_s = stats.idle_s
+    session.avg_speed_kph = stats.avg_speed_kph
+    session.max_speed_kph = stats.max_speed_kph
+    session.fuel_used_l = stats.fuel_used_l
+    session.hard_accel_events = stats.hard_accel_events
+    session.hard_brake_events = stats.hard_brake_events
+    session.rpm_band_s = json.dumps([round(s, 1) for s in stats.rpm_band_s])
+
+
+def analyze_session(session_id: int) -> TripStats | None:
+    """Compute and store the statistics for one session."""
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        engine, gps = load_arrays(session_id, db)
+        loaded = time.perf_counter()
+        stats = analyze_arrays(engine, gps)
+        _store(db, session_id, stats)
+        db.commit()
+        logger.info(
+            "Session %d analysed: %.2f km, %.0f s moving, %.0f s idle "
+            "(%d + %d rows, load %.1f ms, compute %.1f ms)",
+            session_id, stats.distance_km, stats.moving_s, stats.idle_s,
+            len(engine), len(gps),
+            (loaded - started) * 1000.0, (time.perf_counter() - loaded) * 1000.0,
+        )
+        return stats
+    except Exception:
+        logger.exception("Failed to analyse session %d", session_id)
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+
+# ---------------------------------------------------------------------------
+# Batch recompute
+# ---------------------------------------------------------------------------
+
+def _worker_init() -> None:
+    # Connections inherited across fork must not be shared with the parent
+    _engine.dispose(close=False)
+
+
+def _compute(session_id: int) -> tuple[int, TripStats]:
+    db = SessionLocal()
+    try:
+        return session_id, analyze_arrays(*load_arrays(session_id, db))
+    finally:
+        db.close()
+
+
+def analyze_all(session_ids: Iterable[int] | None = None, recompute: bool = False,
+                workers: int = config.ANALYTICS_WORKERS) -> int:
+    """Analyse many sessions in a process pool; returns how many were stored.
+
+    By default every closed session not yet analysed.  Workers only read;
+    results are written here, by the one process, in a single transaction.
+    """
+    db = SessionLocal()
+    try:
+        if session_ids is None:
+            query = select(DrivingSession.id).where(DrivingSession.ended_at.is_not(None))
+            if not recompute:
+                query = query.where(DrivingSession.analyzed_at.is_(None))
+            session_ids = db.execute(query.order_by(DrivingSession.id)).scalars().all()
+        session_ids = list(session_ids)
+        if not session_ids:
+            return 0
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers or None, initializer=_worker_init) as pool:
+            for session_id, stats in pool.map(_compute, session_ids, chunksize=8):
+                _store(db, session_id, stats)
+        db.commit()
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "Analysed %d sessions in %.2f s (%.1f ms each)",
+            len(session_ids), elapsed, elapsed * 1000.0 / len(session_ids),
+        )
+        return len(session_ids)
+    except Exception:
+        logger.exception("Batch analysis failed")
+        db.rollback()
+        return 0
+    finally:
+        db.close()
@@ -0,0 +1,228 @@
+"""
+export.py — Stream driving sessions out of the database for analysis.
+
+Readings are read in keyset-paginated chunks of EXPORT_CHUNK_ROWS (by
+session, then primary key) and written chunk by chunk, so memory use does
+not grow with session length.
+
+Formats:
+    parquet   typed columns, zstd-compressed  (needs pyarrow)
+    arrow     Arrow IPC file / Feather v2     (needs pyarrow)
+    csv.zst   zstd-compressed CSV             (needs zstandard)
+    csv.gz    gzip-compressed CSV
+    csv       plain CSV
+
+pyarrow and zstandard are optional and not in requirements.txt (install
+them with pip where the exports are analysed).  The default format is
+parquet when pyarrow is installed, csv.gz otherwise.
+
+Each export writes one file per table: <stem>.engine.<ext> and
+<stem>.gps.<ext>.
+"""
+import csv
+import gzip
+import io
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from sqlalchemy import DateTime, Float, Integer, select
+
+import config
+from . import EngineReading, GpsReading, SessionLocal
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _ARROW_AVAILABLE = True
+except ImportError:
+    _ARROW_AVAILABLE = False
+
+try:
+    import zstandard
+    _ZSTD_AVAILABLE = True
+except ImportError:
+    _ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("parquet", "arrow", "csv.zst", "csv.gz", "csv")
+DEFAULT_FORMAT = "parquet" if _ARROW_AVAILABLE else "csv.gz"
+
+_TABLES = {"engine": EngineReading, "gps": GpsReading}
+
+
+@dataclass
+class ExportResult:
+    files: list[Path] = field(default_factory=list)
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def _columns(model) -> list:
+    """Exported columns: everything except the surrogate key."""
+    return [c for c in model.__table__.columns if c.name != "id"]
+
+
+def iter_chunks(model, session_ids: Iterable[int], chunk_rows: int = config.EXPORT_CHUNK_ROWS,
+                db=None) -> Iterator[list[tuple]]:
+    """Yield rows of *model* for *session_ids* in chunks of at most *chunk_rows*.
+
+    Rows come in session, then insertion order, as tuples matching
+    _columns(model).  Pagination is by (session_id, id) so each query is
+    an index range scan, however deep into the table it starts.
+    """
+    table = model.__table__
+    columns = _columns(model)
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        for session_id in session_ids:
+            last_id = 0
+            while True:
+                rows = db.execute(
+                    select(table.c.id, *columns)
+                    .where(table.c.session_id == session_id, table.c.id > last_id)
+                    .order_by(table.c.id)
+                    .limit(chunk_rows)
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                yield [row[1:] for row in rows]
+                if len(rows) < chunk_rows:
+                    break
+    finally:
+        if own_session:
+            db.close()
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+def _utc(value: datetime | None) -> datetime | None:
+    # SQLite hands DateTime(timezone=True) back naive; the values are UTC
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class _CsvWriter:
+    def __init__(self, path: Path, columns: list, compression: str | None):
+        if compression == "zst":
+            if not _ZSTD_AVAILABLE:
+                raise RuntimeError("zstd CSV export needs the zstandard package")
+            self._raw = open(path, "wb")
+            binary = zstandard.ZstdCompressor(level=3).stream_writer(self._raw)
+        elif compression == "gz":
+            self._raw = None
+            binary = gzip.open(path, "wb", compresslevel=6)
+        else:
+            self._raw = None
+            binary = open(path, "wb")
+        self._text = io.TextIOWrapper(binary, encoding="utf-8", newline="")
+        self._writer = csv.writer(self._text)
+        self._writer.writerow([c.name for c in columns])
+        self._timestamps = [i for i, c in enumerate(columns) if isinstance(c.type, DateTime)]
+
+    def write(self, rows: list[tuple]) -> None:
+        if self._timestamps:
+            rows = [list(r) for r in rows]
+            for row in rows:
+                for i in self._timestamps:
+                    if row[i] is not None:
+                        row[i] = _utc(row[i]).isoformat()
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._text.close()
+        if self._raw is not None:
+            self._raw.close()
+
+
+def _arrow_type(column):
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    return pa.string()
+
+
+class _ArrowWriter:
+    def __init__(self, path: Path, columns: list, parquet: bool):
+        if not _ARROW_AVAILABLE:
+            raise RuntimeError("Parquet / Arrow export needs the pyarrow package")
+        self._schema = pa.schema(
+            [pa.field(c.name, _arrow_type(c), nullable=c.nullable) for c in columns]
+        )
+        if parquet:
+            self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_file(str(path), self._schema)
+
+    def write(self, rows: list[tuple]) -> None:
+        arrays = [
+            pa.array(values, type=f.type)
+            for values, f in zip(zip(*rows), self._schema)
+        ]
+        self._writer.write_batch(pa.record_batch(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def _open_writer(path: Path, columns: list, fmt: str):
+    if fmt == "parquet":
+        return _ArrowWriter(path, columns, parquet=True)
+    if fmt == "arrow":
+        return _ArrowWriter(path, columns, parquet=False)
+    return _CsvWriter(path, columns, fmt.partition(".")[2] or None)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def export_sessions(
+    session_ids: Iterable[int],
+    stem: Path,
+    fmt: str = DEFAULT_FORMAT,
+    chunk_rows: int = config.EXPORT_CHUNK_ROWS,
+) -> ExportResult:
+    """Write engine and GPS readings for *session_ids* to <stem>.{engine,gps}.<fmt>."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r} (choose from {', '.join(FORMATS)})")
+    session_ids = list(session_ids)
+    stem = Path(stem)
+    stem.parent.mkdir(parents=True, exist_ok=True)
+
+    result = ExportResult()
+    started = time.perf_counter()
+    for name, model in _TABLES.items():
+        path = stem.with_name(f"{stem.name}.{name}.{fmt}")
+        columns = _columns(model)
+        writer = _open_writer(path, columns, fmt)
+        try:
+            for chunk in iter_chunks(model, session_ids, chunk_rows):
+                writer.write(chunk)
+                result.rows += len(chunk)
+        finally:
+            writer.close()
+        result.files.append(path)
+    result.seconds = time.perf_counter() - started
+
+    logger.info(
+        "Exported %d rows from %d session(s) as %s in %.2f s (%.0f rows/s)",
+        result.rows, len(session_ids), fmt, result.seconds, result.rows_per_second,
+    )
+    return result
@@ -1,6 +1,8 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Text, UniqueConstraint,
+)
 from sqlalchemy.orm import DeclarativeBase, relationship
 
 
@@ -19,12 +21,33 @@ class DrivingSession(Base):
     started_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
     ended_at = Column(DateTime(timezone=True), nullable=True)
 
+    # Trip statistics, filled in by models.analytics when the session closes
+    analyzed_at = Column(DateTime(timezone=True), nullable=True)
+    distance_km = Column(Float, nullable=True)
+    moving_s = Column(Float, nullable=True)
+    idle_s = Column(Float, nullable=True)
+    avg_speed_kph = Column(Float, nullable=True)   # over moving time
+    max_speed_kph = Column(Float, nullable=True)
+    fuel_used_l = Column(Float, nullable=True)     # estimated from load and RPM
+    hard_accel_events = Column(Integer, nullable=True)
+    hard_brake_events = Column(Integer, nullable=True)
+    rpm_band_s = Column(Text, nullable=True)       # JSON: seconds per analytics.RPM_BANDS band
+
+    # NULL = full resolution; see models.retention for the later tiers
+    retention_tier = Column(Integer, nullable=True)
+
     engine_readings = relationship(
         "EngineReading", back_populates="session", cascade="all, delete-orphan"
     )
     gps_readings = relationship(
         "GpsReading", back_populates="session", cascade="all, delete-orphan"
     )
+    alert_events = relationship(
+        "AlertEvent", back_populates="session", cascade="all, delete-orphan"
+    )
+    link_markers = relationship(
+        "LinkMarker", back_populates="session", cascade="all, delete-orphan"
+    )
 
 
 class EngineReading(Base):
@@ -55,3 +78,58 @@ class GpsReading(Base):
     accuracy_m = Column(Float, nullable=True)
 
     session = relationship("DrivingSession", back_populates="gps_readings")
+
+
+class AlertEvent(Base):
+    """One episode of an alert rule holding (telemetry.alerts)."""
+
+    __tablename__ = "alert_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(Integer, ForeignKey("driving_sessions.id"), nullable=True, index=True)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    ended_at = Column(DateTime(timezone=True), nullable=False)
+
+    rule = Column(String(64), nullable=False)
+    severity = Column(String(16), nullable=False)
+    message = Column(Text, nullable=True)
+    value = Column(Float, nullable=True)           # most extreme value while active
+
+    session = relationship("DrivingSession", back_populates="alert_events")
+
+
+class LinkMarker(Base):
+    """A supervised link dropping (up=False) or returning (up=True) mid-session.
+
+    Readings between a down marker and the next up marker of the same link
+    are missing because the link was, not because nothing happened.
+    """
+
+    __tablename__ = "link_markers"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(Integer, ForeignKey("driving_sessions.id"), nullable=True, index=True)
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+
+    link = Column(String(16), nullable=False)      # obd, gps, bluetooth, camera
+    up = Column(Boolean, nullable=False)
+
+    session = relationship("DrivingSession", back_populates="link_markers")
+
+
+class ObdProfile(Base):
+    """How a given adapter last connected to a given vehicle (controllers.obd_profiles)."""
+
+    __tablename__ = "obd_profiles"
+    __table_args__ = (UniqueConstraint("adapter", "vin"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    adapter = Column(String(255), nullable=False)   # serial port the adapter answered on
+    vin = Column(String(17), nullable=True)         # NULL when the ECU does not report one
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow, index=True)
+
+    port = Column(String(255), nullable=False)
+    baudrate = Column(Integer, nullable=True)
+    protocol = Column(String(4), nullable=False)    # ELM327 protocol number, e.g. "6"
+    pids = Column(String(64), nullable=False)       # hex bitmap of supported mode 01 PIDs
+    connect_s = Column(Float, nullable=True)        # duration of the last connect
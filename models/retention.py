@@ -0,0 +1,414 @@
+"""
+retention.py — Keeps app.db inside a size budget.
+
+Sessions age through three tiers:
+
+    full         every reading                     (RETENTION_FULL_DAYS)
+    downsampled  one reading per RETENTION_DOWNSAMPLE_S per table
+                                                   (until RETENTION_DOWNSAMPLE_DAYS)
+    summary      readings deleted; the trip statistics on DrivingSession remain
+
+Readings logged with no session open (GPS in kiosk mode, mostly) go
+through the same tiers by their own timestamp: thinned once past
+RETENTION_FULL_DAYS, deleted past RETENTION_DOWNSAMPLE_DAYS.
+
+If the database is still over RETENTION_MAX_DB_MB, the oldest closed
+sessions, or the oldest day of sessionless readings if that is older, are
+reduced early.  Freed pages are returned to the filesystem with
+incremental vacuum; a database created before that mode existed is
+converted by one full VACUUM on the worker, never at startup.
+
+All deletes run on RetentionWorker's thread in batches of
+RETENTION_BATCH_ROWS, one short transaction each with a pause between, so
+the telemetry writer is never held off for long.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, text
+
+import config
+import metrics
+from . import DrivingSession, EngineReading, GpsReading, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# DrivingSession.retention_tier (NULL = full resolution)
+DOWNSAMPLED = 1
+SUMMARY = 2
+
+_TABLES = ("engine_readings", "gps_readings")
+_READINGS = (EngineReading, GpsReading)
+
+# Sessionless readings are read in id order in chunks of this many rows
+_SCAN_ROWS = 5000
+# Over budget, sessionless readings go a day at a time
+_BUDGET_STEP = timedelta(days=1)
+
+_DB_BYTES = metrics.gauge("via_db_size_bytes", "Database file size")
+_DOWNSAMPLED_ROWS = metrics.counter("via_retention_rows", "Rows removed by retention",
+                                    {"action": "downsample"})
+_SUMMARISED_ROWS = metrics.counter("via_retention_rows", "Rows removed by retention",
+                                   {"action": "summarise"})
+_SESSIONLESS_ROWS = metrics.counter("via_retention_rows", "Rows removed by retention",
+                                    {"action": "sessionless"})
+_RECLAIMED_BYTES = metrics.counter("via_retention_reclaimed_bytes", "Bytes returned by vacuum")
+
+
+@dataclass
+class RetentionReport:
+    downsampled_rows: int = 0
+    downsampled_sessions: int = 0
+    summarised_rows: int = 0
+    summarised_sessions: int = 0
+    sessionless_rows: int = 0
+    reclaimed_bytes: int = 0
+    size_bytes: int = 0
+    seconds: float = 0.0
+
+
+def _pragma(db, name: str) -> int:
+    return int(db.execute(text(f"PRAGMA {name}")).scalar() or 0)
+
+
+def database_size(db) -> tuple[int, int]:
+    """(file bytes, of which free-list bytes) for the open database."""
+    page_size = _pragma(db, "page_size")
+    return _pragma(db, "page_count") * page_size, _pragma(db, "freelist_count") * page_size
+
+
+def _stopped(stop: threading.Event | None) -> bool:
+    return stop is not None and stop.is_set()
+
+
+def _delete_in_batches(db, sql: str, params: dict, stop: threading.Event | None) -> int:
+    """Run a ``DELETE ... WHERE id IN (SELECT id ... LIMIT :batch)`` until it deletes nothing."""
+    params = {**params, "batch": config.RETENTION_BATCH_ROWS}
+    total = 0
+    while not _stopped(stop):
+        deleted = db.execute(text(sql), params).rowcount
+        db.commit()
+        total += deleted
+        if deleted < config.RETENTION_BATCH_ROWS:
+            break
+        time.sleep(config.RETENTION_BATCH_PAUSE_S)
+    return total
+
+
+def _downsample(db, session_id: int, stop: threading.Event | None) -> int:
+    removed = 0
+    for table in _TABLES:
+        removed += _delete_in_batches(
+            db,
+            f"""
+            DELETE FROM {table} WHERE id IN (
+                SELECT id FROM {table}
+                WHERE session_id = :sid AND id NOT IN (
+                    SELECT MIN(id) FROM {table} WHERE session_id = :sid
+                    GROUP BY CAST((julianday(timestamp) - 2440587.5) * 86400 / :bucket AS INTEGER)
+                )
+                LIMIT :batch
+            )
+            """,
+            {"sid": session_id, "bucket": config.RETENTION_DOWNSAMPLE_S},
+            stop,
+        )
+    return removed
+
+
+def _summarise(db, session_id: int, stop: threading.Event | None) -> int:
+    session = db.get(DrivingSession, session_id)
+    if session is not None and session.analyzed_at is None:
+        # Keep the statistics before the readings they come from go
+        from . import analytics
+        analytics.analyze_session(session_id)
+    removed = 0
+    for table in _TABLES:
+        removed += _delete_in_batches(
+            db,
+            f"DELETE FROM {table} WHERE id IN "
+            f"(SELECT id FROM {table} WHERE session_id = :sid LIMIT :batch)",
+            {"sid": session_id},
+            stop,
+        )
+    return removed
+
+
+def _set_tier(db, session_id: int, tier: int, stop: threading.Event | None) -> None:
+    if _stopped(stop):
+        return  # interrupted part-way; the next pass finishes the session
+    session = db.get(DrivingSession, session_id)
+    if session is not None:
+        session.retention_tier = tier
+        db.commit()
+
+
+def _incremental_vacuum(db, stop: threading.Event | None) -> int:
+    """Release free pages in steps of RETENTION_VACUUM_PAGES; returns bytes freed."""
+    if _pragma(db, "auto_vacuum") != 2:
+        return 0  # not converted yet: incremental_vacuum would free nothing
+    before, _ = database_size(db)
+    db.commit()
+    raw = db.connection().connection.driver_connection
+    while not _stopped(stop) and _pragma(db, "freelist_count"):
+        # The pragma frees one page per statement step; executescript()
+        # steps it to completion where execute() would stop after one page
+        raw.executescript(f"PRAGMA incremental_vacuum({config.RETENTION_VACUUM_PAGES})")
+        time.sleep(config.RETENTION_BATCH_PAUSE_S)
+    after, _ = database_size(db)
+    return max(0, before - after)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # SQLite hands DateTime(timezone=True) back naive; the values are UTC
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _delete_ids(db, model, ids: list[int], stop: threading.Event | None) -> int:
+    removed = 0
+    for start in range(0, len(ids), config.RETENTION_BATCH_ROWS):
+        if _stopped(stop):
+            break
+        chunk = ids[start:start + config.RETENTION_BATCH_ROWS]
+        removed += db.execute(delete(model).where(model.id.in_(chunk))).rowcount
+        db.commit()
+        time.sleep(config.RETENTION_BATCH_PAUSE_S)
+    return removed
+
+
+def _thin_sessionless(db, cutoff: datetime, thinned: dict[str, int],
+                      stop: threading.Event | None) -> int:
+    """Downsample sessionless readings older than *cutoff*.
+
+    There is no index on timestamp, so rows are walked in id order through
+    the session_id index, from ``thinned[table]`` (the last id already
+    thinned) up to the first row not yet past *cutoff*; the watermark is
+    advanced so later passes only read new rows.
+    """
+    cutoff = _naive_utc(cutoff)
+    removed = 0
+    for model in _READINGS:
+        after = thinned.get(model.__tablename__, 0)
+        bucket = None
+        while not _stopped(stop):
+            rows = db.execute(
+                select(model.id, model.timestamp)
+                .where(model.session_id.is_(None), model.id > after)
+                .order_by(model.id)
+                .limit(_SCAN_ROWS)
+            ).all()
+            doomed, done = [], False
+            for row_id, ts in rows:
+                if ts.replace(tzinfo=None) >= cutoff:
+                    done = True
+                    break
+                # Keep the first reading of each RETENTION_DOWNSAMPLE_S bucket
+                b = int(ts.replace(tzinfo=timezone.utc).timestamp() // config.RETENTION_DOWNSAMPLE_S)
+                if b == bucket:
+                    doomed.append(row_id)
+                bucket = b
+                after = row_id
+            removed += _delete_ids(db, model, doomed, stop)
+            if _stopped(stop):
+                return removed  # the watermark stays put; the next pass redoes the chunk
+            thinned[model.__tablename__] = after
+            if done or len(rows) < _SCAN_ROWS:
+                break
+    return removed
+
+
+def _delete_sessionless(db, cutoff: datetime, stop: threading.Event | None) -> int:
+    """Delete sessionless readings older than *cutoff*."""
+    removed = 0
+    for table in _TABLES:
+        removed += _delete_in_batches(
+            db,
+            f"DELETE FROM {table} WHERE id IN "
+            f"(SELECT id FROM {table} WHERE session_id IS NULL AND timestamp < :cutoff "
+            f"ORDER BY id LIMIT :batch)",
+            # The text form SQLAlchemy stores DateTime in on SQLite
+            {"cutoff": _naive_utc(cutoff).strftime("%Y-%m-%d %H:%M:%S.%f")},
+            stop,
+        )
+    return removed
+
+
+def _oldest_sessionless(db) -> datetime | None:
+    """Timestamp (naive UTC) of the oldest sessionless reading, by id."""
+    oldest = [
+        db.execute(
+            select(model.timestamp).where(model.session_id.is_(None)).order_by(model.id).limit(1)
+        ).scalar()
+        for model in _READINGS
+    ]
+    oldest = [ts.replace(tzinfo=None) for ts in oldest if ts is not None]
+    return min(oldest) if oldest else None
+
+
+def _convert_to_incremental(db, now: datetime) -> None:
+    """One full VACUUM to put a pre-existing database in incremental auto-vacuum mode.
+
+    It copies the whole file and holds the write lock until done, so it
+    waits for a pass with no session in progress (DbWriter commits fail
+    meanwhile and are replayed from the journal) and for room for the copy.
+    """
+    if _pragma(db, "auto_vacuum") == 2:
+        return
+    driving = db.execute(
+        select(DrivingSession.id)
+        .where(DrivingSession.ended_at.is_(None),
+               DrivingSession.started_at > now - timedelta(days=1))
+        .limit(1)
+    ).scalar()
+    if driving is not None:
+        logger.info("Incremental auto-vacuum conversion deferred: session %d is open", driving)
+        return
+    size, _ = database_size(db)
+    path = db.get_bind().url.database
+    # The copy goes to the temp directory and the rollback journal next to the file
+    for directory in {os.path.dirname(os.path.abspath(path)), tempfile.gettempdir()}:
+        free = shutil.disk_usage(directory).free
+        if free < size:
+            logger.warning("Incremental auto-vacuum conversion needs %.0f MiB free in %s, "
+                           "%.0f MiB available; skipped", size / 2**20, directory, free / 2**20)
+            return
+    logger.info("Converting %.0f MiB database to incremental auto-vacuum (one-off VACUUM)",
+                size / 2**20)
+    started = time.perf_counter()
+    db.commit()
+    raw = db.connection().connection.driver_connection
+    try:
+        # Set on this connection: the pending mode is what VACUUM applies
+        raw.executescript("PRAGMA auto_vacuum = INCREMENTAL; VACUUM")
+    except Exception:
+        logger.exception("Incremental auto-vacuum conversion failed; retrying next pass")
+        return
+    logger.info("Converted to incremental auto-vacuum in %.1f s", time.perf_counter() - started)
+
+
+def _below(tier: int):
+    column = DrivingSession.retention_tier
+    return column.is_(None) | (column < tier)
+
+
+def run_once(stop: threading.Event | None = None,
+             thinned: dict[str, int] | None = None) -> RetentionReport:
+    """Apply the retention policy once and return what it did.
+
+    *thinned* carries the sessionless-thinning watermarks between passes
+    (RetentionWorker keeps one); without it every sessionless row is read.
+    """
+    report = RetentionReport()
+    thinned = {} if thinned is None else thinned
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    full_cutoff = now - timedelta(days=config.RETENTION_FULL_DAYS)
+    summary_cutoff = now - timedelta(days=config.RETENTION_DOWNSAMPLE_DAYS)
+
+    db = SessionLocal()
+    try:
+        if db.get_bind().dialect.name == "sqlite":
+            _convert_to_incremental(db, now)
+
+        # Oldest first: past the downsample window → summary only
+        for session_id in db.execute(
+            select(DrivingSession.id)
+            .where(DrivingSession.started_at < summary_cutoff, _below(SUMMARY))
+            .order_by(DrivingSession.id)
+        ).scalars().all():
+            report.summarised_rows += _summarise(db, session_id, stop)
+            report.summarised_sessions += 1
+            _set_tier(db, session_id, SUMMARY, stop)
+
+        for session_id in db.execute(
+            select(DrivingSession.id)
+            .where(DrivingSession.started_at < full_cutoff,
+                   DrivingSession.ended_at.is_not(None),
+                   DrivingSession.retention_tier.is_(None))
+            .order_by(DrivingSession.id)
+        ).scalars().all():
+            report.downsampled_rows += _downsample(db, session_id, stop)
+            report.downsampled_sessions += 1
+            _set_tier(db, session_id, DOWNSAMPLED, stop)
+
+        # Readings logged with no session open, by their own timestamps
+        report.sessionless_rows += _delete_sessionless(db, summary_cutoff, stop)
+        report.sessionless_rows += _thin_sessionless(db, full_cutoff, thinned, stop)
+
+        # Over budget: reduce the oldest closed sessions, or the oldest
+        # sessionless readings if those are older, early
+        budget = config.RETENTION_MAX_DB_MB * 1024 * 1024
+        size, free = database_size(db)
+        while budget and size - free > budget and not _stopped(stop):
+            session = db.execute(
+                select(DrivingSession.id, DrivingSession.started_at)
+                .where(DrivingSession.ended_at.is_not(None), _below(SUMMARY))
+                .order_by(DrivingSession.id)
+                .limit(1)
+            ).first()
+            sessionless = _oldest_sessionless(db)
+            if session is None and sessionless is None:
+                logger.warning("Database %.0f MiB is over budget with nothing left to summarise",
+                               (size - free) / (1024 * 1024))
+                break
+            if session is None or (sessionless is not None
+                                   and sessionless < session.started_at.replace(tzinfo=None)):
+                report.sessionless_rows += _delete_sessionless(
+                    db, (sessionless + _BUDGET_STEP).replace(tzinfo=timezone.utc), stop)
+            else:
+                report.summarised_rows += _summarise(db, session.id, stop)
+                report.summarised_sessions += 1
+                _set_tier(db, session.id, SUMMARY, stop)
+            size, free = database_size(db)
+
+        report.reclaimed_bytes = _incremental_vacuum(db, stop)
+        report.size_bytes, _ = database_size(db)
+    except Exception:
+        logger.exception("Retention pass failed")
+        db.rollback()
+    finally:
+        db.close()
+
+    report.seconds = time.perf_counter() - started
+    _DOWNSAMPLED_ROWS.inc(report.downsampled_rows)
+    _SUMMARISED_ROWS.inc(report.summarised_rows)
+    _SESSIONLESS_ROWS.inc(report.sessionless_rows)
+    _RECLAIMED_BYTES.inc(report.reclaimed_bytes)
+    _DB_BYTES.set(report.size_bytes)
+    logger.info(
+        "Retention: downsampled %d rows in %d sessions, summarised %d rows in %d sessions, "
+        "removed %d sessionless rows, reclaimed %.1f MiB; database %.1f MiB (budget %d MiB) "
+        "in %.1f s",
+        report.downsampled_rows, report.downsampled_sessions,
+        report.summarised_rows, report.summarised_sessions, report.sessionless_rows,
+        report.reclaimed_bytes / (1024 * 1024), report.size_bytes / (1024 * 1024),
+        config.RETENTION_MAX_DB_MB, report.seconds,
+    )
+    return report
+
+
+class RetentionWorker(threading.Thread):
+    """Runs run_once() every RETENTION_INTERVAL_S, starting well after boot."""
+
+    def __init__(self):
+        super().__init__(name="retention", daemon=True)
+        self._stop_event = threading.Event()
+        # Sessionless rows already thinned, per table (last id)
+        self._thinned: dict[str, int] = {}
+
+    def run(self) -> None:
+        delay = config.RETENTION_START_DELAY_S
+        while not self._stop_event.wait(delay):
+            run_once(self._stop_event, self._thinned)
+            delay = config.RETENTION_INTERVAL_S
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
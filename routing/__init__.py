@@ -0,0 +1,14 @@
+from .graph import METRICS, RoadGraph
+from .guidance import Progress, RouteTracker
+from .router import Maneuver, NoRoute, Route, Router
+
+__all__ = [
+    "RoadGraph",
+    "METRICS",
+    "Router",
+    "Route",
+    "Maneuver",
+    "NoRoute",
+    "RouteTracker",
+    "Progress",
+]
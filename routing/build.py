@@ -0,0 +1,342 @@
+"""
+build.py — Turn an OSM extract into a road graph file (offline, once).
+
+Reads drivable ways from OSM XML (.osm, .osm.bz2, .osm.gz) with the
+standard library, or from .osm.pbf if pyosmium is installed.  Every way
+node becomes a graph node, so edges are straight and the route polyline
+is exact; oneway tags (and motorways / roundabouts) make edges one-way.
+Travel time uses the way's maxspeed, else a default per highway class.
+
+Only the largest strongly connected component is kept, so any snapped
+start can reach any snapped destination.  Landmarks are then chosen by
+farthest-point selection and their distance tables computed with plain
+Dijkstra, forward and on the reversed graph, for both metrics.
+"""
+import bz2
+import gzip
+import heapq
+import logging
+import math
+import random
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from pathlib import Path
+
+import config
+from routing.graph import GraphHeader, distance_m, write_graph
+
+try:
+    import osmium
+    _OSMIUM_AVAILABLE = True
+except ImportError:
+    _OSMIUM_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# km/h when a way has no usable maxspeed
+SPEEDS_KPH = {
+    "motorway": 110, "motorway_link": 60,
+    "trunk": 90, "trunk_link": 50,
+    "primary": 70, "primary_link": 40,
+    "secondary": 60, "secondary_link": 40,
+    "tertiary": 50, "tertiary_link": 30,
+    "unclassified": 40, "residential": 30, "living_street": 10,
+    "service": 20, "road": 30,
+}
+_NO_ACCESS = {"no", "private"}
+_ONEWAY_YES = {"yes", "true", "1"}
+_GRID_CELL_DEG = 0.005
+_COORD_SCALE = 1e7
+
+
+def _speed_kph(tags: dict) -> float:
+    value = tags.get("maxspeed", "")
+    try:
+        if value.endswith("mph"):
+            return float(value[:-3]) * 1.609344
+        return float(value)
+    except ValueError:
+        return SPEEDS_KPH[tags["highway"]]
+
+
+def _drivable(tags: dict) -> bool:
+    return (tags.get("highway") in SPEEDS_KPH
+            and tags.get("access") not in _NO_ACCESS
+            and tags.get("motor_vehicle") not in _NO_ACCESS
+            and tags.get("area") != "yes")
+
+
+def _direction(tags: dict) -> int:
+    """1 forward only, -1 backward only, 0 both ways."""
+    oneway = tags.get("oneway", "")
+    if oneway == "-1":
+        return -1
+    if oneway in _ONEWAY_YES:
+        return 1
+    if oneway == "no":
+        return 0
+    if tags["highway"] in ("motorway", "motorway_link") or tags.get("junction") == "roundabout":
+        return 1
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Reading OSM
+# ---------------------------------------------------------------------------
+
+class _Ways:
+    """Drivable ways as (node coordinates, name, speed, direction)."""
+
+    def __init__(self):
+        self.ways: list[tuple[list[tuple[float, float]], str, float, int]] = []
+
+    def add(self, coords: list[tuple[float, float]], tags: dict) -> None:
+        if len(coords) >= 2 and _drivable(tags):
+            self.ways.append((coords, tags.get("name") or tags.get("ref", ""),
+                              _speed_kph(tags), _direction(tags)))
+
+
+def _read_xml(path: Path) -> _Ways:
+    opener = {".bz2": bz2.open, ".gz": gzip.open}.get(path.suffix, open)
+    nodes: dict[int, tuple[float, float]] = {}
+    ways = _Ways()
+    with opener(path, "rb") as fh:
+        refs: list[int] = []
+        tags: dict[str, str] = {}
+        for event, elem in ET.iterparse(fh, events=("end",)):
+            if elem.tag == "node":
+                nodes[int(elem.get("id"))] = (float(elem.get("lat")), float(elem.get("lon")))
+                tags = {}  # a node's own tags
+                elem.clear()
+            elif elem.tag == "nd":
+                refs.append(int(elem.get("ref")))
+            elif elem.tag == "tag":
+                tags[elem.get("k")] = elem.get("v")
+            elif elem.tag == "way":
+                ways.add([nodes[r] for r in refs if r in nodes], tags)
+                refs, tags = [], {}
+                elem.clear()
+            elif elem.tag == "relation":
+                refs, tags = [], {}
+                elem.clear()
+    return ways
+
+
+def _read_pbf(path: Path) -> _Ways:
+    if not _OSMIUM_AVAILABLE:
+        raise RuntimeError(".osm.pbf input needs pyosmium; convert to .osm or install osmium")
+    ways = _Ways()
+
+    class Handler(osmium.SimpleHandler):
+        def way(self, w):
+            tags = {t.k: t.v for t in w.tags}
+            if _drivable(tags):
+                ways.add([(n.lat, n.lon) for n in w.nodes if n.location.valid()], tags)
+
+    Handler().apply_file(str(path), locations=True)
+    return ways
+
+
+# ---------------------------------------------------------------------------
+# Graph construction
+# ---------------------------------------------------------------------------
+
+def _csr(n: int, edges: list[tuple[int, int, float, float, int]]):
+    """Sort (from, to, length, time, name) edges into CSR arrays."""
+    edges.sort(key=lambda e: e[0])
+    start = array("i", [0]) * (n + 1)
+    for u, *_ in edges:
+        start[u + 1] += 1
+    for v in range(n):
+        start[v + 1] += start[v]
+    return (
+        start,
+        array("i", (e[1] for e in edges)),
+        array("f", (e[2] for e in edges)),
+        array("f", (e[3] for e in edges)),
+        array("i", (e[4] for e in edges)),
+    )
+
+
+def _largest_scc(n: int, adjacency: list[list[int]]) -> list[bool]:
+    """Membership of the largest strongly connected component (iterative Kosaraju)."""
+    reverse: list[list[int]] = [[] for _ in range(n)]
+    for u, targets in enumerate(adjacency):
+        for v in targets:
+            reverse[v].append(u)
+
+    order, seen = [], [False] * n
+    for root in range(n):
+        if seen[root]:
+            continue
+        seen[root] = True
+        stack = [(root, iter(adjacency[root]))]
+        while stack:
+            v, it = stack[-1]
+            for w in it:
+                if not seen[w]:
+                    seen[w] = True
+                    stack.append((w, iter(adjacency[w])))
+                    break
+            else:
+                stack.pop()
+                order.append(v)
+
+    component = [-1] * n
+    sizes = []
+    for root in reversed(order):
+        if component[root] >= 0:
+            continue
+        label = len(sizes)
+        component[root] = label
+        stack, size = [root], 0
+        while stack:
+            v = stack.pop()
+            size += 1
+            for w in reverse[v]:
+                if component[w] < 0:
+                    component[w] = label
+                    stack.append(w)
+        sizes.append(size)
+    largest = max(range(len(sizes)), key=sizes.__getitem__) if sizes else -1
+    return [c == largest for c in component]
+
+
+def _dijkstra(start, target, weight, source: int) -> array:
+    n = len(start) - 1
+    dist = array("d", [math.inf]) * n
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, v = heapq.heappop(heap)
+        if d > dist[v]:
+            continue
+        for e in range(start[v], start[v + 1]):
+            w = target[e]
+            nd = d + weight[e]
+            if nd < dist[w]:
+                dist[w] = nd
+                heapq.heappush(heap, (nd, w))
+    return array("f", dist)
+
+
+def _select_landmarks(count: int, forward, lengths) -> list[int]:
+    """Farthest-point landmarks: each new one as far as possible from the rest."""
+    start, target = forward
+    n = len(start) - 1
+    first = _dijkstra(start, target, lengths, random.Random(0).randrange(n))
+    chosen = [max(range(n), key=first.__getitem__)]
+    nearest = _dijkstra(start, target, lengths, chosen[0])
+    while len(chosen) < min(count, n):
+        candidate = max(range(n), key=nearest.__getitem__)
+        if nearest[candidate] == 0:
+            break
+        chosen.append(candidate)
+        d = _dijkstra(start, target, lengths, candidate)
+        for v in range(n):
+            if d[v] < nearest[v]:
+                nearest[v] = d[v]
+    return chosen
+
+
+def build_graph(source: Path, out: Path, landmarks: int = config.ROUTING_LANDMARKS) -> GraphHeader:
+    started = time.perf_counter()
+    ways = _read_pbf(source) if source.name.endswith(".pbf") else _read_xml(source)
+    logger.info("%d drivable ways read in %.1f s", len(ways.ways), time.perf_counter() - started)
+
+    # Nodes by coordinate (OSM ids are not kept), names interned
+    index: dict[tuple[float, float], int] = {}
+    coords: list[tuple[float, float]] = []
+    names: dict[str, int] = {}
+    raw_edges = []
+    for points, name, speed_kph, direction in ways.ways:
+        name_id = names.setdefault(name, len(names)) if name else -1
+        ids = []
+        for p in points:
+            if p not in index:
+                index[p] = len(coords)
+                coords.append(p)
+            ids.append(index[p])
+        for a, b in zip(ids, ids[1:]):
+            if a == b:
+                continue
+            length = distance_m(*coords[a], *coords[b])
+            seconds = length / (speed_kph / 3.6)
+            if direction >= 0:
+                raw_edges.append((a, b, length, seconds, name_id))
+            if direction <= 0:
+                raw_edges.append((b, a, length, seconds, name_id))
+
+    # Keep the largest strongly connected component, renumbered in grid order
+    adjacency: list[list[int]] = [[] for _ in coords]
+    for a, b, *_ in raw_edges:
+        adjacency[a].append(b)
+    keep = _largest_scc(len(coords), adjacency)
+    kept = [v for v in range(len(coords)) if keep[v]]
+    if not kept:
+        raise ValueError(f"no drivable roads in {source}")
+    lat0 = min(coords[v][0] for v in kept)
+    lon0 = min(coords[v][1] for v in kept)
+    rows = int((max(coords[v][0] for v in kept) - lat0) / _GRID_CELL_DEG) + 1
+    cols = int((max(coords[v][1] for v in kept) - lon0) / _GRID_CELL_DEG) + 1
+
+    def cell(v: int) -> int:
+        lat, lon = coords[v]
+        return int((lat - lat0) / _GRID_CELL_DEG) * cols + int((lon - lon0) / _GRID_CELL_DEG)
+
+    # Grid order also keeps neighbouring nodes close together in the file
+    kept.sort(key=cell)
+    renumber = {old: new for new, old in enumerate(kept)}
+    n = len(kept)
+    edges = [(renumber[a], renumber[b], length, seconds, name_id)
+             for a, b, length, seconds, name_id in raw_edges if keep[a] and keep[b]]
+    edge_start, edge_target, edge_length, edge_time, edge_name = _csr(n, edges)
+    reverse = _csr(n, [(b, a, length, seconds, name_id) for a, b, length, seconds, name_id in edges])
+
+    grid_start = array("i", [0]) * (rows * cols + 1)
+    for v in kept:
+        grid_start[cell(v) + 1] += 1
+    for c in range(rows * cols):
+        grid_start[c + 1] += grid_start[c]
+    grid_node = array("i", range(n))  # nodes are already in cell order
+    logger.info("Graph: %d nodes, %d edges (of %d nodes in the extract)",
+                n, len(edges), len(coords))
+
+    # Landmark tables
+    landmark_started = time.perf_counter()
+    chosen = _select_landmarks(landmarks, (edge_start, edge_target), edge_length)
+    tables = {}
+    for metric, forward_w, reverse_w in (
+        ("length", edge_length, reverse[2]),
+        ("time", edge_time, reverse[3]),
+    ):
+        from_table, to_table = array("f"), array("f")
+        for landmark in chosen:
+            from_table.extend(_dijkstra(edge_start, edge_target, forward_w, landmark))
+            to_table.extend(_dijkstra(reverse[0], reverse[1], reverse_w, landmark))
+        tables[f"lm_{metric}_from"], tables[f"lm_{metric}_to"] = from_table, to_table
+    logger.info("%d landmarks in %.1f s", len(chosen), time.perf_counter() - landmark_started)
+
+    name_list = sorted(names, key=names.get)
+    encoded = [s.encode("utf-8") for s in name_list]
+    name_start = array("i", [0])
+    for raw in encoded:
+        name_start.append(name_start[-1] + len(raw))
+
+    header = GraphHeader(
+        nodes=n, edges=len(edges), landmarks=len(chosen), names=len(name_list),
+        name_bytes=name_start[-1], grid_lat0=lat0, grid_lon0=lon0, cell_deg=_GRID_CELL_DEG,
+        grid_rows=rows, grid_cols=cols,
+    )
+    write_graph(out, header, {
+        "lat": array("i", (round(coords[v][0] * _COORD_SCALE) for v in kept)),
+        "lon": array("i", (round(coords[v][1] * _COORD_SCALE) for v in kept)),
+        "edge_start": edge_start, "edge_target": edge_target, "edge_length": edge_length,
+        "edge_time": edge_time, "edge_name": edge_name,
+        **tables,
+        "grid_start": grid_start, "grid_node": grid_node,
+        "name_start": name_start, "name_blob": array("B", b"".join(encoded)),
+    })
+    logger.info("Wrote %s in %.1f s", out, time.perf_counter() - started)
+    return header
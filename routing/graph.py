@@ -0,0 +1,204 @@
+"""
+graph.py — The road graph file: compact arrays, memory-mapped.
+
+tools/build_road_graph.py writes it once from an OSM extract; the
+dashboard maps it read-only and reads every array in place through a
+typed memoryview, so opening it costs nothing and the kernel pages in
+only the parts a search touches.
+
+Layout (little-endian), each section 8-byte aligned after the header:
+
+    header        MAGIC and the counts below, padded to 128 bytes
+    lat, lon      i32 × nodes     degrees × 1e7
+    edge_start    i32 × nodes+1   CSR: outgoing edges of v are
+                                  edge_start[v] .. edge_start[v+1]-1
+    edge_target   i32 × edges
+    edge_length   f32 × edges     metres
+    edge_time     f32 × edges     seconds at the way's speed
+    edge_name     i32 × edges     index into the name table, -1 for none
+    landmarks     f32 × landmarks×nodes, four tables: length from / to
+                  the landmark, time from / to the landmark (ALT)
+    grid_start    i32 × rows×cols+1  CSR: nodes per grid cell
+    grid_node     i32 × nodes
+    name_start    i32 × names+1   byte offsets into the UTF-8 name blob
+    name_blob     u8
+"""
+import math
+import mmap
+import struct
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+MAGIC = b"VIAROAD1"
+_HEADER = struct.Struct("<8s5I3d2I")
+_HEADER_SIZE = 128
+_COORD_SCALE = 1e7
+_EARTH_RADIUS_M = 6371008.8
+
+METRICS = ("length", "time")
+
+
+@dataclass(frozen=True)
+class GraphHeader:
+    nodes: int
+    edges: int
+    landmarks: int
+    names: int
+    name_bytes: int
+    grid_lat0: float
+    grid_lon0: float
+    cell_deg: float
+    grid_rows: int
+    grid_cols: int
+
+
+def _sections(h: GraphHeader) -> list[tuple[str, str, int]]:
+    """(name, array typecode, count) in file order."""
+    tables = h.landmarks * h.nodes
+    return [
+        ("lat", "i", h.nodes),
+        ("lon", "i", h.nodes),
+        ("edge_start", "i", h.nodes + 1),
+        ("edge_target", "i", h.edges),
+        ("edge_length", "f", h.edges),
+        ("edge_time", "f", h.edges),
+        ("edge_name", "i", h.edges),
+        ("lm_length_from", "f", tables),
+        ("lm_length_to", "f", tables),
+        ("lm_time_from", "f", tables),
+        ("lm_time_to", "f", tables),
+        ("grid_start", "i", h.grid_rows * h.grid_cols + 1),
+        ("grid_node", "i", h.nodes),
+        ("name_start", "i", h.names + 1),
+        ("name_blob", "B", h.name_bytes),
+    ]
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance (haversine)."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((p2 - p1) / 2) ** 2
+         + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * _EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bearing_deg(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Initial bearing from the first point to the second, 0–360° clockwise from north."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dlon = math.radians(lon2 - lon1)
+    y = math.sin(dlon) * math.cos(p2)
+    x = math.cos(p1) * math.sin(p2) - math.sin(p1) * math.cos(p2) * math.cos(dlon)
+    return math.degrees(math.atan2(y, x)) % 360.0
+
+
+def write_graph(path: Path, header: GraphHeader, arrays: dict[str, array]) -> None:
+    """Write *arrays* (one per section, by name) to *path* atomically."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(_HEADER.pack(
+            MAGIC, header.nodes, header.edges, header.landmarks, header.names,
+            header.name_bytes, header.grid_lat0, header.grid_lon0, header.cell_deg,
+            header.grid_rows, header.grid_cols,
+        ).ljust(_HEADER_SIZE, b"\0"))
+        for name, typecode, count in _sections(header):
+            data = arrays[name]
+            if data.typecode != typecode or len(data) != count:
+                raise ValueError(f"section {name}: expected {count} × {typecode!r}, "
+                                 f"got {len(data)} × {data.typecode!r}")
+            raw = data.tobytes()
+            fh.write(raw.ljust(_align(len(raw)), b"\0"))
+    tmp.replace(path)
+
+
+class RoadGraph:
+    """A road graph file, mapped read-only."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, *fields = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a road graph file")
+        self.header = h = GraphHeader(*fields)
+
+        buffer = memoryview(self._map)
+        offset = _HEADER_SIZE
+        views = {}
+        for name, typecode, count in _sections(h):
+            size = count * array(typecode).itemsize
+            views[name] = buffer[offset:offset + size].cast(typecode)
+            offset += _align(size)
+        if offset > len(self._map):
+            raise ValueError(f"{path} is truncated")
+        self._views = views
+
+        self.nodes, self.edges, self.landmarks = h.nodes, h.edges, h.landmarks
+        self.lat, self.lon = views["lat"], views["lon"]
+        self.edge_start, self.edge_target = views["edge_start"], views["edge_target"]
+        self.edge_name = views["edge_name"]
+        self.weights = {"length": views["edge_length"], "time": views["edge_time"]}
+        self.landmark_tables = {
+            metric: (views[f"lm_{metric}_from"], views[f"lm_{metric}_to"]) for metric in METRICS
+        }
+
+    def close(self) -> None:
+        for view in self._views.values():
+            view.release()
+        self._views = {}
+        self._map.close()
+
+    # ------------------------------------------------------------------
+    # Nodes and edges
+    # ------------------------------------------------------------------
+
+    def coords(self, node: int) -> tuple[float, float]:
+        return self.lat[node] / _COORD_SCALE, self.lon[node] / _COORD_SCALE
+
+    def name(self, edge: int) -> str:
+        index = self.edge_name[edge]
+        if index < 0:
+            return ""
+        start = self._views["name_start"]
+        return bytes(self._views["name_blob"][start[index]:start[index + 1]]).decode("utf-8")
+
+    def out_degree(self, node: int) -> int:
+        return self.edge_start[node + 1] - self.edge_start[node]
+
+    # ------------------------------------------------------------------
+    # Snapping
+    # ------------------------------------------------------------------
+
+    def nearest(self, lat: float, lon: float, max_m: float) -> int | None:
+        """The node closest to a position, if one is within *max_m*."""
+        h = self.header
+        grid_start, grid_node = self._views["grid_start"], self._views["grid_node"]
+        row = int((lat - h.grid_lat0) / h.cell_deg)
+        col = int((lon - h.grid_lon0) / h.cell_deg)
+        # Smallest extent of a cell, for the search radius
+        cell_m = h.cell_deg * math.pi / 180 * _EARTH_RADIUS_M * max(0.05, math.cos(math.radians(lat)))
+        best, best_m = None, max_m
+        ring = 0
+        while (ring - 1) * cell_m <= best_m:
+            for r in range(row - ring, row + ring + 1):
+                if not 0 <= r < h.grid_rows:
+                    continue
+                for c in range(col - ring, col + ring + 1):
+                    if not 0 <= c < h.grid_cols or max(abs(r - row), abs(c - col)) != ring:
+                        continue
+                    cell = r * h.grid_cols + c
+                    for i in range(grid_start[cell], grid_start[cell + 1]):
+                        node = grid_node[i]
+                        d = distance_m(lat, lon, *self.coords(node))
+                        if d <= best_m:
+                            best, best_m = node, d
+            ring += 1
+            if ring > max(h.grid_rows, h.grid_cols):
+                break
+        return best
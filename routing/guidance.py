@@ -0,0 +1,91 @@
+"""
+guidance.py — Follow a route with the live GPS stream.
+
+RouteTracker matches each fix to the route polyline near where the car
+was last, then reports the distance to the next maneuver and whether the
+car has left the route: more than ROUTING_OFF_ROUTE_M (plus the fix's
+own accuracy) away for ROUTING_OFF_ROUTE_FIXES fixes in a row.  One bad
+fix never triggers a re-route.
+"""
+import math
+from dataclasses import dataclass
+
+import config
+from routing.router import Maneuver, Route
+
+_M_PER_DEG = math.pi / 180 * 6371008.8
+# Route segments searched ahead of / behind the last match per fix
+_LOOKAHEAD = 60
+_LOOKBEHIND = 3
+# Within this of the destination the route is complete
+_ARRIVED_M = 25.0
+
+
+@dataclass(frozen=True)
+class Progress:
+    along_m: float              # distance travelled along the route
+    off_route_m: float          # distance from the route line
+    remaining_m: float
+    next_maneuver: Maneuver | None
+    to_maneuver_m: float
+    off_route: bool             # re-route now
+    arrived: bool
+
+
+def _project(lat: float, lon: float, a: tuple[float, float], b: tuple[float, float]
+             ) -> tuple[float, float]:
+    """(distance from the segment a–b in metres, fraction along it), on a local plane."""
+    kx = math.cos(math.radians(lat)) * _M_PER_DEG
+    ax, ay = (a[1] - lon) * kx, (a[0] - lat) * _M_PER_DEG
+    bx, by = (b[1] - lon) * kx, (b[0] - lat) * _M_PER_DEG
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    f = 0.0 if length2 == 0 else min(1.0, max(0.0, -(ax * dx + ay * dy) / length2))
+    px, py = ax + f * dx, ay + f * dy
+    return math.hypot(px, py), f
+
+
+class RouteTracker:
+    def __init__(self, route: Route):
+        self.route = route
+        self._segment = 0
+        self._misses = 0
+        self._maneuver = 0
+
+    def update(self, lat: float, lon: float, accuracy_m: float = 0.0) -> Progress:
+        route = self.route
+        points, cumulative = route.points, route.cumulative_m
+        best_d, best_i, best_f = math.inf, self._segment, 0.0
+        last = len(points) - 1
+        for i in range(max(0, self._segment - _LOOKBEHIND), min(last, self._segment + _LOOKAHEAD)):
+            d, f = _project(lat, lon, points[i], points[i + 1])
+            if d < best_d:
+                best_d, best_i, best_f = d, i, f
+
+        if last == 0:
+            best_d = _project(lat, lon, points[0], points[0])[0]
+            along = 0.0
+        else:
+            along = cumulative[best_i] + best_f * (cumulative[best_i + 1] - cumulative[best_i])
+
+        if best_d > config.ROUTING_OFF_ROUTE_M + accuracy_m:
+            self._misses += 1
+        else:
+            self._misses = 0
+            self._segment = best_i
+
+        maneuvers = route.maneuvers
+        while self._maneuver < len(maneuvers) - 1 and maneuvers[self._maneuver].distance_m <= along:
+            self._maneuver += 1
+        upcoming = maneuvers[self._maneuver] if maneuvers else None
+
+        remaining = max(0.0, route.length_m - along)
+        return Progress(
+            along_m=along,
+            off_route_m=best_d,
+            remaining_m=remaining,
+            next_maneuver=upcoming,
+            to_maneuver_m=max(0.0, upcoming.distance_m - along) if upcoming else remaining,
+            off_route=self._misses >= config.ROUTING_OFF_ROUTE_FIXES,
+            arrived=remaining <= _ARRIVED_M and best_d <= config.ROUTING_OFF_ROUTE_M + accuracy_m,
+        )
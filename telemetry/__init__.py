@@ -0,0 +1,13 @@
+from .bus import Consumer, Subscription, TelemetryBus
+from .samples import Alert, EngineSample, GpsSample, LinkEvent, SessionEvent
+
+__all__ = [
+    "TelemetryBus",
+    "Subscription",
+    "Consumer",
+    "EngineSample",
+    "GpsSample",
+    "SessionEvent",
+    "Alert",
+    "LinkEvent",
+]
@@ -0,0 +1,316 @@
+"""
+alerts.py — Rule-based alerts evaluated on the live telemetry stream.
+
+Each rule is a condition on one signal, optional ``when`` conditions that
+gate it, and a hold time the condition must last before the alert is
+raised (and be false for before it clears):
+
+    {"name": "coolant_overtemp", "signal": "coolant_temp_c", "stat": "value",
+     "op": ">", "threshold": 100, "hold_s": 60, "severity": "critical",
+     "message": "Coolant above 100 °C for a minute"}
+
+Signals are the EngineSample / GpsSample fields plus ``gps_fix_age_s``
+(seconds since the last fix, evaluated on engine samples).  Stats:
+
+    value    the sample itself
+    mean     rolling mean over window_s
+    stddev   rolling standard deviation over window_s
+    rate     change per second across window_s
+
+Windows are kept incrementally: every sample is added once and removed
+once as it ages out, and the mean and variance are updated in place
+(Welford), so a rule costs the same per sample whatever its window.
+
+Rules come from config.ALERT_RULES.  Alerts are published on the bus as
+Alert samples when raised and when cleared; DbWriter stores one row per
+episode with its session, written when raised and closed when cleared.
+Episodes still active when the engine stops are cleared at the last
+sample seen.
+"""
+import heapq
+import logging
+import math
+import operator
+from collections import deque
+from dataclasses import dataclass, field
+
+import config
+import metrics
+from telemetry.bus import Consumer, TelemetryBus
+from telemetry.samples import Alert, EngineSample, GpsSample, SessionEvent
+
+logger = logging.getLogger(__name__)
+
+STATS = ("value", "mean", "stddev", "rate")
+
+_OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+_ENGINE_SIGNALS = ("rpm", "speed_kph", "coolant_temp_c", "throttle_pct", "engine_load_pct",
+                   "gps_fix_age_s")
+_GPS_SIGNALS = ("latitude", "longitude", "accuracy_m")
+
+_EVAL_SECONDS = metrics.histogram("via_alert_eval_seconds", "Alert evaluation per drained batch")
+
+
+class RollingWindow:
+    """Samples of one signal from the last *window_s* seconds.
+
+    add() is amortised O(1): each sample is pushed once and popped once.
+    """
+
+    def __init__(self, window_s: float):
+        self.window_s = window_s
+        self._samples: deque[tuple[float, float]] = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, t: float, x: float) -> None:
+        while self._samples and self._samples[0][0] <= t - self.window_s:
+            _, old = self._samples.popleft()
+            n = len(self._samples)
+            if n == 0:
+                self._mean = self._m2 = 0.0
+            else:
+                delta = old - self._mean
+                self._mean -= delta / n
+                self._m2 = max(0.0, self._m2 - delta * (old - self._mean))
+        self._samples.append((t, x))
+        delta = x - self._mean
+        self._mean += delta / len(self._samples)
+        self._m2 += delta * (x - self._mean)
+
+    @property
+    def full(self) -> bool:
+        """Whether the samples span most of the window (stats are meaningful)."""
+        s = self._samples
+        return len(s) >= 2 and s[-1][0] - s[0][0] >= 0.8 * self.window_s
+
+    def stat(self, name: str) -> float:
+        if name == "mean":
+            return self._mean
+        if name == "stddev":
+            n = len(self._samples)
+            return math.sqrt(self._m2 / (n - 1)) if n > 1 else 0.0
+        # rate
+        (t0, x0), (t1, x1) = self._samples[0], self._samples[-1]
+        return (x1 - x0) / (t1 - t0) if t1 > t0 else 0.0
+
+
+@dataclass
+class _Condition:
+    signal: str
+    stat: str
+    op: str
+    threshold: float
+    window_s: float
+    window: RollingWindow | None = None
+    last: float | None = None
+
+    def holds(self) -> bool:
+        if self.last is None:
+            return False
+        if self.window is None:
+            value = self.last
+        elif not self.window.full:
+            return False
+        else:
+            value = self.window.stat(self.stat)
+        return _OPS[self.op](value, self.threshold)
+
+    def value(self) -> float | None:
+        if self.window is None or not self.window.full:
+            return self.last
+        return self.window.stat(self.stat)
+
+
+@dataclass
+class Rule:
+    name: str
+    condition: _Condition
+    when: list[_Condition] = field(default_factory=list)
+    hold_s: float = 0.0
+    clear_s: float = 5.0
+    severity: str = "warning"
+    message: str = ""
+
+    # State
+    pending_since: float | None = None
+    clearing_since: float | None = None
+    raised_at: float | None = None
+    session_id: int | None = None
+    peak: float | None = None
+
+    @property
+    def signals(self) -> set[str]:
+        return {self.condition.signal, *(c.signal for c in self.when)}
+
+
+def _condition(spec: dict, windows: dict[tuple[str, float], RollingWindow]) -> _Condition:
+    stat = spec.get("stat", "value")
+    op = spec.get("op", ">")
+    if stat not in STATS:
+        raise ValueError(f"unknown stat {stat!r} (choose from {', '.join(STATS)})")
+    if op not in _OPS:
+        raise ValueError(f"unknown operator {op!r}")
+    signal = spec["signal"]
+    if signal not in _ENGINE_SIGNALS + _GPS_SIGNALS:
+        raise ValueError(f"unknown signal {signal!r}")
+    window_s = float(spec.get("window_s", 0.0))
+    if stat != "value" and window_s <= 0:
+        raise ValueError(f"stat {stat!r} needs a window_s")
+    condition = _Condition(signal, stat, op, float(spec["threshold"]), window_s)
+    if stat != "value":
+        # Conditions on the same signal and window share one window
+        key = (signal, window_s)
+        condition.window = windows.get(key) or windows.setdefault(key, RollingWindow(window_s))
+    return condition
+
+
+def load_rules(specs: list[dict]) -> list[Rule]:
+    """Build rules from config dicts; a malformed rule is logged and skipped."""
+    windows: dict[tuple[str, float], RollingWindow] = {}
+    rules = []
+    for spec in specs:
+        try:
+            rules.append(Rule(
+                name=spec["name"],
+                condition=_condition(spec, windows),
+                when=[_condition(w, windows) for w in spec.get("when", ())],
+                hold_s=float(spec.get("hold_s", 0.0)),
+                clear_s=float(spec.get("clear_s", 5.0)),
+                severity=spec.get("severity", "warning"),
+                message=spec.get("message", ""),
+            ))
+        except (KeyError, TypeError, ValueError) as exc:
+            logger.error("Ignoring alert rule %r: %s", spec.get("name", spec), exc)
+    return rules
+
+
+class AlertEngine(Consumer):
+    """Evaluates the configured rules on every engine and GPS sample.
+
+    Samples from one drain are merged back into time order, so rules that
+    combine engine and GPS signals see them as they happened.
+    """
+
+    def __init__(self, bus: TelemetryBus, rules: list[Rule] | None = None,
+                 interval_s: float = config.ALERT_EVAL_S):
+        super().__init__(bus, "alerts", (SessionEvent, EngineSample, GpsSample), interval_s)
+        self._bus = bus
+        self.rules = load_rules(config.ALERT_RULES) if rules is None else rules
+        self._conditions: dict[str, list[_Condition]] = {}
+        self._windows: dict[str, list[RollingWindow]] = {}
+        self._rules_by_signal: dict[str, list[Rule]] = {}
+        for rule in self.rules:
+            for c in (rule.condition, *rule.when):
+                self._conditions.setdefault(c.signal, []).append(c)
+                windows = self._windows.setdefault(c.signal, [])
+                if c.window is not None and not any(w is c.window for w in windows):
+                    windows.append(c.window)
+            for signal in rule.signals:
+                self._rules_by_signal.setdefault(signal, []).append(rule)
+        self._pending: list[list] = []
+        self._last_fix_ts: float | None = None
+        self._last_ts: float | None = None
+        self._raised = {
+            rule.name: metrics.counter("via_alerts", "Alerts raised", {"rule": rule.name})
+            for rule in self.rules
+        }
+
+    def handle(self, topic: type, batch: list) -> None:
+        self._pending.append(batch)
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        super().stop(timeout)
+        # Stop before DbWriter, which stores these on its final drain
+        for rule in self.rules:
+            if rule.raised_at is not None:
+                logger.info("Alert %s still active at shutdown", rule.name)
+                self._publish(rule, self._last_ts or rule.raised_at, active=False)
+                rule.raised_at = rule.pending_since = rule.clearing_since = None
+
+    def flush(self) -> None:
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        with _EVAL_SECONDS.time():
+            for sample in heapq.merge(*pending, key=lambda s: s.timestamp):
+                self._last_ts = sample.timestamp
+                if isinstance(sample, EngineSample):
+                    fix_age = None if self._last_fix_ts is None else sample.timestamp - self._last_fix_ts
+                    self._observe(sample, _ENGINE_SIGNALS, gps_fix_age_s=fix_age)
+                elif isinstance(sample, GpsSample):
+                    self._last_fix_ts = sample.timestamp
+                    self._observe(sample, _GPS_SIGNALS)
+                elif sample.kind == SessionEvent.CLOSE:
+                    self._clear_session(sample.session_id, sample.timestamp)
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def _observe(self, sample, signals: tuple[str, ...], **derived) -> None:
+        t = sample.timestamp
+        touched: dict[int, Rule] = {}
+        for signal in signals:
+            x = derived[signal] if signal in derived else getattr(sample, signal)
+            if x is None:
+                continue
+            for window in self._windows.get(signal, ()):
+                window.add(t, x)
+            for condition in self._conditions.get(signal, ()):
+                condition.last = x
+            for rule in self._rules_by_signal.get(signal, ()):
+                touched[id(rule)] = rule
+        for rule in touched.values():
+            self._evaluate(rule, t, sample.session_id)
+
+    def _evaluate(self, rule: Rule, t: float, session_id: int | None) -> None:
+        active = rule.condition.holds() and all(c.holds() for c in rule.when)
+        if rule.raised_at is None:
+            if not active:
+                rule.pending_since = None
+                return
+            if rule.pending_since is None:
+                rule.pending_since = t
+            if t - rule.pending_since >= rule.hold_s:
+                rule.raised_at, rule.session_id = rule.pending_since, session_id
+                rule.peak = rule.condition.value()
+                rule.clearing_since = None
+                self._raised[rule.name].inc()
+                logger.warning("Alert %s: %s (%s = %.4g)", rule.name, rule.message,
+                               rule.condition.signal, rule.peak)
+                self._publish(rule, t, active=True)
+            return
+
+        if active:
+            rule.clearing_since = None
+            value = rule.condition.value()
+            if value is not None and rule.peak is not None and _OPS[rule.condition.op](value, rule.peak):
+                rule.peak = value
+        elif rule.clearing_since is None:
+            rule.clearing_since = t
+        elif t - rule.clearing_since >= rule.clear_s:
+            self._clear(rule, rule.clearing_since)
+
+    def _clear(self, rule: Rule, t: float) -> None:
+        logger.info("Alert %s cleared after %.0f s", rule.name, t - rule.raised_at)
+        self._publish(rule, t, active=False)
+        rule.raised_at = rule.pending_since = rule.clearing_since = None
+
+    def _clear_session(self, session_id: int, t: float) -> None:
+        for rule in self.rules:
+            rule.pending_since = None
+            if rule.raised_at is not None and rule.session_id == session_id:
+                self._clear(rule, t)
+
+    def _publish(self, rule: Rule, t: float, active: bool) -> None:
+        self._bus.publish(Alert(
+            timestamp=t,
+            session_id=rule.session_id,
+            rule=rule.name,
+            severity=rule.severity,
+            message=rule.message,
+            started_at=rule.raised_at,
+            value=rule.peak,
+            active=active,
+        ))
@@ -0,0 +1,249 @@
+import abc
+import logging
+import threading
+from typing import Callable
+
+import config
+import metrics
+from telemetry.samples import SessionEvent
+
+logger = logging.getLogger(__name__)
+
+
+class _Ring:
+    """Fixed-capacity ring of published samples addressed by sequence number.
+
+    Writers take a short lock to claim a slot; readers never lock.  A reader
+    that falls more than ``capacity`` samples behind loses the overwritten
+    ones and is told how many.
+    """
+
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._slots: list = [None] * capacity
+        self._head = 0  # sequence number of the next write
+        self._lock = threading.Lock()
+
+    @property
+    def head(self) -> int:
+        return self._head
+
+    def append(self, item) -> None:
+        with self._lock:
+            self._slots[self._head % self._capacity] = item
+            self._head += 1
+
+    def read(self, cursor: int, limit: int) -> tuple[list, int, int]:
+        """Return (items, new cursor, dropped) for up to *limit* items after *cursor*."""
+        head = self._head
+        oldest = max(0, head - self._capacity)
+        dropped = max(0, oldest - cursor)
+        cursor = max(cursor, oldest)
+        count = min(head - cursor, limit)
+        items = [self._slots[(cursor + i) % self._capacity] for i in range(count)]
+
+        # Slots a writer lapped while we were copying are not trustworthy
+        lapped = self._head - self._capacity - cursor
+        if lapped > 0:
+            lapped = min(lapped, count)
+            items = items[lapped:]
+            dropped += lapped
+            cursor += lapped
+        return items, cursor + len(items), dropped
+
+
+class Subscription:
+    """One consumer's cursor into a topic, with lag and drop accounting."""
+
+    def __init__(self, bus: "TelemetryBus", topic: type, name: str, ring: _Ring,
+                 notify: Callable[[object], None] | None):
+        self.topic = topic
+        self.name = name
+        self._bus = bus
+        self._ring = ring
+        self._cursor = ring.head
+        self._notify = notify
+        self._wake = threading.Event()
+        self.delivered = 0
+        self.dropped = 0
+        # (name, labels, gauge) registered for this subscription
+        self._gauges: list[tuple[str, dict[str, str], metrics.Gauge]] = []
+
+    @property
+    def lag(self) -> int:
+        """Samples published but not yet read by this subscriber."""
+        return self._ring.head - self._cursor
+
+    def poll(self, limit: int = 1 << 30) -> list:
+        """Return every sample published since the last poll (oldest first)."""
+        self._wake.clear()
+        items, self._cursor, dropped = self._ring.read(self._cursor, limit)
+        if dropped:
+            self.dropped += dropped
+            logger.warning("Telemetry subscriber %s dropped %d %s samples",
+                           self.name, dropped, self.topic.__name__)
+        self.delivered += len(items)
+        return items
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until something is published (or *timeout* elapses)."""
+        return self._wake.wait(timeout)
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+
+    def _published(self, sample) -> None:
+        if self._notify is None:
+            self._wake.set()
+            return
+        # Push subscribers are always caught up
+        self._notify(sample)
+        self._cursor = self._ring.head
+        self.delivered += 1
+
+
+class TelemetryBus:
+    """Typed, thread-safe publish/subscribe hub for live telemetry.
+
+    Each sample type (see telemetry.samples) is a topic backed by its own
+    ring.  publish() costs one slot write plus waking subscribers; it never
+    waits for a consumer, so acquisition threads cannot be stalled by a slow
+    DB writer or UI.  Consumers read at their own pace with
+    Subscription.poll() and see lag/drop counters when they fall behind.
+
+    The bus also carries the active DrivingSession id so producers can stamp
+    samples without being wired to whoever opens sessions.
+    """
+
+    def __init__(self, capacity: int = config.TELEMETRY_RING_SIZE):
+        self._capacity = capacity
+        self._rings: dict[type, _Ring] = {}
+        self._subscribers: dict[type, tuple[Subscription, ...]] = {}
+        self._lock = threading.Lock()
+        self._session_id: int | None = None
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+
+    @property
+    def session_id(self) -> int | None:
+        return self._session_id
+
+    def set_session(self, session_id: int | None, timestamp: float) -> None:
+        """Switch the active session and publish the matching SessionEvent."""
+        previous, self._session_id = self._session_id, session_id
+        if previous is not None:
+            self.publish(SessionEvent(timestamp, previous, SessionEvent.CLOSE))
+        if session_id is not None:
+            self.publish(SessionEvent(timestamp, session_id, SessionEvent.OPEN))
+
+    # ------------------------------------------------------------------
+    # Publish / subscribe
+    # ------------------------------------------------------------------
+
+    def publish(self, sample) -> None:
+        topic = type(sample)
+        ring = self._rings.get(topic) or self._ring_for(topic)
+        ring.append(sample)
+        for subscription in self._subscribers.get(topic, ()):
+            try:
+                subscription._published(sample)
+            except Exception:
+                logger.exception("Telemetry notify failed for %s", subscription.name)
+
+    def subscribe(self, topic: type, name: str,
+                  notify: Callable[[object], None] | None = None) -> Subscription:
+        """Start receiving *topic* samples published from now on.
+
+        *notify*, if given, is called on the publishing thread for every
+        sample and must be O(1) and non-blocking (e.g. hand the value to a
+        SnapshotModel).  Everything else should poll().
+        """
+        subscription = Subscription(self, topic, name, self._ring_for(topic), notify)
+        with self._lock:
+            self._subscribers[topic] = self._subscribers.get(topic, ()) + (subscription,)
+        labels = {"subscriber": name}
+        for metric, help_text, fn in (
+            ("via_telemetry_lag", "Samples waiting for a subscriber", lambda: subscription.lag),
+            ("via_telemetry_dropped", "Samples a subscriber lost to overrun",
+             lambda: subscription.dropped),
+        ):
+            # A new subscriber under an old name (a restarted consumer) takes its gauges over
+            metrics.remove(metric, labels)
+            gauge = metrics.gauge(metric, help_text, labels, fn=fn)
+            subscription._gauges.append((metric, labels, gauge))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(subscription.topic, ())
+            self._subscribers[subscription.topic] = tuple(s for s in subs if s is not subscription)
+        # The gauges would keep the subscription alive and report it forever
+        gauges, subscription._gauges = subscription._gauges, []
+        for metric, labels, gauge in gauges:
+            metrics.remove(metric, labels, gauge)
+
+    def stats(self) -> dict[str, dict]:
+        """Per-subscriber counters, keyed by subscriber name."""
+        return {
+            s.name: {
+                "topic": s.topic.__name__,
+                "lag": s.lag,
+                "dropped": s.dropped,
+                "delivered": s.delivered,
+            }
+            for subs in list(self._subscribers.values())
+            for s in subs
+        }
+
+    def _ring_for(self, topic: type) -> _Ring:
+        with self._lock:
+            ring = self._rings.get(topic)
+            if ring is None:
+                ring = self._rings[topic] = _Ring(self._capacity)
+            return ring
+
+
+class Consumer(threading.Thread, abc.ABC):
+    """Background subscriber that drains its topics every *interval_s*.
+
+    Subclasses implement handle(); flush() runs after each drain and once
+    more on stop().
+    """
+
+    def __init__(self, bus: TelemetryBus, name: str, topics: tuple[type, ...],
+                 interval_s: float):
+        super().__init__(name=name, daemon=True)
+        self._interval_s = interval_s
+        self._subscriptions = [bus.subscribe(t, f"{name}.{t.__name__}") for t in topics]
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self._interval_s):
+            self._drain()
+        self._drain()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        for subscription in self._subscriptions:
+            subscription.close()
+
+    def _drain(self) -> None:
+        try:
+            for subscription in self._subscriptions:
+                batch = subscription.poll()
+                if batch:
+                    self.handle(subscription.topic, batch)
+            self.flush()
+        except Exception:
+            logger.exception("Telemetry consumer %s failed", self.name)
+
+    @abc.abstractmethod
+    def handle(self, topic: type, batch: list) -> None:
+        """Take one polled *batch* of *topic* samples, oldest first."""
+
+    def flush(self) -> None:
+        pass
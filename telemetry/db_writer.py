@@ -0,0 +1,214 @@
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select, update
+
+import config
+import metrics
+from models import AlertEvent, EngineReading, GpsReading, LinkMarker, SessionLocal
+from telemetry.bus import Consumer, TelemetryBus
+from telemetry.journal import Journal
+from telemetry.samples import Alert, EngineSample, GpsSample, LinkEvent, SessionEvent
+
+logger = logging.getLogger(__name__)
+
+_COMMIT_SECONDS = metrics.histogram("via_db_commit_seconds", "Telemetry batch insert + commit")
+_ENGINE_ROWS = metrics.counter("via_db_rows", "Rows written", {"table": "engine_readings"})
+_GPS_ROWS = metrics.counter("via_db_rows", "Rows written", {"table": "gps_readings"})
+
+# Consecutive failed commits a batch is kept for before it is left to replay
+_WRITE_ATTEMPTS = 5
+
+
+def _utc(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def write_alerts(db, alerts: list[Alert]) -> None:
+    """Store alert episodes; the caller commits.
+
+    A raised alert inserts its AlertEvent row at once, ending when it was
+    raised, so an episode still active at a crash or power cut is kept.
+    The clear moves ended_at (and the peak value) on.  Rows are matched on
+    rule and start time, so a replayed alert never stores an episode twice.
+    """
+    for a in alerts:
+        episode = (AlertEvent.rule == a.rule) & (AlertEvent.started_at == _utc(a.started_at))
+        if a.active:
+            if db.execute(select(AlertEvent.id).where(episode).limit(1)).scalar() is not None:
+                continue
+        elif db.execute(
+            update(AlertEvent).where(episode)
+            .values(ended_at=_utc(a.timestamp), value=a.value)
+            .execution_options(synchronize_session=False)
+        ).rowcount:
+            continue
+        db.execute(insert(AlertEvent), [{
+            "session_id": a.session_id,
+            "started_at": _utc(a.started_at),
+            "ended_at": _utc(a.timestamp),
+            "rule": a.rule,
+            "severity": a.severity,
+            "message": a.message,
+            "value": a.value,
+        }])
+
+
+class DbWriter(Consumer):
+    """Persists telemetry from the bus in batched transactions.
+
+    Engine samples are downsampled to one row per OBD_LOG_INTERVAL_S; every
+    GPS fix is kept, each alert episode becomes one AlertEvent row (written
+    when raised, closed when cleared; see write_alerts) and each LinkEvent
+    a LinkMarker.
+    Rows collected during one drain are inserted with a
+    single commit, on this thread only, so acquisition never waits on
+    SQLite.  Once a session's last rows are committed its trip statistics
+    are computed (models.analytics).
+
+    A failed commit keeps its rows for the next drain (up to
+    _WRITE_ATTEMPTS tries).  With a *journal*, each drain that commits
+    cleanly checkpoints it, so a crash replays only what never reached the
+    database; a failed one leaves the checkpoint where it was.  Once rows
+    are lost for good this run, to a ring overrun or a batch given up on,
+    the checkpoint stops moving: the journal keeps them for replay at the
+    next start.
+    """
+
+    def __init__(self, bus: TelemetryBus, interval_s: float = config.TELEMETRY_DB_FLUSH_S,
+                 journal: Journal | None = None):
+        # SessionEvent is drained first: by the time a CLOSE is seen, every
+        # sample published before it is already waiting in the other rings
+        super().__init__(
+            bus, "db-writer", (SessionEvent, EngineSample, GpsSample, Alert, LinkEvent), interval_s
+        )
+        self._engine_rows: list[dict] = []
+        self._gps_rows: list[dict] = []
+        self._alerts: list[Alert] = []
+        self._link_rows: list[dict] = []
+        self._closed_sessions: list[int] = []
+        self._last_engine_ts = float("-inf")
+        self._journal = journal
+        self._persisted = False
+        self._failed_writes = 0
+
+    def _drain(self) -> None:
+        # Everything journaled before this mark is already in the rings
+        # (the bus appends to the ring before notifying the journal)
+        mark = self._journal.position() if self._journal is not None else None
+        dropped = self._dropped()
+        self._persisted = False
+        super()._drain()
+        if self._dropped() > dropped:
+            self._lost("fell behind and lost %d samples to ring overrun"
+                       % (self._dropped() - dropped))
+        if mark is not None and self._journal is not None and self._persisted:
+            self._journal.checkpoint(mark)
+
+    def _dropped(self) -> int:
+        return sum(subscription.dropped for subscription in self._subscriptions)
+
+    def _lost(self, what: str) -> None:
+        """Rows this run will never write: freeze the checkpoint before them."""
+        if self._journal is None:
+            logger.error("DB writer %s", what)
+            return
+        logger.error("DB writer %s; journal checkpoints stop so they are replayed at next start",
+                     what)
+        self._journal = None
+
+    def handle(self, topic: type, batch: list) -> None:
+        if topic is SessionEvent:
+            self._closed_sessions.extend(
+                e.session_id for e in batch
+                if e.kind == SessionEvent.CLOSE and e.session_id is not None
+            )
+        elif topic is EngineSample:
+            for s in batch:
+                if s.timestamp - self._last_engine_ts < config.OBD_LOG_INTERVAL_S:
+                    continue
+                self._last_engine_ts = s.timestamp
+                self._engine_rows.append({
+                    "session_id": s.session_id,
+                    "timestamp": _utc(s.timestamp),
+                    "rpm": s.rpm,
+                    "speed_kph": s.speed_kph,
+                    "coolant_temp_c": s.coolant_temp_c,
+                    "throttle_pct": s.throttle_pct,
+                    "engine_load_pct": s.engine_load_pct,
+                })
+        elif topic is GpsSample:
+            self._gps_rows.extend({
+                "session_id": s.session_id,
+                "timestamp": _utc(s.timestamp),
+                "latitude": s.latitude,
+                "longitude": s.longitude,
+                "accuracy_m": s.accuracy_m,
+            } for s in batch)
+        elif topic is Alert:
+            self._alerts.extend(batch)
+        elif topic is LinkEvent:
+            self._link_rows.extend({
+                "session_id": e.session_id,
+                "timestamp": _utc(e.timestamp),
+                "link": e.link,
+                "up": e.up,
+            } for e in batch)
+
+    def flush(self) -> None:
+        pending = self._engine_rows or self._gps_rows or self._alerts or self._link_rows
+        self._persisted = not pending or self._write_rows()
+        if self._closed_sessions:
+            closed, self._closed_sessions = self._closed_sessions, []
+            self._analyze(closed)
+
+    def _write_rows(self) -> bool:
+        engine_rows, self._engine_rows = self._engine_rows, []
+        gps_rows, self._gps_rows = self._gps_rows, []
+        alerts, self._alerts = self._alerts, []
+        link_rows, self._link_rows = self._link_rows, []
+
+        db = SessionLocal()
+        try:
+            with _COMMIT_SECONDS.time():
+                if engine_rows:
+                    db.execute(insert(EngineReading), engine_rows)
+                if gps_rows:
+                    db.execute(insert(GpsReading), gps_rows)
+                if alerts:
+                    write_alerts(db, alerts)
+                if link_rows:
+                    db.execute(insert(LinkMarker), link_rows)
+                db.commit()
+            _ENGINE_ROWS.inc(len(engine_rows))
+            _GPS_ROWS.inc(len(gps_rows))
+            self._failed_writes = 0
+            return True
+        except Exception:
+            logger.exception(
+                "Failed to write %d engine / %d GPS readings", len(engine_rows), len(gps_rows)
+            )
+            db.rollback()
+            self._failed_writes += 1
+            if self._failed_writes < _WRITE_ATTEMPTS:
+                # Retried with the next drain (e.g. "database is locked"
+                # during retention's VACUUM)
+                self._engine_rows[:0] = engine_rows
+                self._gps_rows[:0] = gps_rows
+                self._alerts[:0] = alerts
+                self._link_rows[:0] = link_rows
+            else:
+                self._failed_writes = 0
+                self._lost("gave up on %d engine / %d GPS readings after %d failed commits"
+                           % (len(engine_rows), len(gps_rows), _WRITE_ATTEMPTS))
+            return False
+        finally:
+            db.close()
+
+    @staticmethod
+    def _analyze(session_ids: list[int]) -> None:
+        # Imported here so NumPy stays off the start-up path
+        from models import analytics
+
+        for session_id in session_ids:
+            analytics.analyze_session(session_id)
@@ -0,0 +1,527 @@
+"""
+journal.py — Crash-safe, append-only journal of live telemetry.
+
+Every EngineSample, GpsSample, SessionEvent and Alert is appended to a
+memory-mapped file the moment it is published: a checksummed record
+copied into the map, no syscall.  A background thread msyncs the dirty
+pages every JOURNAL_SYNC_MS (group commit), so a power cut loses at most
+that much, while SQLite only commits once per DbWriter batch.
+
+After each successful commit DbWriter checkpoints the journal, marking
+everything before the drain as persisted; once it has lost samples (ring
+overrun) the checkpoint stays put for the rest of the run.  The file is a
+ring: writing wraps to the start once it reaches the end and may reuse
+space up to the checkpoint.  On the next start models.init_db() calls
+replay_into_db(), which writes whatever lies after the checkpoint and is
+not in SQLite yet, closes sessions left open by the crash and empties the
+journal.
+
+Layout:
+    header   MAGIC, u32 checkpoint generation, u64 checkpoint offset, u32 crc
+    records  u32 crc, u32 generation, u16 length, u8 kind, payload
+
+The generation goes up by one on every wrap.  Replay follows records from
+the checkpoint while the generation matches, then continues at the start
+with the next generation, and stops at the first record that does not
+check out.
+"""
+import bisect
+import fcntl
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import insert, select, update
+
+import config
+import metrics
+from telemetry.bus import TelemetryBus
+from telemetry.samples import Alert, EngineSample, GpsSample, SessionEvent
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"VIAJRNL1"
+_HEADER = struct.Struct("<8sIQI")
+_DATA_START = 64
+_RECORD = struct.Struct("<IIHB")
+_ENGINE = struct.Struct("<dq5d")
+_GPS = struct.Struct("<dqddd")
+_SESSION = struct.Struct("<dqB")
+# Followed by rule, severity and message, NUL-separated UTF-8
+_ALERT = struct.Struct("<dqddB")
+
+_KIND_ENGINE = 1
+_KIND_GPS = 2
+_KIND_SESSION = 3
+_KIND_ALERT = 4
+_KIND_WRAP = 0xFF
+
+_RECORDS = metrics.counter("via_journal_records", "Records appended to the journal")
+_DROPPED = metrics.counter("via_journal_dropped", "Records lost because the journal was full")
+_SYNC_SECONDS = metrics.histogram("via_journal_sync_seconds", "Journal msync")
+
+
+def _nan(value: float | None) -> float:
+    return math.nan if value is None else value
+
+
+def _none(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+def _encode(sample) -> tuple[int, bytes]:
+    if isinstance(sample, EngineSample):
+        return _KIND_ENGINE, _ENGINE.pack(
+            sample.timestamp, -1 if sample.session_id is None else sample.session_id,
+            _nan(sample.rpm), _nan(sample.speed_kph), _nan(sample.coolant_temp_c),
+            _nan(sample.throttle_pct), _nan(sample.engine_load_pct),
+        )
+    if isinstance(sample, GpsSample):
+        return _KIND_GPS, _GPS.pack(
+            sample.timestamp, -1 if sample.session_id is None else sample.session_id,
+            sample.latitude, sample.longitude, _nan(sample.accuracy_m),
+        )
+    if isinstance(sample, Alert):
+        return _KIND_ALERT, _ALERT.pack(
+            sample.timestamp, -1 if sample.session_id is None else sample.session_id,
+            sample.started_at, _nan(sample.value), sample.active,
+        ) + "\0".join((sample.rule, sample.severity, sample.message)).encode("utf-8")
+    return _KIND_SESSION, _SESSION.pack(
+        sample.timestamp, sample.session_id, sample.kind == SessionEvent.CLOSE
+    )
+
+
+def _decode(kind: int, payload: bytes):
+    if kind == _KIND_ENGINE:
+        ts, sid, rpm, speed, coolant, throttle, load = _ENGINE.unpack(payload)
+        return EngineSample(ts, None if sid < 0 else sid, _none(rpm), _none(speed),
+                            _none(coolant), _none(throttle), _none(load))
+    if kind == _KIND_GPS:
+        ts, sid, lat, lon, acc = _GPS.unpack(payload)
+        return GpsSample(ts, None if sid < 0 else sid, lat, lon, _none(acc))
+    if kind == _KIND_ALERT:
+        ts, sid, started_at, value, active = _ALERT.unpack_from(payload)
+        rule, severity, message = payload[_ALERT.size:].decode("utf-8", "replace").split("\0", 2)
+        return Alert(ts, None if sid < 0 else sid, rule, severity, message, started_at,
+                     _none(value), bool(active))
+    ts, sid, closed = _SESSION.unpack(payload)
+    return SessionEvent(ts, sid, SessionEvent.CLOSE if closed else SessionEvent.OPEN)
+
+
+def _record_crc(generation: int, kind: int, payload: bytes) -> int:
+    return zlib.crc32(payload, zlib.crc32(struct.pack("<IHB", generation, len(payload), kind)))
+
+
+def _header_crc(generation: int, offset: int) -> int:
+    return zlib.crc32(struct.pack("<IQ", generation, offset))
+
+
+def _open_map(path: Path, size: int) -> tuple[int, mmap.mmap]:
+    """Map *path* at *size* bytes, holding an exclusive lock on it.
+
+    Raises BlockingIOError if another process (a running logger) holds it.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        if os.fstat(fd).st_size != size:
+            os.ftruncate(fd, size)
+        return fd, mmap.mmap(fd, size)
+    except OSError:
+        os.close(fd)
+        raise
+
+
+def _fresh_generation(previous: int) -> int:
+    # Never one already in the file, even if the previous run wrapped
+    # many times: epoch seconds outrun the wrap count
+    return max(previous + 1, int(time.time())) & 0xFFFFFFFF
+
+
+def _read_header(mm: mmap.mmap) -> tuple[int, int]:
+    magic, generation, offset, crc = _HEADER.unpack_from(mm, 0)
+    if magic != MAGIC or crc != _header_crc(generation, offset) or not (
+        _DATA_START <= offset < len(mm)
+    ):
+        return 0, _DATA_START
+    return generation, offset
+
+
+def _write_header(mm: mmap.mmap, generation: int, offset: int) -> None:
+    _HEADER.pack_into(mm, 0, MAGIC, generation, offset, _header_crc(generation, offset))
+
+
+def read_records(mm: mmap.mmap) -> Iterator[object]:
+    """Yield the samples after the checkpoint, oldest first."""
+    generation, pos = _read_header(mm)
+    size = len(mm)
+    wrapped = False
+    while True:
+        if pos + _RECORD.size > size:
+            if wrapped:
+                return
+            pos, generation, wrapped = _DATA_START, generation + 1, True
+            continue
+        crc, gen, length, kind = _RECORD.unpack_from(mm, pos)
+        if gen != generation:
+            return
+        if kind == _KIND_WRAP:
+            if wrapped or crc != _record_crc(gen, kind, b""):
+                return
+            pos, generation, wrapped = _DATA_START, generation + 1, True
+            continue
+        end = pos + _RECORD.size + length
+        if end > size:
+            return
+        payload = bytes(mm[pos + _RECORD.size:end])
+        if crc != _record_crc(gen, kind, payload):
+            return  # torn write at the tail
+        try:
+            yield _decode(kind, payload)
+        except struct.error:
+            return
+        pos = end
+
+
+class Journal:
+    """Writer side; attach() subscribes it to every telemetry topic."""
+
+    def __init__(self, path: Path = config.JOURNAL_FILE,
+                 size_bytes: int = config.JOURNAL_SIZE_MB * 1024 * 1024):
+        self._fd, self._mm = _open_map(path, size_bytes)
+        self._size = size_bytes
+        generation, _ = _read_header(self._mm)
+        # replay_into_db() has emptied the journal; start a fresh lap
+        self._generation = _fresh_generation(generation)
+        self._pos = _DATA_START
+        self._checkpoint = _DATA_START
+        self._checkpoint_generation = self._generation
+        _write_header(self._mm, self._generation, _DATA_START)
+        self._lock = threading.Lock()
+        self._dirty_low = self._size
+        self._dirty_high = 0
+        self._stop_event = threading.Event()
+        self._sync_thread = threading.Thread(target=self._sync_loop, name="journal-sync", daemon=True)
+        self._sync_thread.start()
+
+    def attach(self, bus: TelemetryBus) -> None:
+        for topic in (SessionEvent, EngineSample, GpsSample, Alert):
+            bus.subscribe(topic, f"journal.{topic.__name__}", notify=self.append)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def position(self) -> tuple[int, int]:
+        """Opaque mark of everything appended so far, for checkpoint()."""
+        with self._lock:
+            return self._generation, self._pos
+
+    def append(self, sample) -> None:
+        """Bus notify callback (publisher's thread): copy one record into the map."""
+        kind, payload = _encode(sample)
+        length = _RECORD.size + len(payload)
+        with self._lock:
+            if self._pos + length > self._size:
+                if not self._fits(_DATA_START, length, self._generation + 1):
+                    _DROPPED.inc()
+                    return
+                if self._pos + _RECORD.size <= self._size:
+                    _RECORD.pack_into(self._mm, self._pos, _record_crc(self._generation, _KIND_WRAP, b""),
+                                      self._generation, 0, _KIND_WRAP)
+                    self._touch(self._pos, _RECORD.size)
+                self._generation += 1
+                self._pos = _DATA_START
+            elif not self._fits(self._pos, length, self._generation):
+                _DROPPED.inc()
+                return
+            pos = self._pos
+            self._mm[pos + _RECORD.size:pos + length] = payload
+            _RECORD.pack_into(self._mm, pos, _record_crc(self._generation, kind, payload),
+                              self._generation, len(payload), kind)
+            self._pos = pos + length
+            self._touch(pos, length)
+        _RECORDS.inc()
+
+    def _fits(self, start: int, length: int, generation: int) -> bool:
+        """Whether lap *generation* may use [start, start+length) (lock held).
+
+        On the checkpoint's own lap everything ahead of it is free; one lap
+        on, only the space before it.
+        """
+        end = start + length
+        if end > self._size:
+            return False
+        if self._checkpoint_generation == generation:
+            return True
+        return self._checkpoint_generation == generation - 1 and end <= self._checkpoint
+
+    def _touch(self, pos: int, length: int) -> None:
+        self._dirty_low = min(self._dirty_low, pos)
+        self._dirty_high = max(self._dirty_high, pos + length)
+
+    def checkpoint(self, mark: tuple[int, int]) -> None:
+        """Everything appended before *mark* is in SQLite; its space may be reused."""
+        generation, offset = mark
+        with self._lock:
+            self._checkpoint_generation, self._checkpoint = generation, offset
+            _write_header(self._mm, generation, offset)
+            self._touch(0, _HEADER.size)
+
+    # ------------------------------------------------------------------
+    # Group commit
+    # ------------------------------------------------------------------
+
+    def sync(self) -> None:
+        with self._lock:
+            low, high = self._dirty_low, self._dirty_high
+            self._dirty_low, self._dirty_high = self._size, 0
+        if high <= low:
+            return
+        low -= low % mmap.PAGESIZE
+        with _SYNC_SECONDS.time():
+            self._mm.flush(low, high - low)
+
+    def _sync_loop(self) -> None:
+        while not self._stop_event.wait(config.JOURNAL_SYNC_MS / 1000.0):
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Journal sync failed")
+
+    def close(self) -> None:
+        self._stop_event.set()
+        self._sync_thread.join(2.0)
+        self.sync()
+        self._mm.close()
+        os.close(self._fd)
+
+
+# ---------------------------------------------------------------------------
+# Recovery
+# ---------------------------------------------------------------------------
+
+def _utc(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def _latest(db, model, session_ids) -> dict[int | None, float]:
+    """Newest stored timestamp (epoch seconds) for each of *session_ids*.
+
+    ``None`` stands for readings logged with no session open.  Each lookup
+    is one seek on the session_id index (the newest row by id), never a
+    table scan: timestamp has no index.
+    """
+    latest = {}
+    for session_id in session_ids:
+        ts = db.execute(
+            select(model.timestamp)
+            .where(model.session_id.is_(None) if session_id is None
+                   else model.session_id == session_id)
+            .order_by(model.id.desc())
+            .limit(1)
+        ).scalar()
+        if ts is not None:
+            # SQLite hands DateTime(timezone=True) back naive; the values are UTC
+            latest[session_id] = ts.replace(tzinfo=timezone.utc).timestamp()
+    return latest
+
+
+def _stored_times(db, model, samples) -> dict[int | None, list[float]]:
+    """Stored timestamps (epoch seconds, ascending) per session, over the span *samples* cover.
+
+    Rows DbWriter committed after its last checkpoint are there already,
+    and so are rows on both sides of samples it lost to a ring overrun.
+    One range read per session, on the session_id index.
+    """
+    spans: dict[int | None, tuple[float, float]] = {}
+    for s in samples:
+        low, high = spans.get(s.session_id, (s.timestamp, s.timestamp))
+        spans[s.session_id] = (min(low, s.timestamp), max(high, s.timestamp))
+    margin = config.OBD_LOG_INTERVAL_S + 1e-3
+    stored = {}
+    for session_id, (low, high) in spans.items():
+        rows = db.execute(
+            select(model.timestamp)
+            .where(model.session_id.is_(None) if session_id is None
+                   else model.session_id == session_id)
+            # Naive UTC, as SQLite stores them
+            .where(model.timestamp >= _utc(low - margin).replace(tzinfo=None),
+                   model.timestamp <= _utc(high + margin).replace(tzinfo=None))
+        ).scalars()
+        stored[session_id] = sorted(ts.replace(tzinfo=timezone.utc).timestamp() for ts in rows)
+    return stored
+
+
+def _near(times: list[float], t: float, within: float) -> bool:
+    """Whether sorted *times* has *t* itself or a value less than *within* from it."""
+    i = bisect.bisect_left(times, t)
+    return any(times[j] == t or abs(times[j] - t) < within
+               for j in (i - 1, i) if 0 <= j < len(times))
+
+
+def _read_journal(path: Path) -> tuple[list, int] | None:
+    """(samples after the checkpoint, header generation), or None if in use."""
+    if not path.exists() or path.stat().st_size <= _DATA_START:
+        return [], 0
+    try:
+        fd, mm = _open_map(path, path.stat().st_size)
+    except BlockingIOError:
+        return None
+    try:
+        return list(read_records(mm)), _read_header(mm)[0]
+    finally:
+        mm.close()
+        os.close(fd)
+
+
+def _reset(path: Path, generation: int) -> None:
+    fd, mm = _open_map(path, path.stat().st_size)
+    try:
+        _write_header(mm, _fresh_generation(generation), _DATA_START)
+        mm.flush()
+    finally:
+        mm.close()
+        os.close(fd)
+
+
+def _set_aside(path: Path) -> list[Path]:
+    """Journals whose replay failed (``<journal>.unreplayed.<n>``), oldest first."""
+    found = []
+    for kept in path.parent.glob(path.name + ".unreplayed.*"):
+        number = kept.name.rsplit(".", 1)[1]
+        if number.isdigit():
+            found.append((int(number), kept))
+    return [kept for _, kept in sorted(found)]
+
+
+def replay_into_db(path: Path = config.JOURNAL_FILE) -> None:
+    """Write unpersisted journal records to SQLite, close dangling sessions, empty the journal.
+
+    A journal whose replay fails is set aside as ``<journal>.unreplayed.<n>``
+    rather than overwritten by the next run.  Every start tries those
+    again first, oldest first, and deletes each one that goes through.
+    """
+    journal = _read_journal(path)
+    if journal is None:
+        # A logger is running against this database: its session is live
+        logger.info("Journal %s is in use; not replaying", path)
+        return
+
+    for kept in _set_aside(path):
+        older = _read_journal(kept)
+        # Sessions are closed by the newest journal, once every row is in
+        if older is not None and _replay(kept, *older, close_dangling=False):
+            kept.unlink()
+
+    samples, generation = journal
+    if not _replay(path, samples, generation, close_dangling=True) and path.exists():
+        numbers = [int(p.name.rsplit(".", 1)[1]) for p in _set_aside(path)]
+        kept = path.with_name(f"{path.name}.unreplayed.{max(numbers, default=0) + 1}")
+        path.replace(kept)
+        logger.error("Journal set aside as %s; its replay is retried at the next start", kept)
+
+    waiting = _set_aside(path)
+    if waiting:
+        logger.warning("%d journal(s) still waiting for replay: %s",
+                       len(waiting), ", ".join(p.name for p in waiting))
+
+
+def _replay(path: Path, samples: list, generation: int, close_dangling: bool) -> bool:
+    """Replay one journal's *samples*; False (nothing written) if that failed."""
+    from models import DrivingSession, EngineReading, GpsReading, SessionLocal
+    from telemetry.db_writer import write_alerts
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        dangling = db.execute(
+            select(DrivingSession).where(DrivingSession.ended_at.is_(None))
+        ).scalars().all() if close_dangling else []
+        if not samples and not dangling:
+            return True  # clean shutdown: nothing to replay or close
+
+        # Only what is not stored yet, sessionless readings included
+        engine_stored = _stored_times(db, EngineReading,
+                                      [s for s in samples if isinstance(s, EngineSample)])
+        gps_stored = _stored_times(db, GpsReading,
+                                   [s for s in samples if isinstance(s, GpsSample)])
+        engine_after: dict[int | None, float] = {}
+        engine_rows, gps_rows, alerts = [], [], []
+        closed: dict[int, float] = {}
+        for s in samples:
+            # Compared at storage precision: the database keeps microseconds
+            stored = _utc(s.timestamp).timestamp()
+            if isinstance(s, EngineSample):
+                # Same downsampling as DbWriter, against stored and replayed rows
+                if (_near(engine_stored[s.session_id], stored, config.OBD_LOG_INTERVAL_S)
+                        or stored - engine_after.get(s.session_id, -math.inf)
+                        < config.OBD_LOG_INTERVAL_S):
+                    continue
+                engine_after[s.session_id] = stored
+                engine_rows.append({
+                    "session_id": s.session_id, "timestamp": _utc(s.timestamp), "rpm": s.rpm,
+                    "speed_kph": s.speed_kph, "coolant_temp_c": s.coolant_temp_c,
+                    "throttle_pct": s.throttle_pct, "engine_load_pct": s.engine_load_pct,
+                })
+            elif isinstance(s, GpsSample):
+                if _near(gps_stored[s.session_id], stored, 0.0):
+                    continue
+                gps_rows.append({
+                    "session_id": s.session_id, "timestamp": _utc(s.timestamp),
+                    "latitude": s.latitude, "longitude": s.longitude, "accuracy_m": s.accuracy_m,
+                })
+            elif isinstance(s, Alert):
+                alerts.append(s)
+            elif s.kind == SessionEvent.CLOSE:
+                closed[s.session_id] = s.timestamp
+        if engine_rows:
+            db.execute(insert(EngineReading), engine_rows)
+        if gps_rows:
+            db.execute(insert(GpsReading), gps_rows)
+        # Matched on rule and start: episodes already stored are not repeated
+        write_alerts(db, alerts)
+        for session_id, ts in closed.items():
+            db.execute(
+                update(DrivingSession)
+                .where(DrivingSession.id == session_id, DrivingSession.ended_at.is_(None))
+                .values(ended_at=_utc(ts))
+            )
+
+        # Sessions the crash left open end at their last reading
+        dangling = [session for session in dangling
+                    if session.id not in closed and session.ended_at is None]
+        open_ids = [session.id for session in dangling]
+        last_seen = _latest(db, EngineReading, open_ids)
+        for session_id, ts in _latest(db, GpsReading, open_ids).items():
+            last_seen[session_id] = max(ts, last_seen.get(session_id, ts))
+        for session in dangling:
+            ts = last_seen.get(session.id)
+            session.ended_at = _utc(ts) if ts is not None else session.started_at
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Replay of journal %s failed", path)
+        return False
+    finally:
+        db.close()
+
+    if close_dangling and path.exists():
+        _reset(path, generation)
+    if engine_rows or gps_rows or alerts or closed or dangling:
+        logger.warning(
+            "Recovered from journal %s: %d engine / %d GPS readings, %d alert records, "
+            "%d sessions closed, %d dangling sessions closed at their last reading in %.1f ms",
+            path.name, len(engine_rows), len(gps_rows), len(alerts), len(closed), len(dangling),
+            (time.perf_counter() - started) * 1000.0,
+        )
+    return True
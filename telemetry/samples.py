@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class EngineSample:
+    """One OBD poll.  Readings are None when the PID did not answer."""
+
+    timestamp: float            # epoch seconds (UTC)
+    session_id: int | None
+    rpm: float | None = None
+    speed_kph: float | None = None
+    coolant_temp_c: float | None = None
+    throttle_pct: float | None = None
+    engine_load_pct: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class GpsSample:
+    """One position fix."""
+
+    timestamp: float            # epoch seconds (UTC)
+    session_id: int | None
+    latitude: float
+    longitude: float
+    accuracy_m: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class SessionEvent:
+    """A DrivingSession was opened or closed."""
+
+    OPEN = "open"
+    CLOSE = "close"
+
+    timestamp: float            # epoch seconds (UTC)
+    session_id: int
+    kind: str
+
+
+@dataclass(frozen=True, slots=True)
+class Alert:
+    """An alert rule was raised (active) or cleared; see telemetry.alerts."""
+
+    timestamp: float            # epoch seconds (UTC)
+    session_id: int | None
+    rule: str
+    severity: str
+    message: str
+    started_at: float           # when the condition began to hold
+    value: float | None = None  # most extreme value of the rule's stat
+    active: bool = True
+
+
+@dataclass(frozen=True, slots=True)
+class LinkEvent:
+    """A supervised link (obd, gps, bluetooth) dropped or came back.
+
+    A down / up pair marks a gap in that link's data.
+    """
+
+    timestamp: float            # epoch seconds (UTC)
+    session_id: int | None
+    link: str
+    up: bool
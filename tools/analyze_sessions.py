@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+analyze_sessions.py — (Re)compute trip statistics for stored sessions.
+
+    python tools/analyze_sessions.py                 # closed sessions not yet analysed
+    python tools/analyze_sessions.py --recompute     # every closed session
+    python tools/analyze_sessions.py 12 13           # just these
+    python tools/analyze_sessions.py --workers 2
+
+Sessions are analysed in a process pool (ANALYTICS_WORKERS, default one
+per CPU) and the results stored on each DrivingSession row.
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config  # noqa: E402
+import models  # noqa: E402
+from models import analytics  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sessions", nargs="*", type=int, help="DrivingSession ids")
+    parser.add_argument("--recompute", action="store_true", help="include sessions already analysed")
+    parser.add_argument("--workers", type=int, default=config.ANALYTICS_WORKERS,
+                        help="worker processes (0 = one per CPU)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    models.init_db()
+    count = analytics.analyze_all(args.sessions or None, args.recompute, args.workers)
+    print(f"{count} sessions analysed")
+
+
+if __name__ == "__main__":
+    main()
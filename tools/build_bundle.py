@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+build_bundle.py — Build the packaged-mode resource bundle.
+
+    python tools/build_bundle.py [--rcc /path/to/rcc]
+
+1. Regenerates resources.qrc from views/, components/ and assets/.
+2. Compiles it with Qt's rcc into a single binary bundle (config.RESOURCE_BUNDLE).
+3. Compiles every QML file in the bundle once, offscreen, with the QML disk
+   cache pointed at config.QML_CACHE_DIR, so the shipped cache already holds
+   the compiled units and the dashboard never parses QML at boot. The views
+   are small: compiling them costs a few ms, so the bundle's main use is a
+   single file to deploy, not a faster start.
+
+Run it on the target (or a matching Qt build): compiled QML units are tied
+to the Qt version that produced them.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config  # noqa: E402
+
+_BUNDLED_DIRS = ("views", "components", "assets")
+_QRC_FILE: Path = config.BASE_DIR / "resources.qrc"
+_RCC_FALLBACKS = ("/usr/lib/qt6/libexec/rcc", "/usr/lib/qt6/bin/rcc", "/usr/libexec/qt6/rcc")
+
+
+def write_qrc() -> list[str]:
+    """Write resources.qrc listing every bundled file; returns the list."""
+    files = sorted(
+        p.relative_to(config.BASE_DIR).as_posix()
+        for d in _BUNDLED_DIRS
+        for p in (config.BASE_DIR / d).rglob("*")
+        if p.is_file()
+    )
+    lines = ["<!DOCTYPE RCC>", '<RCC version="1.0">', '    <qresource prefix="/">']
+    lines += [f"        <file>{f}</file>" for f in files]
+    lines += ["    </qresource>", "</RCC>", ""]
+    _QRC_FILE.write_text("\n".join(lines), encoding="utf-8")
+    print(f"{_QRC_FILE.name}: {len(files)} files")
+    return files
+
+
+def find_rcc(explicit: str | None) -> str:
+    candidates = [explicit] if explicit else [shutil.which("rcc"), *_RCC_FALLBACKS]
+    for candidate in candidates:
+        if candidate and Path(candidate).exists():
+            return candidate
+    sys.exit("rcc not found — install the Qt 6 tools or pass --rcc")
+
+
+def build_rcc(rcc: str) -> None:
+    config.RESOURCE_BUNDLE.parent.mkdir(parents=True, exist_ok=True)
+    subprocess.run(
+        [rcc, "--binary", str(_QRC_FILE), "-o", str(config.RESOURCE_BUNDLE)],
+        cwd=config.BASE_DIR,
+        check=True,
+    )
+    print(f"{config.RESOURCE_BUNDLE}: {config.RESOURCE_BUNDLE.stat().st_size / 1024:.0f} KiB")
+
+
+def precompile_qml(files: list[str]) -> int:
+    """Compile each bundled QML file into the disk cache; returns error count."""
+    if config.QML_CACHE_DIR.exists():
+        shutil.rmtree(config.QML_CACHE_DIR)
+    config.QML_CACHE_DIR.mkdir(parents=True)
+    os.environ["QML_DISK_CACHE_PATH"] = str(config.QML_CACHE_DIR)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from PyQt6.QtCore import QCoreApplication, QResource, Qt, QUrl
+    from PyQt6.QtGui import QGuiApplication
+    from PyQt6.QtQml import QQmlComponent, QQmlEngine, qmlRegisterType
+
+    from controllers.sparkline import Sparkline
+
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    app = QGuiApplication(sys.argv[:1])  # noqa: F841 — QML needs an app instance
+    # The types main.py registers, so views that import them compile
+    qmlRegisterType(Sparkline, "Via.Charts", 1, 0, "Sparkline")
+    if not QResource.registerResource(str(config.RESOURCE_BUNDLE)):
+        sys.exit(f"Could not register {config.RESOURCE_BUNDLE}")
+
+    engine = QQmlEngine()
+    errors = 0
+    for name in (f for f in files if f.endswith(".qml")):
+        component = QQmlComponent(engine, QUrl(f"qrc:/{name}"))
+        if component.isError():
+            errors += 1
+            for error in component.errors():
+                print(f"  {error.toString()}", file=sys.stderr)
+        else:
+            print(f"  compiled {name}")
+    cached = sum(1 for p in config.QML_CACHE_DIR.rglob("*") if p.is_file())
+    print(f"{config.QML_CACHE_DIR}: {cached} cache files")
+    return errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rcc", help="path to Qt 6 rcc")
+    args = parser.parse_args()
+
+    files = write_qrc()
+    build_rcc(find_rcc(args.rcc))
+    sys.exit(1 if precompile_qml(files) else 0)
+
+
+if __name__ == "__main__":
+    main()
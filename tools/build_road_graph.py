@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+build_road_graph.py — Build the offline routing graph from an OSM extract.
+
+    python tools/build_road_graph.py region.osm.bz2
+    python tools/build_road_graph.py region.osm.pbf --landmarks 16 --out /data/roads.graph
+
+Extracts for a city or county from https://download.geofabrik.de or the
+Overpass API (clip to the area you drive in: the whole graph, including
+the landmark tables, is 16 + 16 × landmarks bytes per node plus 16 per
+edge).  .osm.pbf input needs pyosmium.
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config  # noqa: E402
+from routing.build import build_graph  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("extract", type=Path, help=".osm, .osm.bz2, .osm.gz or .osm.pbf")
+    parser.add_argument("--out", type=Path, default=config.ROUTING_GRAPH)
+    parser.add_argument("--landmarks", type=int, default=config.ROUTING_LANDMARKS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    try:
+        header = build_graph(args.extract, args.out, args.landmarks)
+    except (OSError, RuntimeError, ValueError) as exc:
+        sys.exit(str(exc))
+    size = args.out.stat().st_size
+    print(f"{args.out}: {header.nodes} nodes, {header.edges} edges, "
+          f"{header.landmarks} landmarks, {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
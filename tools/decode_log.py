@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+decode_log.py — Print a binary trace written with LOG_BINARY=true as text.
+
+    python tools/decode_log.py [logs/via.trace] [--level DEBUG] [--logger controllers.media]
+
+Output uses the same line format as logs/via.log.  A trace cut short by a
+power loss decodes up to the last complete record.
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config  # noqa: E402
+import log  # noqa: E402
+
+
+def format_event(created: float, level: int, name: str, template: str, args: tuple) -> str:
+    try:
+        message = template % args if args else template
+    except (TypeError, ValueError):
+        message = f"{template}  {args!r}"
+    stamp = time.strftime(log._DATEFMT, time.localtime(created))
+    return f"{stamp}  {logging.getLevelName(level):<8}  {name}  {message}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("trace", nargs="?", type=Path, default=config.LOG_BINARY_FILE)
+    parser.add_argument("--level", default="DEBUG", help="minimum level to print")
+    parser.add_argument("--logger", default="", help="only loggers with this name prefix")
+    args = parser.parse_args()
+
+    min_level = getattr(logging, args.level.upper(), logging.DEBUG)
+    count = 0
+    with open(args.trace, "rb") as fh:
+        try:
+            for created, level, name, template, values in log.read_binary(fh):
+                if level < min_level or not name.startswith(args.logger):
+                    continue
+                print(format_event(created, level, name, template, values))
+                count += 1
+        except BrokenPipeError:
+            return
+        except ValueError as exc:
+            sys.exit(f"{args.trace}: {exc}")
+    print(f"-- {count} records", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+export_clip.py — Cut the dashcam video around an alert or a moment.
+
+    python tools/export_clip.py --alert 42              # around alert 42
+    python tools/export_clip.py --at "2026-10-19 08:15:30" --burn
+    python tools/export_clip.py --at "2026-10-19 08:15:30" --info
+
+Keeps CLIP_BEFORE_S before and CLIP_AFTER_S after the event (override with
+--before / --after).  The clip is stream-copied to .mkv with the telemetry
+as a subtitle track; --burn renders it into the picture (.mp4, re-encoded).
+--info only prints the frame and the telemetry at that moment.
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import or_, select  # noqa: E402
+
+import config  # noqa: E402
+from controllers.dashcam_clips import export_clip, overlay_text  # noqa: E402
+from controllers.dashcam_index import FrameIndex, TelemetryTrack  # noqa: E402
+from models import AlertEvent, DrivingSession, SessionLocal  # noqa: E402
+
+
+def _epoch(value: datetime) -> float:
+    # SQLite hands DateTime(timezone=True) back naive; the values are UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def resolve_event(args: argparse.Namespace) -> tuple[float, float, int | None, str]:
+    """(start, end, session id, name) of the event to cut around."""
+    db = SessionLocal()
+    try:
+        if args.alert is not None:
+            alert = db.get(AlertEvent, args.alert)
+            if alert is None:
+                sys.exit(f"no alert {args.alert}")
+            return _epoch(alert.started_at), _epoch(alert.ended_at), alert.session_id, \
+                f"alert-{alert.id}-{alert.rule}"
+
+        t = datetime.fromisoformat(args.at).astimezone(timezone.utc)
+        session_id = db.execute(
+            select(DrivingSession.id)
+            .where(DrivingSession.started_at <= t,
+                   or_(DrivingSession.ended_at.is_(None), DrivingSession.ended_at >= t))
+            .order_by(DrivingSession.id.desc())
+            .limit(1)
+        ).scalar()
+        return t.timestamp(), t.timestamp(), session_id, f"clip-{t.astimezone():%Y%m%d-%H%M%S}"
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    event = parser.add_mutually_exclusive_group(required=True)
+    event.add_argument("--alert", type=int, help="AlertEvent id")
+    event.add_argument("--at", help="local date and time, e.g. '2026-10-19 08:15:30'")
+    parser.add_argument("--before", type=float, default=config.CLIP_BEFORE_S)
+    parser.add_argument("--after", type=float, default=config.CLIP_AFTER_S)
+    parser.add_argument("--burn", action="store_true", help="render the overlay (re-encodes)")
+    parser.add_argument("--info", action="store_true", help="print the frame and telemetry only")
+    parser.add_argument("--out", type=Path, help="output path (extension set by mode)")
+    args = parser.parse_args()
+
+    start, end, session_id, name = resolve_event(args)
+    index = FrameIndex()
+
+    if args.info:
+        track = TelemetryTrack.load(session_id) if session_id is not None else None
+        began = time.perf_counter()
+        frame = index.locate(start)
+        point = track.at(start) if track is not None else None
+        lookup_us = (time.perf_counter() - began) * 1e6
+        if frame is None:
+            print("no video recorded at that time")
+        else:
+            print(f"{frame.segment.name} frame {frame.frame} at +{frame.offset_s:.3f} s")
+        print(overlay_text(point) if point is not None else "no session at that time")
+        print(f"lookup {lookup_us:.0f} µs")
+        return
+
+    out = args.out or config.EXPORT_DIR / name
+    try:
+        result = export_clip(start - args.before, end + args.after, out, session_id,
+                             burn=args.burn, index=index)
+    except ValueError as exc:
+        sys.exit(str(exc))
+    print(result.path)
+    print(f"{result.frames} frames, {result.end - result.start:.1f} s of video, "
+          f"{len(result.spans)} segment(s), in {result.seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
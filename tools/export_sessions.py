@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+export_sessions.py — Export driving sessions for analysis.
+
+    python tools/export_sessions.py 12 13            # sessions 12 and 13
+    python tools/export_sessions.py --latest 1 --format csv.gz
+    python tools/export_sessions.py --all --out exports/everything
+
+Writes <out>.engine.<format> and <out>.gps.<format> (default out:
+EXPORT_DIR/sessions-<first>-<last>).  Readings are streamed in chunks, so
+sessions of any length export in constant memory.
+
+The default format is parquet if pyarrow is installed, else csv.gz.
+parquet and arrow need pyarrow, csv.zst needs zstandard; both are
+optional (pip install pyarrow zstandard).
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import select  # noqa: E402
+
+import config  # noqa: E402
+from models import DrivingSession, SessionLocal  # noqa: E402
+from models.export import DEFAULT_FORMAT, FORMATS, export_sessions  # noqa: E402
+
+
+def select_sessions(args: argparse.Namespace) -> list[int]:
+    if args.sessions:
+        return args.sessions
+    query = select(DrivingSession.id).order_by(DrivingSession.id.desc())
+    if args.latest:
+        query = query.limit(args.latest)
+    db = SessionLocal()
+    try:
+        return sorted(db.execute(query).scalars())
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sessions", nargs="*", type=int, help="DrivingSession ids")
+    parser.add_argument("--latest", type=int, default=0, help="export the N most recent sessions")
+    parser.add_argument("--all", action="store_true", help="export every session")
+    parser.add_argument("--format", choices=FORMATS, default=DEFAULT_FORMAT,
+                        help=f"output format (default: {DEFAULT_FORMAT})")
+    parser.add_argument("--out", type=Path, help="output path stem")
+    parser.add_argument("--chunk-rows", type=int, default=config.EXPORT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    if not (args.sessions or args.latest or args.all):
+        parser.error("give session ids, --latest N or --all")
+
+    session_ids = select_sessions(args)
+    if not session_ids:
+        sys.exit("no matching sessions")
+    stem = args.out or config.EXPORT_DIR / f"sessions-{session_ids[0]}-{session_ids[-1]}"
+
+    try:
+        result = export_sessions(session_ids, stem, args.format, args.chunk_rows)
+    except (RuntimeError, ValueError) as exc:
+        sys.exit(str(exc))
+
+    for path in result.files:
+        print(path)
+    print(f"{result.rows} rows in {result.seconds:.2f} s ({result.rows_per_second:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
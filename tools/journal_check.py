@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+journal_check.py — Crash-recovery check for the DB writer and the journal.
+
+    python tools/journal_check.py
+    python tools/journal_check.py --samples 50000 --keep
+
+Runs the bus, DbWriter and Journal as in main.py on a scratch database
+and checks that every published reading ends up stored exactly once:
+
+    overrun  a publisher far faster than the writer overruns its ring,
+             then the process dies without a final drain; the replay at
+             the next start has to supply every sample the writer lost
+    locked   another connection holds the database locked for longer
+             than SQLite's busy timeout (as retention's VACUUM does); the
+             failed batch is retried, and once commits succeed again the
+             journal is checkpointed and empties at a clean stop
+
+The exit status is 1 if any scenario stores a reading twice or not at all.
+"""
+import argparse
+import logging
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# config reads the environment once, on import: the scratch database,
+# a small ring and no downsampling, so every sample should become a row
+_SCRATCH = Path(os.environ.get("JOURNAL_CHECK_DIR") or tempfile.mkdtemp(prefix="via-journal-"))
+os.environ["JOURNAL_CHECK_DIR"] = str(_SCRATCH)
+os.environ["DATABASE_URL"] = f"sqlite:///{_SCRATCH / 'check.db'}"
+os.environ["JOURNAL_FILE"] = str(_SCRATCH / "check.journal")
+os.environ["JOURNAL_ENABLED"] = "true"
+os.environ["TELEMETRY_RING_SIZE"] = "256"
+os.environ["TELEMETRY_DB_FLUSH_S"] = "0.2"
+os.environ["OBD_LOG_INTERVAL_S"] = "0"
+
+from sqlalchemy import func, select  # noqa: E402
+
+import config  # noqa: E402
+import models  # noqa: E402
+from models import EngineReading, SessionLocal  # noqa: E402
+from telemetry import EngineSample, TelemetryBus  # noqa: E402
+from telemetry.db_writer import DbWriter  # noqa: E402
+from telemetry.journal import Journal, _read_journal  # noqa: E402
+
+logger = logging.getLogger("journal_check")
+
+# Seconds the "locked" scenario holds the database: past pysqlite's 5 s
+_LOCK_S = 6.0
+
+
+def _sample(base: float, i: int) -> EngineSample:
+    return EngineSample(timestamp=base + i * 0.001, session_id=None, rpm=800.0 + i % 100,
+                        speed_kph=float(i % 120), coolant_temp_c=90.0, throttle_pct=15.0,
+                        engine_load_pct=30.0)
+
+
+def _stored() -> tuple[int, int]:
+    """(rows, distinct timestamps) in engine_readings."""
+    db = SessionLocal()
+    try:
+        return db.execute(select(
+            func.count(EngineReading.id), func.count(func.distinct(EngineReading.timestamp))
+        )).one()
+    finally:
+        db.close()
+
+
+def _check(name: str, expected: int) -> bool:
+    rows, distinct = _stored()
+    ok = rows == distinct == expected
+    logger.log(logging.INFO if ok else logging.ERROR,
+               "%-8s %s: %d published, %d stored, %d duplicates",
+               name, "ok" if ok else "FAILED", expected, rows, rows - distinct)
+    return ok
+
+
+def _crash_after_overrun(samples: int) -> None:
+    """Child process: overrun the writer, then die without a final drain."""
+    models.init_db()
+    bus = TelemetryBus()
+    journal = Journal()
+    journal.attach(bus)
+    writer = DbWriter(bus, journal=journal)
+    writer.start()
+    base = time.time()
+    for i in range(samples):
+        bus.publish(_sample(base, i))
+    # A few more drains, so checkpoints after the overrun are attempted too
+    time.sleep(4 * config.TELEMETRY_DB_FLUSH_S)
+    journal.sync()
+    os._exit(0)
+
+
+def _overrun(samples: int) -> bool:
+    subprocess.run([sys.executable, __file__, "--child", "--samples", str(samples)], check=True)
+    written, _ = _stored()
+    logger.info("overrun  the writer stored %d of %d before the crash", written, samples)
+    models.init_db()  # replays
+    return _check("overrun", samples)
+
+
+def _locked(samples: int, stored_before: int) -> bool:
+    bus = TelemetryBus()
+    journal = Journal()
+    journal.attach(bus)
+    writer = DbWriter(bus, journal=journal)
+    writer.start()
+    base = time.time() + 3600  # clear of the overrun scenario's rows
+    # Half a ring per drain, so only the lock fails one
+    during = config.TELEMETRY_RING_SIZE // 2
+    for i in range(samples - during):
+        bus.publish(_sample(base, i))
+        if i % during == during - 1:
+            time.sleep(config.TELEMETRY_DB_FLUSH_S)
+
+    blocker = sqlite3.connect(config.DATABASE_URL.removeprefix("sqlite:///"))
+    blocker.execute("BEGIN EXCLUSIVE")
+    for i in range(samples - during, samples):
+        bus.publish(_sample(base, i))
+    time.sleep(_LOCK_S)
+    blocker.rollback()
+    blocker.close()
+
+    time.sleep(4 * config.TELEMETRY_DB_FLUSH_S)
+    writer.stop()
+    journal.close()
+    left, _ = _read_journal(config.JOURNAL_FILE)
+    ok = _check("locked", stored_before + samples) and not left
+    if left:
+        logger.error("locked   %d records still waiting in the journal after a clean stop",
+                     len(left))
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--samples", type=int, default=20000, help="readings in the overrun")
+    parser.add_argument("--locked-samples", type=int, default=2000,
+                        help="readings in the locked scenario (published at the writer's pace)")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s  %(name)s  %(message)s",
+                        datefmt="%H:%M:%S")
+    logger.setLevel(logging.INFO)
+
+    if args.child:
+        _crash_after_overrun(args.samples)
+        return
+    try:
+        ok = _overrun(args.samples)
+        ok = _locked(args.locked_samples, args.samples) and ok
+    finally:
+        if not args.keep:
+            shutil.rmtree(_SCRATCH, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+soak.py — Accelerated-time soak test: memory, thread and fd growth.
+
+    python tools/soak.py                               # an 8-hour drive at 60×: 8 minutes
+    python tools/soak.py --hours 72 --speedup 240 --rss-mb 24
+
+Builds every controller that runs without a display (engine, gauges,
+media, device, navigation, rate governor, diagnostics, session history)
+with the bus, DB writer, journal, alerts and retention, wired as in
+main.py, on a scratch database.  The sources are simulated and run
+--speedup times faster than the wall clock:
+
+    OBD      SimulatedOBD (OBD_SIMULATE): town and highway cycles; the
+             link drops every 37 minutes and the ignition is off for 10
+             minutes every 2 hours, so sessions resume and restart
+    GPS      the GPS_SIMULATE random walk
+    BlueZ    a phone that connects, plays tracks without cover art (every
+             track goes to the art lookup, answered by a local stand-in
+             for the iTunes API), skips a burst of tracks now and then
+             and drops off for a few minutes every 95 minutes
+
+The driver also switches tabs and opens the history and diagnostics
+pages on a schedule.  Every --snapshot-s the traced Python heap
+(tracemalloc), RSS, live threads and open fds are logged.  Growth from
+the end of the warm-up to the end of the run (the smallest of the last
+three snapshots, so a transient thread or socket does not count) is
+checked against the budgets; the exit status is 1 if any is exceeded,
+with the allocation sites that grew most.
+
+The Chromium side of the map (WebEngine) is not part of this process and
+not measured here.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# config reads the environment once, on import: the scratch database and
+# journal, and simulated sources, have to be set before anything loads it
+_SCRATCH = Path(tempfile.mkdtemp(prefix="via-soak-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_SCRATCH / 'soak.db'}"
+os.environ["JOURNAL_FILE"] = str(_SCRATCH / "soak.journal")
+os.environ["OBD_SIMULATE"] = "true"
+os.environ["GPS_SIMULATE"] = "true"
+
+from PyQt6.QtCore import QCoreApplication, QObject, QTimer  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+import config  # noqa: E402
+import metrics  # noqa: E402
+import models  # noqa: E402
+from controllers.dbus_dispatcher import DBusCommandDispatcher  # noqa: E402
+from controllers.device_controller import DeviceController  # noqa: E402
+from controllers.diagnostics_controller import DiagnosticsController  # noqa: E402
+from controllers.engine_controller import EngineController  # noqa: E402
+from controllers.gauge_presenter import GaugePresenter  # noqa: E402
+from controllers.link_supervisor import LinkSupervisor  # noqa: E402
+from controllers.media_controller import MusicPlayerController  # noqa: E402
+from controllers.navigation_controller import NavigationController  # noqa: E402
+from controllers.obd_simulator import SimulatedOBD  # noqa: E402
+from controllers.rate_governor import RateGovernor  # noqa: E402
+from controllers.session_history import SessionHistoryModel  # noqa: E402
+from controllers.snapshot import FrameClock  # noqa: E402
+from models import DrivingSession, EngineReading, GpsReading, SessionLocal  # noqa: E402
+from models.retention import RetentionWorker  # noqa: E402
+from telemetry import TelemetryBus  # noqa: E402
+from telemetry.alerts import AlertEngine  # noqa: E402
+from telemetry.db_writer import DbWriter  # noqa: E402
+from telemetry.journal import Journal  # noqa: E402
+
+logger = logging.getLogger("soak")
+
+_MIB = 1024 * 1024
+
+# Real-drive durations that pass at the accelerated rate.  Polling cadences
+# go through RateGovernor(time_scale=); fixed internals (DB flush, journal
+# sync, UI frames) stay in real time.
+_SCALED_S = (
+    "OBD_LOG_INTERVAL_S", "RECONNECT_INITIAL_S", "RECONNECT_MAX_S", "SESSION_RESUME_GAP_S",
+    "BT_RECONNECT_WINDOW_S", "RETENTION_START_DELAY_S", "RETENTION_INTERVAL_S",
+)
+
+_RULE_DURATIONS = ("window_s", "hold_s", "clear_s")
+
+# Scripted events, in simulated seconds: (period, offset into the period)
+_OBD_DROP = (37 * 60, 20 * 60)
+_IGNITION_CYCLE = (2 * 3600, 2 * 3600)
+_IGNITION_OFF_S = 10 * 60
+_PHONE_CYCLE = (95 * 60, 0)
+_PHONE_AWAY_S = 3 * 60
+_SKIP_BURST = (23 * 60, 60)
+_SKIPS = 5
+_VIEW_SWITCH = (5 * 60, 0)
+_VIEWS = ("engine", "media", "navigation", "engine", "device")
+_HISTORY = (30 * 60, 15 * 60)
+_DIAGNOSTICS = (45 * 60, 30 * 60)
+_ROUTE = (20 * 60, 10 * 60)
+_BT_POLL_S = 5
+
+# Answer time of the stand-in iTunes API, in real seconds
+_ART_LATENCY_S = 0.2
+
+
+# ---------------------------------------------------------------------------
+# Simulated sources
+# ---------------------------------------------------------------------------
+
+class _ArtSearchHandler(BaseHTTPRequestHandler):
+    """Stands in for the iTunes Search API: one result per query."""
+
+    def do_GET(self):
+        time.sleep(_ART_LATENCY_S)
+        body = json.dumps({"results": [{
+            "artworkUrl100": f"http://127.0.0.1/art/{abs(hash(self.path))}/100x100bb.jpg",
+        }]}).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out first
+
+    def log_message(self, *args):
+        pass
+
+
+class _Phone:
+    """A phone as BlueZ reports it: connected or not, playing a playlist."""
+
+    PATH = "/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF"
+
+    def __init__(self):
+        self.connected = False
+        self._track = 0
+        self._track_started = 0.0
+
+    def _duration_s(self) -> int:
+        return 150 + self._track * 37 % 150
+
+    def skip(self, now: float) -> None:
+        self._track += 1
+        self._track_started = now
+
+    def managed_objects(self) -> dict:
+        if not self.connected:
+            return {}
+        return {self.PATH: {
+            "org.bluez.Device1": {
+                "Connected": True, "Name": "Soak Phone", "Address": "AA:BB:CC:DD:EE:FF",
+                "Icon": "phone",
+            },
+            "org.bluez.MediaControl1": {},
+        }}
+
+    def player_properties(self, now: float) -> dict:
+        if now - self._track_started >= self._duration_s():
+            self.skip(now)
+        n = self._track
+        return {
+            "Track": {
+                "Title": f"Track {n}",
+                "Artist": f"Artist {n % 50}",
+                "Album": f"Album {n % 120}",
+                "Duration": self._duration_s() * 1000,
+            },
+            "Status": "playing",
+            "Position": int((now - self._track_started) * 1000),
+        }
+
+
+def _scaled_rule(rule: dict, speedup: float) -> dict:
+    scaled = {k: v / speedup if k in _RULE_DURATIONS else v for k, v in rule.items()}
+    if "when" in rule:
+        scaled["when"] = [_scaled_rule(c, speedup) for c in rule["when"]]
+    return scaled
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Sample:
+    sim_h: float
+    heap_bytes: int
+    rss_bytes: float
+    threads: int
+    fds: int
+
+
+def _measure(sim_h: float) -> Sample:
+    return Sample(
+        sim_h=sim_h,
+        heap_bytes=tracemalloc.get_traced_memory()[0],
+        rss_bytes=metrics.rss_bytes(),
+        threads=threading.active_count(),
+        fds=len(os.listdir("/proc/self/fd")),
+    )
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+
+# ---------------------------------------------------------------------------
+# The drive
+# ---------------------------------------------------------------------------
+
+class Soak(QObject):
+    """Wires the controllers, runs the scripted drive and keeps the samples."""
+
+    def __init__(self, hours: float, speedup: float, warmup_h: float, snapshot_s: float,
+                 parent=None):
+        super().__init__(parent)
+        self.hours, self.speedup = hours, speedup
+        self._warmup_h = warmup_h
+        self.samples: list[Sample] = []
+        self.baseline: Sample | None = None
+        self.baseline_snapshot: tracemalloc.Snapshot | None = None
+
+        # As main.py
+        dispatcher = DBusCommandDispatcher()
+        frame_clock = FrameClock(self)
+        self.bus = TelemetryBus()
+        self.journal = Journal() if config.JOURNAL_ENABLED else None
+        if self.journal is not None:
+            self.journal.attach(self.bus)
+        self.db_writer = DbWriter(self.bus, journal=self.journal)
+        self.alerts = AlertEngine(self.bus) if config.ALERTS_ENABLED else None
+        self.retention = RetentionWorker()
+        supervisor = LinkSupervisor(self.bus, parent=self)
+        self.engine = EngineController(self.bus, frame_clock, supervisor=supervisor, parent=self)
+        self.gauges = GaugePresenter(self.engine, frame_clock, parent=self)
+        self.music = MusicPlayerController(dispatcher, frame_clock, parent=self)
+        self.device = DeviceController(dispatcher, supervisor=supervisor, parent=self)
+        self.navigation = NavigationController(self.bus, supervisor=supervisor, parent=self)
+        self.governor = RateGovernor(self.engine, self.music, self.device, self.navigation,
+                                     time_scale=speedup, parent=self)
+        self.diagnostics = DiagnosticsController(self)
+        self.history = SessionHistoryModel(parent=self)
+        self.device.hasConnectedDeviceChanged.connect(self.music.set_bluetooth_connected)
+        if not config.ADAPTIVE_POLLING:
+            self.engine.set_poll_interval(max(1, round(100 / speedup)))
+            self.navigation.set_poll_interval(
+                max(1, round(config.GPS_UPDATE_INTERVAL_MS / speedup)))
+
+        self._phone = _Phone()
+        self._due: dict[str, float] = {}
+        self._ignition_on = True
+        self._skips_left = 0
+        self._view = 0
+        self._position = (0.0, 0.0)
+        self.navigation.gpsUpdated.connect(self._on_fix)
+
+        self._drive_timer = QTimer(self)
+        self._drive_timer.setInterval(max(1, round(1000 / speedup)))
+        self._drive_timer.timeout.connect(self._drive)
+        self._sample_timer = QTimer(self)
+        self._sample_timer.setInterval(round(snapshot_s * 1000))
+        self._sample_timer.timeout.connect(self._sample)
+        self._started = 0.0
+
+    def _on_fix(self, lat: float, lon: float, accuracy: float) -> None:
+        self._position = (lat, lon)
+
+    def sim_s(self) -> float:
+        return (time.monotonic() - self._started) * self.speedup
+
+    def start(self) -> None:
+        self.db_writer.start()
+        if self.alerts is not None:
+            self.alerts.start()
+        if config.RETENTION_ENABLED:
+            self.retention.start()
+        self._started = time.monotonic()
+        self.engine.keep_connected()
+        self._drive_timer.start()
+        self._sample_timer.start()
+        self._sample()
+
+    def stop(self) -> None:
+        self._drive_timer.stop()
+        self._sample_timer.stop()
+        self.engine.running = False
+        self.engine.disconnect()
+        self.retention.stop()
+        if self.alerts is not None:
+            self.alerts.stop()
+        self.db_writer.stop()
+        if self.journal is not None:
+            self.journal.close()
+
+    def _every(self, name: str, schedule: tuple[float, float], now: float) -> bool:
+        """True once per period, from *offset* simulated seconds into the drive."""
+        period, offset = schedule
+        due = self._due.setdefault(name, offset)
+        if now < due:
+            return False
+        self._due[name] = due + period * (1 + int((now - due) // period))
+        return True
+
+    def _after(self, name: str, delay_s: float, now: float) -> None:
+        self._due[name] = now + delay_s
+
+    def _fired(self, name: str, now: float) -> bool:
+        due = self._due.get(name)
+        if due is None or now < due:
+            return False
+        del self._due[name]
+        return True
+
+    def _drive(self) -> None:
+        now = self.sim_s()
+
+        # Ignition and the OBD link
+        if self._every("ignition", _IGNITION_CYCLE, now):
+            logger.info("%5.2f h  ignition off", now / 3600)
+            self._ignition_on = False
+            self.engine.disconnect()
+            self._after("ignition_on", _IGNITION_OFF_S, now)
+        if self._fired("ignition_on", now):
+            logger.info("%5.2f h  ignition on", now / 3600)
+            self._ignition_on = True
+            self.engine.keep_connected()
+        if self._every("obd_drop", _OBD_DROP, now) and self._ignition_on:
+            connection = self.engine.connection
+            if isinstance(connection, SimulatedOBD):
+                logger.info("%5.2f h  OBD link dropped", now / 3600)
+                connection.drop()
+
+        # The phone
+        if self._every("phone", _PHONE_CYCLE, now):
+            self._phone.connected = True
+            self._phone.skip(now)
+            self._after("phone_away", _PHONE_CYCLE[0] - _PHONE_AWAY_S, now)
+        if self._fired("phone_away", now):
+            logger.info("%5.2f h  phone out of range", now / 3600)
+            self._phone.connected = False
+        if self._every("bt_poll", (_BT_POLL_S, 0), now):
+            self.device.apply_managed_objects(self._phone.managed_objects())
+        if self._phone.connected and self._every("mpris_poll", (1, 0), now):
+            self.music.apply_player_properties(self._phone.player_properties(now))
+        if self._phone.connected and self._every("skips", _SKIP_BURST, now):
+            self._after("skip", 1, now)
+            self._skips_left = _SKIPS
+        if self._fired("skip", now):
+            self._phone.skip(now)
+            self.music.apply_player_properties(self._phone.player_properties(now))
+            self._skips_left -= 1
+            if self._skips_left > 0:
+                self._after("skip", 1, now)
+
+        # The driver's taps
+        if self._every("view", _VIEW_SWITCH, now):
+            self._view = (self._view + 1) % len(_VIEWS)
+            self.governor.setActiveView(_VIEWS[self._view])
+        if self._every("history", _HISTORY, now):
+            self.history.open()
+            while self.history.canFetchMore():
+                self.history.fetchMore()
+            self.history.close()
+        if self._every("diagnostics", _DIAGNOSTICS, now):
+            self.diagnostics.open()
+            self._after("diagnostics_close", 60, now)
+        if self._fired("diagnostics_close", now):
+            self.diagnostics.close()
+        if self.navigation.canRoute and self._every("route", _ROUTE, now):
+            lat, lon = self._position
+            self.navigation.routeTo(lat + 0.02, lon + 0.02)
+
+        if now >= self.hours * 3600:
+            self._sample()
+            QCoreApplication.quit()
+
+    def _sample(self) -> None:
+        sample = _measure(self.sim_s() / 3600)
+        self.samples.append(sample)
+        logger.info(
+            "%5.2f h  heap %6.1f MiB  RSS %6.1f MiB  threads %3d  fds %3d",
+            sample.sim_h, sample.heap_bytes / _MIB, sample.rss_bytes / _MIB,
+            sample.threads, sample.fds,
+        )
+        if self.baseline is None and sample.sim_h >= self._warmup_h:
+            self.baseline = sample
+            self.baseline_snapshot = _snapshot()
+            logger.info("%5.2f h  warm-up over; growth is measured from here", sample.sim_h)
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def _report(soak: Soak, args) -> bool:
+    """Print the growth against the budgets; True if every budget held."""
+    base = soak.baseline
+    tail = soak.samples[-3:]
+    if base is None or len(soak.samples) < 2:
+        print("Run too short to measure: lower --warmup-h or --snapshot-s")
+        return False
+    span_h = max(tail[-1].sim_h - base.sim_h, 1e-9)
+    growth = {
+        "heap": (min(s.heap_bytes for s in tail) - base.heap_bytes) / _MIB,
+        "rss": (min(s.rss_bytes for s in tail) - base.rss_bytes) / _MIB,
+        "threads": min(s.threads for s in tail) - base.threads,
+        "fds": min(s.fds for s in tail) - base.fds,
+    }
+    budgets = {"heap": args.heap_mb, "rss": args.rss_mb, "threads": args.threads, "fds": args.fds}
+    units = {"heap": "MiB", "rss": "MiB", "threads": "", "fds": ""}
+
+    db = SessionLocal()
+    try:
+        counts = [db.execute(select(func.count()).select_from(table)).scalar()
+                  for table in (DrivingSession, EngineReading, GpsReading)]
+    finally:
+        db.close()
+
+    print(f"\nSoak: {tail[-1].sim_h:.2f} h simulated in "
+          f"{tail[-1].sim_h * 3600 / args.speedup / 60:.1f} min; "
+          f"{counts[0]} sessions, {counts[1]} engine rows, {counts[2]} GPS fixes")
+    print(f"Peak: {max(s.threads for s in soak.samples)} threads, "
+          f"{max(s.fds for s in soak.samples)} fds, "
+          f"{max(s.rss_bytes for s in soak.samples) / _MIB:.1f} MiB RSS")
+    ok = True
+    for name, value in growth.items():
+        over = value > budgets[name]
+        ok &= not over
+        print(f"  {name:8s} {value:+8.2f} {units[name]:3s} ({value / span_h:+.2f}/h)  "
+              f"budget {budgets[name]:g}  {'OVER' if over else 'ok'}")
+
+    if growth["heap"] > budgets["heap"] or growth["rss"] > budgets["rss"]:
+        print("\nLargest heap growth since the warm-up:")
+        for stat in _snapshot().compare_to(soak.baseline_snapshot, "lineno")[:args.top]:
+            if stat.size_diff <= 0:
+                break
+            print(f"  {stat.size_diff / 1024:+9.1f} KiB  {stat.count_diff:+7d} blocks  "
+                  f"{stat.traceback}")
+    if growth["threads"] > budgets["threads"]:
+        names: dict[str, int] = {}
+        for thread in threading.enumerate():
+            name = re.sub(r"^Thread-\d+", "Thread", thread.name)
+            names[name] = names.get(name, 0) + 1
+        print("\nLive threads: " + ", ".join(f"{n} × {c}" for n, c in sorted(names.items())))
+    if growth["fds"] > budgets["fds"]:
+        targets: dict[str, int] = {}
+        for fd in os.listdir("/proc/self/fd"):
+            try:
+                target = os.readlink(f"/proc/self/fd/{fd}")
+            except OSError:
+                continue
+            kind = target.split(":")[0] if ":" in target else target
+            targets[kind] = targets.get(kind, 0) + 1
+        print("\nOpen fds: " + ", ".join(f"{t} × {c}" for t, c in
+                                        sorted(targets.items(), key=lambda i: -i[1])[:10]))
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hours", type=float, default=8.0, help="simulated drive length")
+    parser.add_argument("--speedup", type=float, default=60.0,
+                        help="simulated seconds per real second")
+    parser.add_argument("--warmup-h", type=float, default=3.0,
+                        help="simulated hours before the baseline: past the first ignition "
+                             "cycle, so trip analytics has loaded numpy and the caches are full")
+    parser.add_argument("--snapshot-s", type=float, default=10.0,
+                        help="real seconds between snapshots")
+    parser.add_argument("--heap-mb", type=float, default=4.0, help="traced heap growth budget")
+    parser.add_argument("--rss-mb", type=float, default=16.0, help="RSS growth budget")
+    parser.add_argument("--threads", type=int, default=2, help="live thread growth budget")
+    parser.add_argument("--fds", type=int, default=4, help="open fd growth budget")
+    parser.add_argument("--top", type=int, default=15, help="allocation sites listed on failure")
+    parser.add_argument("--keep", action="store_true", help=f"keep the scratch dir {_SCRATCH}")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the dashboard's logging")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s  %(name)s  %(message)s", datefmt="%H:%M:%S")
+    logger.setLevel(logging.INFO)
+
+    for name in _SCALED_S:
+        setattr(config, name, getattr(config, name) / args.speedup)
+    # Sample timestamps are wall-clock: alert windows sized in real-drive
+    # seconds would hold --speedup times the samples a real drive puts in them
+    config.ALERT_RULES = [_scaled_rule(rule, args.speedup) for rule in config.ALERT_RULES]
+    SimulatedOBD.time_scale = args.speedup
+
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), _ArtSearchHandler)
+    threading.Thread(target=stub.serve_forever, name="soak-art-stub", daemon=True).start()
+    config.ALBUM_ART_SEARCH_URL = f"http://127.0.0.1:{stub.server_address[1]}/search"
+
+    tracemalloc.start()
+    models.init_db()
+    app = QCoreApplication(sys.argv[:1])
+    if args.warmup_h >= args.hours:
+        parser.error("--warmup-h must be shorter than --hours")
+    soak = Soak(args.hours, args.speedup, args.warmup_h, args.snapshot_s)
+    logger.info("Soak: %.1f h at %g× (%.1f min), scratch data in %s",
+                args.hours, args.speedup, args.hours * 60 / args.speedup, _SCRATCH)
+    soak.start()
+    ok = False
+    try:
+        app.exec()
+        ok = _report(soak, args)
+    finally:
+        soak.stop()
+        stub.shutdown()
+        tracemalloc.stop()
+        if not args.keep:
+            shutil.rmtree(_SCRATCH, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import QtQuick 2.15
+import QtQuick.Controls 2.15
+
+// Dashcam preview.  Each new frame number makes the Image ask the
+// "dashcam" provider for the latest frame, which wraps the capture buffer
+// instead of copying it; cache is off so old frames are not kept around.
+Item {
+    id: root
+
+    required property var controller
+
+    // Creation can show the item before `controller` is assigned; onCompleted covers that
+    onVisibleChanged: if (controller) controller.setPreviewVisible(visible)
+    Component.onCompleted: controller.setPreviewVisible(visible)
+
+    Rectangle {
+        anchors.fill: parent
+        color: "black"
+
+        Image {
+            anchors.fill: parent
+            visible: controller.isActive && controller.previewFrame > 0
+            source: visible ? "image://dashcam/" + controller.previewFrame : ""
+            fillMode: Image.PreserveAspectFit
+            cache: false
+            asynchronous: false
+            smooth: false
+        }
+
+        Text {
+            anchors.centerIn: parent
+            visible: !controller.isActive
+            text: "CAMERA OFF"
+            font.pixelSize: 32
+            color: "gray"
+        }
+
+        Row {
+            anchors.top: parent.top
+            anchors.left: parent.left
+            anchors.margins: 12
+            spacing: 8
+            visible: controller.isActive
+
+            Rectangle {
+                width: 14
+                height: 14
+                radius: 7
+                anchors.verticalCenter: parent.verticalCenter
+                color: "red"
+            }
+
+            Text {
+                text: "REC   " + controller.ringStatus
+                font.pixelSize: 14
+                font.bold: true
+                color: "white"
+            }
+        }
+
+        Button {
+            anchors.bottom: parent.bottom
+            anchors.right: parent.right
+            anchors.margins: 12
+            flat: true
+            width: 120
+            height: 40
+
+            contentItem: Text {
+                text: controller.isActive ? "STOP" : "RECORD"
+                font.pixelSize: 14
+                font.bold: true
+                color: controller.isActive ? "#888888" : "red"
+                horizontalAlignment: Text.AlignHCenter
+                verticalAlignment: Text.AlignVCenter
+            }
+
+            background: Rectangle { color: "#99000000"; radius: 6 }
+            onClicked: controller.isActive ? controller.stop() : controller.start()
+        }
+    }
+}
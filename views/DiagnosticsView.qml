@@ -0,0 +1,80 @@
+import QtQuick 2.15
+import QtQuick.Layouts 2.15
+import QtQuick.Controls 2.15
+
+// Hidden page: press and hold the title in the status bar to open it
+Item {
+    id: root
+
+    Rectangle {
+        anchors.fill: parent
+        color: "#121212"
+
+        Button {
+            id: backButton
+            anchors.top: parent.top
+            anchors.left: parent.left
+            anchors.margins: 8
+            flat: true
+            width: 100
+            height: 36
+
+            contentItem: Text {
+                text: "← BACK"
+                font.pixelSize: 14
+                font.bold: true
+                color: "#888888"
+                horizontalAlignment: Text.AlignHCenter
+                verticalAlignment: Text.AlignVCenter
+            }
+
+            background: Rectangle { color: "transparent" }
+            onClicked: diagnosticsController.close()
+        }
+
+        Text {
+            anchors.verticalCenter: backButton.verticalCenter
+            anchors.right: parent.right
+            anchors.rightMargin: 16
+            text: "frame: " + frameClock.signalsLastFrame + " signals / "
+                  + frameClock.bindingsLastFrame + " bindings  (peak "
+                  + frameClock.peakSignalsPerFrame + ")"
+            font.pixelSize: 12
+            font.family: "monospace"
+            color: "#888888"
+        }
+
+        ListView {
+            anchors.top: backButton.bottom
+            anchors.left: parent.left
+            anchors.right: parent.right
+            anchors.bottom: parent.bottom
+            anchors.margins: 8
+            clip: true
+            model: diagnosticsController.rows
+
+            delegate: RowLayout {
+                width: ListView.view.width
+                spacing: 12
+
+                Text {
+                    Layout.preferredWidth: parent.width * 0.45
+                    text: modelData.name + (modelData.labels ? " {" + modelData.labels + "}" : "")
+                    font.pixelSize: 12
+                    font.family: "monospace"
+                    color: "#aaaaaa"
+                    elide: Text.ElideRight
+                }
+
+                Text {
+                    Layout.fillWidth: true
+                    text: modelData.summary
+                    font.pixelSize: 12
+                    font.family: "monospace"
+                    color: "cyan"
+                    elide: Text.ElideRight
+                }
+            }
+        }
+    }
+}
@@ -1,13 +1,24 @@
 import QtQuick 2.15
 import QtQuick.Layouts 2.15
+import Via.Charts 1.0
 import "../components"
 
 Item {
+    id: root
+
+    // Sparkline window, seconds (capped at the history length)
+    property int historySeconds: 300
+
+    // gaugePresenter updates at most once per frame, whatever the OBD rate
+    function format(value, suffix) {
+        return isNaN(value) ? "N/A" : Math.round(value) + suffix
+    }
+
     GridLayout {
         anchors.fill: parent
         anchors.margins: 20
         columns: 3
-        rows: 2
+        rows: 3
         columnSpacing: 10
         rowSpacing: 10
 
@@ -17,7 +28,7 @@ Item {
             Layout.fillWidth: true
             Layout.fillHeight: true
             label: "RPM"
-            value: engineController.rpm.toString()
+            value: root.format(gaugePresenter.rpm, "")
             valueColor: "lime"
             labelSize: 16
             valueSize: 48
@@ -28,7 +39,7 @@ Item {
             Layout.fillWidth: true
             Layout.fillHeight: true
             label: "SPEED (KPH)"
-            value: engineController.speed.toString()
+            value: root.format(gaugePresenter.speed, "")
             valueColor: "lime"
             labelSize: 16
             valueSize: 48
@@ -39,9 +50,8 @@ Item {
             Layout.fillWidth: true
             Layout.fillHeight: true
             label: "COOLANT"
-            value: engineController.coolantTemp
-            valueColor: engineController.coolantTemp !== "N/A" &&
-                        parseInt(engineController.coolantTemp) > 100 ? "red" : "cyan"
+            value: root.format(gaugePresenter.coolantTemp, "°C")
+            valueColor: gaugePresenter.coolantTemp > 100 ? "red" : "cyan"
             labelSize: 12
             valueSize: 28
         }
@@ -51,7 +61,7 @@ Item {
             Layout.fillWidth: true
             Layout.fillHeight: true
             label: "THROTTLE"
-            value: engineController.throttle
+            value: root.format(gaugePresenter.throttle, "%")
             valueColor: "orange"
             labelSize: 12
             valueSize: 28
@@ -62,10 +72,92 @@ Item {
             Layout.fillWidth: true
             Layout.fillHeight: true
             label: "LOAD"
-            value: engineController.engineLoad
+            value: root.format(gaugePresenter.engineLoad, "%")
             valueColor: "yellow"
             labelSize: 12
             valueSize: 28
         }
+
+        // Rolling history: one sparkline per channel, redrawn in place
+        Rectangle {
+            Layout.columnSpan: 3
+            Layout.fillWidth: true
+            Layout.fillHeight: true
+            Layout.preferredHeight: 1
+            color: "#1a1a1a"
+            border.color: "#333333"
+            border.width: 2
+            radius: 5
+
+            Row {
+                id: windowPicker
+                anchors.top: parent.top
+                anchors.right: parent.right
+                anchors.margins: 6
+                spacing: 6
+
+                Repeater {
+                    model: [60, 300, 600]
+                    delegate: Text {
+                        text: (modelData / 60) + " MIN"
+                        font.pixelSize: 12
+                        font.bold: root.historySeconds === modelData
+                        color: root.historySeconds === modelData ? "cyan" : "gray"
+
+                        MouseArea {
+                            anchors.fill: parent
+                            anchors.margins: -6
+                            onClicked: root.historySeconds = modelData
+                        }
+                    }
+                }
+            }
+
+            GridLayout {
+                anchors.top: windowPicker.bottom
+                anchors.left: parent.left
+                anchors.right: parent.right
+                anchors.bottom: parent.bottom
+                anchors.margins: 10
+                anchors.topMargin: 4
+                columns: 4
+                columnSpacing: 10
+
+                Repeater {
+                    model: [
+                        { label: "RPM", channel: "rpm", min: 0, max: 7000, color: "lime" },
+                        { label: "SPEED", channel: "speed", min: 0, max: 160, color: "lime" },
+                        { label: "COOLANT", channel: "coolantTemp", min: 40, max: 120, color: "cyan" },
+                        { label: "LOAD", channel: "engineLoad", min: 0, max: 100, color: "yellow" }
+                    ]
+                    delegate: Item {
+                        Layout.fillWidth: true
+                        Layout.fillHeight: true
+
+                        Text {
+                            id: chartLabel
+                            text: modelData.label
+                            font.pixelSize: 11
+                            color: "gray"
+                        }
+
+                        Sparkline {
+                            anchors.top: chartLabel.bottom
+                            anchors.left: parent.left
+                            anchors.right: parent.right
+                            anchors.bottom: parent.bottom
+                            anchors.topMargin: 2
+                            clip: true
+                            model: engineController.history
+                            channel: modelData.channel
+                            minimum: modelData.min
+                            maximum: modelData.max
+                            color: modelData.color
+                            seconds: root.historySeconds
+                        }
+                    }
+                }
+            }
+        }
     }
 }
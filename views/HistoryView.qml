@@ -0,0 +1,150 @@
+import QtQuick 2.15
+import QtQuick.Layouts 2.15
+import QtQuick.Controls 2.15
+
+// Past trips, newest first.  sessionHistory loads a page at a time as the
+// list nears its end; delegates are fixed-height and recycled, and every
+// value arrives preformatted, so scrolling does no work beyond binding text.
+Item {
+    id: root
+
+    Rectangle {
+        anchors.fill: parent
+        color: "#121212"
+
+        Button {
+            id: backButton
+            anchors.top: parent.top
+            anchors.left: parent.left
+            anchors.margins: 8
+            flat: true
+            width: 100
+            height: 36
+
+            contentItem: Text {
+                text: "← BACK"
+                font.pixelSize: 14
+                font.bold: true
+                color: "#888888"
+                horizontalAlignment: Text.AlignHCenter
+                verticalAlignment: Text.AlignVCenter
+            }
+
+            background: Rectangle { color: "transparent" }
+            onClicked: sessionHistory.close()
+        }
+
+        Text {
+            anchors.verticalCenter: backButton.verticalCenter
+            anchors.right: parent.right
+            anchors.rightMargin: 16
+            text: "TRIPS"
+            font.pixelSize: 18
+            font.bold: true
+            color: "cyan"
+        }
+
+        ListView {
+            id: list
+            anchors.top: backButton.bottom
+            anchors.left: parent.left
+            anchors.right: parent.right
+            anchors.bottom: parent.bottom
+            anchors.margins: 8
+            clip: true
+            model: sessionHistory
+            reuseItems: true
+            cacheBuffer: 6 * 64
+            boundsBehavior: Flickable.StopAtBounds
+
+            delegate: Rectangle {
+                required property int index
+                required property string startedAt
+                required property string duration
+                required property string distance
+                required property string avgSpeed
+                required property string maxSpeed
+                required property string fuel
+                required property int hardEvents
+                required property int alerts
+                required property bool inProgress
+
+                width: ListView.view.width
+                height: 64
+                color: index % 2 ? "#161616" : "#1c1c1c"
+
+                ColumnLayout {
+                    anchors.fill: parent
+                    anchors.leftMargin: 12
+                    anchors.rightMargin: 12
+                    anchors.topMargin: 6
+                    anchors.bottomMargin: 6
+                    spacing: 2
+
+                    RowLayout {
+                        Layout.fillWidth: true
+                        spacing: 16
+
+                        Text {
+                            Layout.fillWidth: true
+                            text: startedAt
+                            font.pixelSize: 16
+                            font.bold: true
+                            color: "white"
+                            elide: Text.ElideRight
+                        }
+
+                        Text {
+                            text: inProgress ? "IN PROGRESS" : duration
+                            font.pixelSize: 14
+                            color: inProgress ? "lime" : "#aaaaaa"
+                        }
+
+                        Text {
+                            text: distance
+                            font.pixelSize: 16
+                            font.bold: true
+                            color: "cyan"
+                        }
+                    }
+
+                    RowLayout {
+                        Layout.fillWidth: true
+                        spacing: 16
+
+                        Text {
+                            text: "avg " + avgSpeed + "   max " + maxSpeed + "   fuel " + fuel
+                            font.pixelSize: 12
+                            font.family: "monospace"
+                            color: "#888888"
+                        }
+
+                        Item { Layout.fillWidth: true }
+
+                        Text {
+                            text: hardEvents + " hard accel/brake"
+                            font.pixelSize: 12
+                            color: hardEvents > 0 ? "orange" : "#555555"
+                        }
+
+                        Text {
+                            text: alerts + (alerts === 1 ? " alert" : " alerts")
+                            font.pixelSize: 12
+                            color: alerts > 0 ? "red" : "#555555"
+                        }
+                    }
+                }
+            }
+
+            Text {
+                anchors.centerIn: parent
+                visible: sessionHistory.count === 0
+                text: "No trips recorded yet"
+                font.pixelSize: 16
+                color: "#555555"
+            }
+
+            ScrollIndicator.vertical: ScrollIndicator { }
+        }
+    }
+}
@@ -11,6 +11,11 @@ ApplicationWindow {
     title: "EscapeDash"
     color: "black"
 
+    // Views to build in the background after the first frame (set from main.py)
+    property var prewarmViews: []
+    // Build every view before the first frame (LAZY_VIEWS=false, set from main.py)
+    property bool eagerViews: false
+
     // Connection Screen — shown when NOT connected
     Item {
         id: connectionScreen
@@ -158,10 +163,34 @@ ApplicationWindow {
                         font.pixelSize: 18
                         font.bold: true
                         color: "cyan"
+
+                        // Hidden diagnostics page
+                        MouseArea {
+                            anchors.fill: parent
+                            pressAndHoldInterval: 1500
+                            onPressAndHold: diagnosticsController.open()
+                        }
                     }
 
                     Item { Layout.fillWidth: true }
 
+                    Button {
+                        flat: true
+                        implicitHeight: 40
+
+                        contentItem: Text {
+                            text: "TRIPS"
+                            font.pixelSize: 14
+                            font.bold: true
+                            color: "#888888"
+                            horizontalAlignment: Text.AlignHCenter
+                            verticalAlignment: Text.AlignVCenter
+                        }
+
+                        background: Rectangle { color: "transparent" }
+                        onClicked: sessionHistory.open()
+                    }
+
                     Text {
                         id: clockText
                         font.pixelSize: 16
@@ -187,43 +216,65 @@ ApplicationWindow {
                 Layout.fillWidth: true
                 Layout.fillHeight: true
 
-                EngineView {
+                LazyView {
                     anchors.fill: parent
-                    visible: tabBar.currentIndex === 0
+                    view: Qt.resolvedUrl("EngineView.qml")
+                    shown: tabBar.currentIndex === 0
+                    eager: window.eagerViews
                 }
 
-                MediaView {
+                LazyView {
                     anchors.fill: parent
-                    visible: tabBar.currentIndex === 1
-                    controller: musicController
+                    view: Qt.resolvedUrl("MediaView.qml")
+                    viewProperties: ({ controller: musicController })
+                    shown: tabBar.currentIndex === 1
+                    prewarm: window.prewarmViews.indexOf("media") !== -1
+                    eager: window.eagerViews
                 }
 
-                NavigationView {
-                    id: navigationView
+                // Chromium-backed: QtWebEngine is only loaded when this is first needed
+                LazyView {
                     anchors.fill: parent
-                    visible: tabBar.currentIndex === 2
-                    controller: navigationController
+                    view: Qt.resolvedUrl("NavigationView.qml")
+                    viewProperties: ({ controller: navigationController })
+                    shown: tabBar.currentIndex === 2
+                    prewarm: window.prewarmViews.indexOf("navigation") !== -1
+                    eager: window.eagerViews
                 }
 
-                Rectangle {
+                LazyView {
                     anchors.fill: parent
-                    visible: tabBar.currentIndex === 3
-                    color: "black"
-                    Text {
-                        anchors.centerIn: parent
-                        text: "CAMERA\n(Coming Soon)"
-                        font.pixelSize: 32
-                        color: "gray"
-                        horizontalAlignment: Text.AlignHCenter
-                    }
+                    view: Qt.resolvedUrl("CameraView.qml")
+                    viewProperties: ({ controller: cameraController })
+                    shown: tabBar.currentIndex === 3
+                    eager: window.eagerViews
+                }
+
+                LazyView {
+                    anchors.fill: parent
+                    view: Qt.resolvedUrl("DeviceView.qml")
+                    shown: deviceController.showDeviceView
+                    prewarm: window.prewarmViews.indexOf("device") !== -1
+                    eager: window.eagerViews
+                    z: 1
                 }
 
-                DeviceView {
+                LazyView {
                     anchors.fill: parent
-                    visible: deviceController.showDeviceView
+                    view: Qt.resolvedUrl("HistoryView.qml")
+                    shown: sessionHistory.active
+                    eager: window.eagerViews
                     z: 1
                 }
 
+                LazyView {
+                    anchors.fill: parent
+                    view: Qt.resolvedUrl("DiagnosticsView.qml")
+                    shown: diagnosticsController.active
+                    eager: window.eagerViews
+                    z: 3
+                }
+
                 // Attract mode — exit button, bottom-right corner
                 Rectangle {
                     anchors.right: parent.right
@@ -270,6 +321,10 @@ ApplicationWindow {
 
                 property int currentIndex: 0
 
+                // Polling cadence follows the visible tab
+                onCurrentIndexChanged: rateGovernor.setActiveView(
+                    ["engine", "media", "navigation", "camera"][currentIndex])
+
                 RowLayout {
                     anchors.fill: parent
                     spacing: 0
@@ -12,14 +12,39 @@ Item {
         anchors.fill: parent
         color: "#1a1a1a"
 
+        // Displayed art — only ever pointed at an image that finished loading
         Image {
+            id: albumArt
             anchors.fill: parent
-            source: controller.albumArtUrl
+            sourceSize: Qt.size(width, height)
+            asynchronous: true
             fillMode: Image.PreserveAspectCrop
-            visible: controller.albumArtUrl !== ""
+            visible: controller.albumArtUrl !== "" && status === Image.Ready
             opacity: 0.75
         }
 
+        // Off-screen loader: decodes at display size on the provider's worker
+        // thread, then hands the (now cached) result to albumArt
+        Image {
+            id: albumArtPending
+            anchors.fill: parent
+            sourceSize: Qt.size(width, height)
+            asynchronous: true
+            visible: false
+            source: controller.albumArtUrl !== "" && width > 0 && height > 0
+                    ? "image://albumart/" + encodeURIComponent(controller.albumArtUrl)
+                    : ""
+
+            onStatusChanged: {
+                if (status === Image.Ready)
+                    albumArt.source = source
+            }
+            onSourceChanged: {
+                if (source == "")
+                    albumArt.source = ""
+            }
+        }
+
         Rectangle {
             anchors.fill: parent
             gradient: Gradient {
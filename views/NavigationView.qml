@@ -4,7 +4,7 @@ import QtWebEngine
 WebEngineView {
     id: navigationView
     
-    property var controller  // Will be set from Python
+    required property var controller
     
     url: Qt.resolvedUrl("../assets/navigation/map.html")
     
@@ -31,6 +31,20 @@ WebEngineView {
         function onGpsUpdated(lat, lon, accuracy) {
             navigationView.updateGPSData(lat, lon, accuracy)
         }
+        function onRouteChanged(points) {
+            navigationView.runJavaScript(points ? `window.showRoute(${points});` : "window.clearRoute();")
+        }
+        function onInstructionChanged(text) {
+            navigationView.runJavaScript(`window.showInstruction(${JSON.stringify(text)});`)
+        }
+    }
+
+    // Destinations picked on the map arrive as "via:route:<lat>,<lon>"
+    onJavaScriptConsoleMessage: function(level, message, lineNumber, sourceID) {
+        if (controller && message.startsWith("via:route:")) {
+            const position = message.substring(10).split(",")
+            controller.routeTo(Number(position[0]), Number(position[1]))
+        }
     }
 
     // Handle page load completion